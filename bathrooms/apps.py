@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BathroomsConfig(AppConfig):
     name = 'bathrooms'
+
+    def ready(self):
+        from bathrooms import signals  # noqa: F401
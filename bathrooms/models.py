@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.db.models import Sum
 from django.utils.timezone import localtime, now
+from shell.models import DailyRevenue
 
 
 class BathroomFee(models.Model):
@@ -47,14 +48,18 @@ class BathroomEntryManager(models.Manager):
         return BathroomEntryQuerySet(self.model, using=self._db)
 
     def today_income(self):
-        return self.get_queryset().today().total_income()
+        today = localtime(now()).date()
+        _, amount = DailyRevenue.objects.income(
+            today, today, [DailyRevenue.BATHROOM_FEE]
+        )
+        return amount
 
     def month_income(self):
-        now_date = localtime(now())
-        return self.get_queryset().filter(
-            entry_date_hour__year=now_date.year,
-            entry_date_hour__month=now_date.month
-        ).total_income()
+        today = localtime(now()).date()
+        _, amount = DailyRevenue.objects.income(
+            today.replace(day=1), today, [DailyRevenue.BATHROOM_FEE]
+        )
+        return amount
     
     def total_today(self):
         return self.get_queryset().today().count()
@@ -81,5 +86,50 @@ class BathroomEntry(models.Model):
 
     def __str__(self):
         return f'Entrada al baño el {self.entry_date_hour}'
-    
-    
\ No newline at end of file
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_fee_id = instance.__dict__.get("fee_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(
+            self.__class__,
+            instance=self
+        )
+
+        previous_fee_id = (
+            None if self._state.adding
+            else getattr(self, "_loaded_fee_id", None)
+        )
+
+        # La entrada y el libro de ingresos se guardan en la misma transacción
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+            if previous_fee_id != self.fee_id:
+                DailyRevenue.objects.db_manager(using).move(
+                    self.revenue_line(previous_fee_id),
+                    self.revenue_line(self.fee_id)
+                )
+
+        self._loaded_fee_id = self.fee_id
+
+    def revenue_line(self, fee_id):
+        """
+        Aporte de la entrada al libro de ingresos: (día, origen, monto)
+        """
+        if fee_id is None:
+            return None
+
+        if fee_id == self.fee_id and BathroomEntry.fee.is_cached(self):
+            amount = self.fee.amount
+        else:
+            amount = BathroomFee.objects.values_list("amount", flat=True).get(pk=fee_id)
+
+        return (
+            localtime(self.entry_date_hour).date(),
+            DailyRevenue.BATHROOM_FEE,
+            amount,
+        )
@@ -0,0 +1,13 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from bathrooms.models import BathroomEntry
+from shell.models import DailyRevenue
+
+
+@receiver(pre_delete, sender=BathroomEntry)
+def remove_bathroom_revenue(sender, instance, using, **kwargs):
+    DailyRevenue.objects.db_manager(using).move(
+        instance.revenue_line(instance.fee_id),
+        None
+    )
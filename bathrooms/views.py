@@ -46,7 +46,6 @@ def entry_bathroom_register_view(request, fee_id):
     bathroom_entry = BathroomEntry.objects.create(
         fee=fee
     )
-    bathroom_entry.save()
     messages.success(
         request,
         f"El acceso para {bathroom_entry.fee.name} se guardó correctamente."
@@ -44,5 +44,9 @@ else:
     print("⚠️ Variables de superuser no definidas, saltando...")
 EOF
 
+# El worker de reportes corre en su propio servicio/proceso
+# (python manage.py run_report_worker: el servicio "worker" de
+# docker-compose.yml o uno aparte en Railway), no junto a Gunicorn
+
 echo "🚀 Iniciando Gunicorn..."
 exec gunicorn parkopsbackend.wsgi:application --bind 0.0.0.0:8000
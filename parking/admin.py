@@ -1,5 +1,5 @@
 from django.contrib import admin
-from parking.models import Configuration, Entry, Fee, Range, PlatePolicy
+from parking.models import Configuration, Entry, Fee, Range, PlatePolicy, ReportJob
 
 
 admin.site.register(Configuration)
@@ -22,4 +22,10 @@ class FeeAdmin(admin.ModelAdmin):
 class PlatePolicyAdmin(admin.ModelAdmin):
     list_display = ("plate", "owner_name", "amount", "billing_type", "active")
     search_fields = ('plate',)
-    list_per_page = 20
\ No newline at end of file
+    list_per_page = 20
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("report_type", "output_format", "status", "progress", "requested_by", "created_at", "finished_at")
+    list_filter = ("status", "report_type", "output_format")
+    list_per_page = 20
@@ -0,0 +1,15 @@
+from django.utils.functional import SimpleLazyObject
+
+from parking.models import Configuration
+
+
+def occupancy(request):
+    """
+    Ocupación del parqueo ({capacity, occupied, available}).
+
+    Se consulta solo si la plantilla la usa y lee el contador de la
+    configuración, nunca la tabla de entradas.
+    """
+    return {
+        "occupancy": SimpleLazyObject(Configuration.objects.occupancy),
+    }
@@ -1,5 +1,7 @@
 from django import forms
 from .models import Fee, Entry, Configuration, PlatePolicy
+from parking.services.fee_catalog import fee_catalog
+from parking.services.tariff_simulator import parse_range_table
 from django.core.validators import RegexValidator
 from django.utils.timezone import localdate
 
@@ -13,10 +15,10 @@ class EntryForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
 
         # Buscar tarifa por defecto
-        default_fee = Fee.objects.filter(default=True).first()
+        default_fee_id = fee_catalog.default_fee_id()
 
-        if default_fee:
-            self.fields['fee'].initial = default_fee.id
+        if default_fee_id:
+            self.fields['fee'].initial = default_fee_id
 
     class Meta:
         model = Entry
@@ -136,14 +138,8 @@ class EntryEditForm(forms.ModelForm):
                 "La placa solo puede contener letras y números."
             )
         
-        # Validar duplicados en entradas activas (excluyendo el registro actual)
-        qs = Entry.objects.filter(plate=plate, state=True).exclude(pk=self.instance.pk)
-        
-        if qs.exists():
-            raise forms.ValidationError(
-                "Ya existe una entrada activa con esta placa."
-            )
-        
+        # Los duplicados en entradas activas los rechaza la base de datos
+        # al guardar (restricción única parcial por placa activa)
         return plate
 
     def __init__(self, *args, **kwargs):
@@ -269,6 +265,37 @@ class PlatePolicyForm(forms.ModelForm):
 
         return cleaned_data
 
+class PlatePolicyImportForm(forms.Form):
+    file = forms.FileField(
+        label="Archivo",
+        error_messages={
+            'required': 'Selecciona un archivo CSV o XLSX',
+        },
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control bg-dark text-light border-secondary rounded-3',
+            'accept': '.csv,.xlsx',
+        })
+    )
+
+    dry_run = forms.BooleanField(
+        label="Solo validar (no guardar)",
+        required=False,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input',
+            'role': 'switch'
+        })
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError(
+                "El archivo debe ser .csv o .xlsx"
+            )
+
+        return file
+
 class ReportFilterByDayForm(forms.Form):
     date = forms.DateField(
         label="Fecha",
@@ -374,4 +401,74 @@ class ReportFilterByPlateForm(forms.Form):
             'class': 'form-control',
             'type': 'date'
         })
-    )
\ No newline at end of file
+    )
+
+class TariffSimulationForm(forms.Form):
+    fee = forms.ModelChoiceField(
+        label="Tarifa",
+        queryset=Fee.objects.all(),
+        required=True,
+        empty_label="-Seleccione una tarifa-",
+        error_messages={
+            'required': 'La tarifa es obligatoria',
+        },
+        widget=forms.Select(attrs={
+            'class': 'form-select'
+        })
+    )
+    start_date = forms.DateField(
+        label="Desde",
+        required=True,
+        initial=localdate,
+        error_messages={
+            'required': 'La fecha inicial es obligatoria',
+            'invalid': 'Ingresa una fecha válida'
+        },
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+    end_date = forms.DateField(
+        label="Hasta",
+        required=True,
+        initial=localdate,
+        error_messages={
+            'required': 'La fecha final es obligatoria',
+            'invalid': 'Ingresa una fecha válida'
+        },
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+    ranges = forms.CharField(
+        label="Rangos propuestos",
+        required=True,
+        error_messages={
+            'required': 'Debes indicar los rangos propuestos',
+        },
+        widget=forms.Textarea(attrs={
+            'class': 'form-control font-monospace',
+            'rows': 6,
+            'placeholder': '0: 1.00\n60: 1.50\n120: 2.00'
+        })
+    )
+
+    def clean_ranges(self):
+        try:
+            return parse_range_table(self.cleaned_data['ranges'])
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+
+        if start_date and end_date and end_date < start_date:
+            raise forms.ValidationError(
+                "La fecha final no puede ser anterior a la inicial"
+            )
+
+        return cleaned_data
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from time import perf_counter
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localtime, now
+
+from parking.services.fee_catalog import fee_catalog
+from parking.services.report_jobs import PDF_TEMPLATES
+from parking.services.report_pdf import PDF_CHUNK_ROWS, render_report_pdf
+
+
+def sample_context(rows):
+    """
+    Contexto de reporte con entradas ficticias (no toca la base)
+    """
+    today = localtime(now())
+    fees = fee_catalog.all() or [None]
+
+    entries = [
+        SimpleNamespace(
+            plate=f"P{100000 + index}",
+            entry_date_hour=today - timedelta(minutes=index % 900 + 30),
+            departure_date_hour=today - timedelta(minutes=index % 30),
+            duration=f"{index % 15:02d}:{index % 60:02d}",
+            type="Tarifa",
+            fee=fees[index % len(fees)],
+            final_amount=Decimal(index % 20),
+        )
+        for index in range(rows)
+    ]
+
+    return {
+        "date": today.strftime("%d/%m/%Y"),
+        "month_date": today.strftime("%m/%Y"),
+        "start_date": today.strftime("%d/%m/%Y"),
+        "end_date": today.strftime("%d/%m/%Y"),
+        "entries": entries,
+        "today": today,
+        "total_income": sum(entry.final_amount for entry in entries),
+        "summary": [],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de generar un reporte PDF grande según la cantidad "
+        "de procesos usados para renderizar las partes de la tabla"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Entradas del reporte (por defecto 5000)")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4],
+            help="Cantidades de procesos a comparar (por defecto 1 2 4)",
+        )
+        parser.add_argument("--report", choices=PDF_TEMPLATES, default="month", help="Plantilla del reporte")
+        parser.add_argument("--chunk-rows", type=int, default=PDF_CHUNK_ROWS, help="Filas por parte")
+        parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por medición (se toma la mejor)")
+        parser.add_argument("--base-url", default="", help="URL base para los recursos estáticos")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1:
+            raise CommandError("--rows debe ser mayor que cero")
+
+        context = sample_context(options["rows"])
+        template_name = PDF_TEMPLATES[options["report"]]
+
+        self.stdout.write(
+            f"{options['rows']} filas, partes de {options['chunk_rows']} filas"
+        )
+        self.stdout.write(f"{'Procesos':>10}{'Segundos':>12}{'Aceleración':>14}")
+
+        baseline = None
+
+        for workers in options["workers"]:
+            # La primera vuelta levanta el pool y no se mide
+            if workers > 1:
+                self._render(template_name, context, options, workers)
+
+            elapsed = min(
+                self._render(template_name, context, options, workers)
+                for _ in range(options["repeat"])
+            )
+
+            baseline = baseline or elapsed
+
+            self.stdout.write(
+                f"{workers:>10}{elapsed:>12.2f}{baseline / elapsed:>13.2f}x"
+            )
+
+    def _render(self, template_name, context, options, workers):
+        started = perf_counter()
+
+        render_report_pdf(
+            template_name,
+            context,
+            options["base_url"],
+            BytesIO(),
+            workers=workers,
+            chunk_rows=options["chunk_rows"],
+        )
+
+        return perf_counter() - started
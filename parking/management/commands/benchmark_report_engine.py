@@ -0,0 +1,74 @@
+from datetime import date
+from io import BytesIO
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.models import Entry
+from parking.services.report_service import (
+    generate_month_report,
+    generate_period_report,
+)
+from parking.utils import write_report_excel
+
+
+def _counted(rows, counter):
+    for row in rows:
+        counter[0] += 1
+        yield row
+
+
+def _write_excel(context):
+    """
+    Escribe el Excel en memoria; retorna las filas del detalle
+    """
+    counter = [0]
+    write_report_excel(
+        {**context, "entries": _counted(context["entries"], counter)},
+        BytesIO(),
+    )
+
+    return counter[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el reporte de un solo recorrido (resumen del motor y "
+        "detalle guardado) generando resumen y Excel, y verifica que el "
+        "detalle tenga todas las entradas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, required=True, help="Fecha inicial (AAAA-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, required=True, help="Fecha final (AAAA-MM-DD)")
+        parser.add_argument("--month", action="store_true", help="Usar el reporte del mes de --start")
+        parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se toma la mejor)")
+
+    def handle(self, *args, **options):
+        if options["end"] < options["start"]:
+            raise CommandError("La fecha final no puede ser anterior a la inicial")
+
+        if options["month"]:
+            entries = Entry.objects.custom_report(month_date=options["start"])
+            generate = lambda: generate_month_report(options["start"])
+        else:
+            entries = Entry.objects.custom_report(options["start"], options["end"])
+            generate = lambda: generate_period_report(options["start"], options["end"])
+
+        best = None
+
+        for _ in range(max(options["repeat"], 1)):
+            started = perf_counter()
+            context = generate()
+            rows = _write_excel(context)
+            elapsed = perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        self.stdout.write("Salidas: resumen y Excel del detalle")
+        self.stdout.write(f"{'Filas':>10}{'Total':>14}{'Segundos':>12}")
+        self.stdout.write(f"{rows:>10}{context['total_income']:>14,.2f}{best:>12.3f}")
+
+        if rows != entries.count():
+            raise CommandError("El detalle del reporte no tiene todas las entradas")
+
+        self.stdout.write(self.style.SUCCESS("El detalle tiene todas las entradas"))
@@ -0,0 +1,238 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import localdate
+
+from parking.models import Entry
+from parking.services.entry_partitions import (
+    DEFAULT_PARTITION,
+    TABLE,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    partition_name,
+)
+
+
+# Cantidad de entradas sintéticas por defecto: con pocas filas el
+# planificador prefiere recorrer la tabla aunque exista el índice
+DEFAULT_SEED = 20000
+
+# Días hacia atrás en los que se reparten las entradas sintéticas: con la
+# tabla particionada cada mes debe tener un volumen realista de filas
+SEED_DAYS = 90
+
+# Recorridos secuenciales sobre la tabla o alguna de sus particiones, y
+# todas las tablas de entradas que lee el plan
+SEQ_SCAN = re.compile(rf"Seq Scan on ({TABLE}\w*)")
+PLAN_TABLE = re.compile(rf" on ({TABLE}\w*)")
+
+MONTH_PARTITION = re.compile(rf"{TABLE}_p\d{{4}}_\d{{2}}")
+
+# Consultas que leen un mes completo de salidas
+MONTH_QUERIES = {"salidas del mes", "reporte mensual"}
+
+
+def _has_rows(cursor, table):
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+    return cursor.fetchone()[0]
+
+
+def _only_active(cursor):
+    if not is_partitioned(cursor):
+        return False
+
+    cursor.execute(
+        f"SELECT NOT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE departure_date_hour IS NOT NULL)"
+    )
+    return cursor.fetchone()[0]
+
+
+def seq_scans(cursor, plan, month=None):
+    """
+    Tablas o particiones de entradas que el plan recorre completas. Con
+    la tabla particionada solo se aceptan:
+    - las particiones vacías;
+    - la partición por defecto si solo tiene entradas activas (no crece
+      con el historial, la acota la capacidad del parqueo);
+    - para una consulta de `month`, su partición cuando es la única con
+      filas que lee el plan (la poda la limitó al mes)
+    """
+    read = {
+        table for table in PLAN_TABLE.findall(plan)
+        if MONTH_PARTITION.fullmatch(table) and _has_rows(cursor, table)
+    }
+    allowed = {partition_name(month)} if month and read == {partition_name(month)} else set()
+
+    if _only_active(cursor):
+        allowed.add(DEFAULT_PARTITION)
+
+    return [
+        table for table in SEQ_SCAN.findall(plan)
+        if table not in allowed
+        and not (MONTH_PARTITION.fullmatch(table) and table not in read)
+    ]
+
+
+def seed_entries(total):
+    """
+    Inserta entradas cerradas repartidas en los últimos SEED_DAYS días y
+    unas cuantas activas, luego actualiza las estadísticas. Con la tabla
+    particionada crea antes las particiones de esos años
+    """
+    active = min(total // 100, 500)
+
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            current_month = month_start(localdate())
+            first_month = month_start(localdate() - timedelta(days=SEED_DAYS + 1))
+            ensure_partitions(cursor, first_month, current_month)
+
+        cursor.execute(
+            """
+            INSERT INTO parking_entry (
+                plate, plate_normalized, plate_display,
+                entry_date_hour, departure_date_hour,
+                state, final_minutes, final_amount
+            )
+            SELECT
+                'P' || (i %% 50000),
+                'P' || (i %% 50000),
+                'P' || (i %% 50000),
+                entry_at,
+                entry_at + make_interval(mins => minutes),
+                false,
+                minutes,
+                (minutes / 60 + 1)::numeric(10, 2)
+            FROM (
+                SELECT
+                    i,
+                    now() - make_interval(mins => (random() * %s)::int) AS entry_at,
+                    (random() * 600)::int + 1 AS minutes
+                FROM generate_series(1, %s) AS i
+            ) AS seed
+            """,
+            [SEED_DAYS * 24 * 60, total - active],
+        )
+        cursor.execute(
+            """
+            INSERT INTO parking_entry (
+                plate, plate_normalized, plate_display, entry_date_hour, state
+            )
+            SELECT
+                'SEED' || i,
+                'SEED' || i,
+                'SEED' || i,
+                now() - make_interval(mins => (random() * 600)::int),
+                true
+            FROM generate_series(1, %s) AS i
+            """,
+            [active],
+        )
+        cursor.execute("ANALYZE parking_entry")
+
+
+def hot_queries(today):
+    """
+    Consultas frecuentes sobre Entry que siempre deben usar un índice
+    """
+    return {
+        "busqueda de placa activa": (
+            Entry.objects.active().filter(plate="P100")
+        ),
+        "entradas del día": (
+            Entry.objects.entries_today(today)
+        ),
+        "historial del día y activos": (
+            Entry.objects
+            .entries_today_and_active(today)
+            .order_by("-state", "-entry_date_hour")
+        ),
+        "salidas del día": (
+            Entry.objects.departure_today(today).values("final_amount")
+        ),
+        "salidas del mes": (
+            Entry.objects
+            .departure_month(today.year, today.month)
+            .values("final_amount")
+        ),
+        "reporte diario": (
+            Entry.objects.custom_report(today)
+        ),
+        "reporte mensual": (
+            Entry.objects.custom_report(month_date=today)
+        ),
+        "reporte por placa": (
+            Entry.objects.custom_report(today, today, n_plate="P100")
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta EXPLAIN sobre las consultas frecuentes de Entry y falla "
+        "si alguna recurre a un recorrido secuencial de la tabla"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=DEFAULT_SEED,
+            help=(
+                "Cantidad de entradas sintéticas a insertar antes de medir "
+                "(se revierten al terminar; 0 para medir solo los datos "
+                "existentes)"
+            ),
+        )
+        parser.add_argument("--verbose-plans", action="store_true", help="Mostrar los planes completos")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este chequeo requiere PostgreSQL")
+
+        with transaction.atomic():
+            if options["seed"]:
+                seed_entries(options["seed"])
+                self.stdout.write(
+                    f"Se insertaron {options['seed']} entradas sintéticas"
+                )
+
+            failures = self._explain_all(options["verbose_plans"])
+
+            # Nunca dejar los datos sintéticos
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                "Consultas con recorrido secuencial: " + ", ".join(failures)
+            )
+
+        self.stdout.write(self.style.SUCCESS("Todas las consultas usan índices"))
+
+    def _explain_all(self, verbose):
+        failures = []
+        today = localdate()
+
+        for name, queryset in hot_queries(today).items():
+            plan = queryset.explain()
+
+            with connection.cursor() as cursor:
+                scanned = seq_scans(
+                    cursor,
+                    plan,
+                    month=month_start(today) if name in MONTH_QUERIES else None,
+                )
+
+            if scanned:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"✗ {name}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✓ {name}"))
+
+            if verbose or scanned:
+                self.stdout.write(plan)
+
+        return failures
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import localdate
+
+from parking.services.entry_partitions import (
+    PARTITION_MONTHS_AHEAD,
+    add_months,
+    detach_partitions,
+    ensure_partitions,
+    is_partitioned,
+    month_partitions,
+    month_start,
+)
+
+
+def parse_month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las particiones mensuales de entradas del mes actual y los "
+        "siguientes (ejecutar al menos una vez al mes) y opcionalmente "
+        "separa las de meses antiguos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=PARTITION_MONTHS_AHEAD,
+            help="Meses futuros a crear por adelantado",
+        )
+        parser.add_argument(
+            "--detach-before",
+            type=parse_month,
+            help=(
+                "Separar las particiones anteriores a este mes (AAAA-MM); "
+                "quedan como tablas aparte y dejan de verse en los reportes"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Las particiones requieren PostgreSQL")
+
+        current_month = month_start(localdate())
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError(
+                    "La tabla de entradas no está particionada (migración 0020)"
+                )
+
+            created = ensure_partitions(
+                cursor,
+                current_month,
+                add_months(current_month, max(options["months_ahead"], 0)),
+            )
+
+            detached = []
+
+            if options["detach_before"]:
+                if options["detach_before"] > current_month:
+                    raise CommandError("No se pueden separar meses desde el actual en adelante")
+
+                detached = detach_partitions(cursor, options["detach_before"])
+
+            total = len(month_partitions(cursor))
+
+        for name in created:
+            self.stdout.write(f"Creada {name}")
+
+        for name in detached:
+            self.stdout.write(f"Separada {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(created)} particiones creadas, {len(detached)} separadas; "
+            f"{total} particiones mensuales"
+        ))
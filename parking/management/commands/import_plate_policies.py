@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.services.policy_import import (
+    IMPORT_BATCH_SIZE, import_policies, read_policy_rows
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa o actualiza (por placa) políticas de cobro desde un "
+        "archivo CSV o XLSX y reporta los errores por fila"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path, help="Archivo .csv o .xlsx")
+        parser.add_argument("--dry-run", action="store_true", help="Solo validar, sin guardar")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Filas por lote")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+
+        if not path.is_file():
+            raise CommandError(f"No existe el archivo: {path}")
+
+        try:
+            with path.open("rb") as file:
+                result = import_policies(
+                    read_policy_rows(file, path.name),
+                    dry_run=options["dry_run"],
+                    batch_size=max(options["batch_size"], 1),
+                )
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        for number, plate, error in result.errors:
+            self.stderr.write(f"Fila {number} ({plate or '—'}): {error}")
+
+        action = "Validadas" if options["dry_run"] else "Importadas"
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action}: {len(result.created)} nuevas, "
+                f"{len(result.updated)} actualizadas, "
+                f"{len(result.errors)} con errores"
+            )
+        )
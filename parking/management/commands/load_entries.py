@@ -0,0 +1,369 @@
+import csv
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils.timezone import localdate
+
+from parking.models import (
+    Configuration, ReportDataVersion, report_data_key
+)
+from parking.services.active_plates import active_plates
+from parking.services.entry_partitions import ensure_partitions, is_partitioned
+from parking.utils import format_plate
+from shell.models import DailyRevenue
+
+
+# Columnas aceptadas en el CSV (plate y entry_date_hour son obligatorias)
+CSV_COLUMNS = ("plate", "entry_date_hour", "departure_date_hour", "fee_id")
+
+# Bloque de lectura del archivo para COPY
+COPY_BLOCK_SIZE = 1 << 20
+
+# Ejemplos de placas en conflicto que se muestran
+CONFLICT_SAMPLE = 10
+
+# Entradas con estado, minutos y monto calculados en conjunto, con las
+# mismas reglas que Entry.calculate_amount (política activa de la placa,
+# rango de tarifa cuyo minuto inicial es el mayor ≤ minutos). La placa se
+# guarda normalizada (solo letras y números), como en el resto de la app
+PRICE_SQL = """
+    CREATE TEMP TABLE entry_load ON COMMIT DROP AS
+    WITH staged AS (
+        SELECT
+            upper(regexp_replace(plate, '[^A-Za-z0-9]', '', 'g')) AS plate,
+            entry_date_hour,
+            departure_date_hour,
+            fee_id,
+            CEIL(
+                EXTRACT(EPOCH FROM departure_date_hour - entry_date_hour) / 60
+            )::integer AS minutes
+        FROM entry_staging
+    ),
+    ranges AS (
+        SELECT
+            fee_id,
+            start_minute,
+            lead(start_minute) OVER (PARTITION BY fee_id ORDER BY start_minute, id) AS next_start,
+            amount
+        FROM parking_range
+    )
+    SELECT
+        s.plate,
+        s.plate AS plate_normalized,
+        s.entry_date_hour,
+        s.departure_date_hour,
+        s.fee_id AS requested_fee_id,
+        -- Como en la salida en vivo: con política diaria o mensual la
+        -- entrada cerrada ya no depende de la tarifa
+        CASE
+            WHEN s.departure_date_hour IS NOT NULL
+                AND p.billing_type IN ('MONTHLY', 'DAILY') THEN NULL
+            ELSE s.fee_id
+        END AS fee_id,
+        s.departure_date_hour IS NULL AS state,
+        s.minutes AS final_minutes,
+        CASE
+            WHEN s.departure_date_hour IS NULL THEN NULL
+            WHEN p.billing_type = 'MONTHLY' THEN 0
+            WHEN p.billing_type = 'DAILY' THEN COALESCE(p.amount, 0)
+            ELSE COALESCE(r.amount, 0)
+        END::numeric(10, 2) AS final_amount
+    FROM staged s
+    LEFT JOIN parking_platepolicy p
+        ON p.plate = s.plate AND p.active
+    LEFT JOIN ranges r
+        ON r.fee_id = s.fee_id
+        AND s.minutes >= r.start_minute
+        AND (r.next_start IS NULL OR s.minutes < r.next_start)
+"""
+
+# Motivo → condición; cualquier fila que la cumpla detiene la carga
+INVALID_ROWS = {
+    "sin placa": "COALESCE(plate_normalized, '') = ''",
+    "placa de más de 10 caracteres": "length(plate) > 10",
+    "sin fecha de entrada": "entry_date_hour IS NULL",
+    "salida anterior a la entrada": "departure_date_hour < entry_date_hour",
+    "tarifa inexistente": (
+        "requested_fee_id IS NOT NULL "
+        "AND requested_fee_id NOT IN (SELECT id FROM parking_fee)"
+    ),
+}
+
+# Una sola entrada activa por placa: en el archivo y contra la tabla
+ACTIVE_CONFLICTS_SQL = """
+    SELECT plate FROM entry_load WHERE state GROUP BY plate HAVING count(*) > 1
+    UNION
+    SELECT l.plate
+    FROM entry_load l
+    JOIN parking_entry e
+        ON e.plate_normalized = l.plate AND e.state AND e.departure_date_hour IS NULL
+    WHERE l.state
+    ORDER BY 1
+    LIMIT %s
+"""
+
+INSERT_SQL = """
+    INSERT INTO parking_entry (
+        plate, plate_normalized, plate_display,
+        entry_date_hour, departure_date_hour, fee_id,
+        state, final_minutes, final_amount
+    )
+    SELECT
+        l.plate, l.plate_normalized, d.plate_display,
+        l.entry_date_hour, l.departure_date_hour, l.fee_id,
+        l.state, l.final_minutes, l.final_amount
+    FROM entry_load l
+    JOIN plate_display_load d USING (plate_normalized)
+"""
+
+# Aporte al libro de ingresos por día de salida y origen (ver revenue_line)
+REVENUE_SQL = """
+    SELECT
+        (departure_date_hour AT TIME ZONE %s)::date AS day,
+        CASE
+            WHEN fee_id IS NULL AND final_amount > 0 THEN %s
+            ELSE %s
+        END AS source,
+        count(*),
+        sum(final_amount)
+    FROM entry_load
+    WHERE NOT state
+    GROUP BY 1, 2
+"""
+
+# Meses de salida de las entradas cerradas (hora local)
+DEPARTURE_MONTHS_SQL = """
+    SELECT
+        min(date_trunc('month', departure_date_hour AT TIME ZONE %s))::date,
+        max(date_trunc('month', departure_date_hour AT TIME ZONE %s))::date
+    FROM entry_load
+    WHERE NOT state
+"""
+
+# Días cerrados cuyos reportes cambian (ver closed_report_days)
+REPORT_DAYS_SQL = """
+    SELECT DISTINCT day FROM (
+        SELECT (entry_date_hour AT TIME ZONE %(tz)s)::date AS day
+        FROM entry_load
+        UNION
+        SELECT (departure_date_hour AT TIME ZONE %(tz)s)::date
+        FROM entry_load
+        WHERE NOT state
+        UNION
+        SELECT generate_series(
+            (entry_date_hour AT TIME ZONE %(tz)s)::date,
+            %(today)s::date - 1,
+            interval '1 day'
+        )::date
+        FROM entry_load
+        WHERE state
+    ) AS days
+    WHERE day < %(today)s
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga entradas históricas desde un CSV con COPY a una tabla "
+        "temporal; calcula estado, minutos y monto en SQL y actualiza el "
+        "libro de ingresos, la ocupación y las versiones de reportes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            type=Path,
+            help=(
+                "CSV con encabezado: plate, entry_date_hour y opcionalmente "
+                "departure_date_hour y fee_id (fechas sin zona = hora local)"
+            ),
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Validar y calcular sin guardar")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("La carga con COPY requiere PostgreSQL")
+
+        path = options["path"]
+
+        if not path.is_file():
+            raise CommandError(f"No existe el archivo: {path}")
+
+        started = perf_counter()
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                with path.open(encoding="utf-8-sig", newline="") as file:
+                    staged = self._copy(cursor, file)
+
+                self.stdout.write(f"{staged} filas copiadas a la tabla temporal")
+
+                cursor.execute(PRICE_SQL)
+                self._validate(cursor)
+                self._plate_displays(cursor)
+                self._partitions(cursor)
+
+                cursor.execute(INSERT_SQL)
+                loaded = cursor.rowcount
+
+                self._refresh_derived(cursor)
+
+                if options["dry_run"]:
+                    transaction.set_rollback(True)
+        except DatabaseError as e:
+            raise CommandError(f"Error al cargar el archivo: {e}") from e
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(
+                f"Simulación: se cargarían {loaded} entradas (sin guardar)"
+            ))
+            return
+
+        active_plates.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{loaded} entradas cargadas en {perf_counter() - started:.1f} s"
+        ))
+
+    def _copy(self, cursor, file):
+        """
+        Copia el CSV a entry_staging en el orden de su encabezado
+        """
+        header = next(csv.reader([file.readline()]), [])
+        columns = [name.strip().lower() for name in header]
+
+        unknown = set(columns) - set(CSV_COLUMNS)
+
+        if unknown:
+            raise CommandError(f"Columnas no reconocidas: {', '.join(sorted(unknown))}")
+
+        if "plate" not in columns or "entry_date_hour" not in columns:
+            raise CommandError("El encabezado debe incluir plate y entry_date_hour")
+
+        cursor.execute(
+            """
+            CREATE TEMP TABLE entry_staging (
+                plate text,
+                entry_date_hour timestamptz,
+                departure_date_hour timestamptz,
+                fee_id bigint
+            ) ON COMMIT DROP
+            """
+        )
+
+        # Las fechas sin zona horaria se interpretan en la hora local
+        cursor.execute("SET LOCAL TIME ZONE %s", [settings.TIME_ZONE])
+
+        # COPY no pasa por el manejo de errores de Django; la línea del
+        # error no cuenta el encabezado
+        with connection.wrap_database_errors:
+            cursor.copy_expert(
+                f"COPY entry_staging ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                file,
+                COPY_BLOCK_SIZE,
+            )
+        cursor.execute("SET LOCAL TIME ZONE %s", [connection.timezone_name])
+
+        cursor.execute("SELECT count(*) FROM entry_staging")
+
+        return cursor.fetchone()[0]
+
+    def _validate(self, cursor):
+        errors = []
+
+        for reason, condition in INVALID_ROWS.items():
+            cursor.execute(f"SELECT count(*) FROM entry_load WHERE {condition}")
+            count = cursor.fetchone()[0]
+
+            if count:
+                errors.append(f"{count} filas {reason}")
+
+        cursor.execute(ACTIVE_CONFLICTS_SQL, [CONFLICT_SAMPLE])
+        conflicts = [plate for plate, in cursor.fetchall()]
+
+        if conflicts:
+            errors.append(
+                "placas con más de una entrada activa: " + ", ".join(conflicts)
+            )
+
+        if errors:
+            raise CommandError("Archivo no válido: " + "; ".join(errors))
+
+    def _plate_displays(self, cursor):
+        """
+        Placa para mostrar (format_plate) una vez por placa distinta
+        """
+        cursor.execute("SELECT DISTINCT plate_normalized FROM entry_load")
+
+        rows = StringIO()
+        writer = csv.writer(rows)
+
+        for plate, in cursor.fetchall():
+            writer.writerow([plate, format_plate(plate)])
+
+        rows.seek(0)
+
+        cursor.execute(
+            """
+            CREATE TEMP TABLE plate_display_load (
+                plate_normalized text PRIMARY KEY,
+                plate_display text
+            ) ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(
+            "COPY plate_display_load FROM STDIN WITH (FORMAT csv)",
+            rows,
+            COPY_BLOCK_SIZE,
+        )
+
+    def _partitions(self, cursor):
+        """
+        Particiones de los meses de salida cargados, para que el histórico
+        no quede en la partición por defecto
+        """
+        if not is_partitioned(cursor):
+            return
+
+        cursor.execute(DEPARTURE_MONTHS_SQL, [settings.TIME_ZONE] * 2)
+        first_month, last_month = cursor.fetchone()
+
+        if first_month is None:
+            return
+
+        created = ensure_partitions(cursor, first_month, last_month)
+
+        if created:
+            self.stdout.write(f"{len(created)} particiones mensuales creadas")
+
+    def _refresh_derived(self, cursor):
+        """
+        Libro de ingresos, ocupación y versiones de reportes, a partir de
+        los totales de la carga (lo que Entry.save hace por fila)
+        """
+        cursor.execute(
+            REVENUE_SQL,
+            [
+                settings.TIME_ZONE,
+                DailyRevenue.DAILY_SUBSCRIPTION,
+                DailyRevenue.PARKING_FEE,
+            ],
+        )
+
+        for day, source, count, amount in cursor.fetchall():
+            DailyRevenue.objects.add(day, source, amount, count=count)
+
+        cursor.execute(
+            REPORT_DAYS_SQL,
+            {"tz": settings.TIME_ZONE, "today": localdate()},
+        )
+
+        ReportDataVersion.objects.bump(
+            report_data_key(day) for day, in cursor.fetchall()
+        )
+
+        Configuration.objects.reconcile_occupancy()
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.models import Configuration, Entry
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara los espacios ocupados de la configuración con las entradas "
+        "activas y los corrige"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo reportar la diferencia, sin corregir (falla si la hay)",
+        )
+
+    def handle(self, *args, **options):
+        if not Configuration.objects.exists():
+            raise CommandError("No hay ninguna configuración registrada")
+
+        occupied = Configuration.objects.occupancy()["occupied"]
+
+        if options["check"]:
+            active = Entry.objects.total_active_vehicles()
+
+            if active != occupied:
+                raise CommandError(
+                    f"Ocupación desfasada: contador {occupied}, "
+                    f"entradas activas {active}"
+                )
+
+            self.stdout.write(self.style.SUCCESS(f"Ocupación correcta: {active}"))
+            return
+
+        active = Configuration.objects.reconcile_occupancy()
+
+        self.stdout.write(self.style.SUCCESS(f"Ocupación: {occupied} → {active}"))
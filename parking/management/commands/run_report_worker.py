@@ -0,0 +1,71 @@
+from datetime import timedelta
+from time import monotonic, sleep
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from parking.models import ReportJob
+from parking.services.report_jobs import (
+    purge_finished_jobs,
+    requeue_stale_jobs,
+    run_job,
+)
+
+
+# Cada cuánto se eliminan los trabajos terminados antiguos (segundos)
+PURGE_EVERY = 3600
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de reportes: toma los trabajos pendientes (PDF y Excel) "
+        "y deja los archivos listos para descargar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Procesar los pendientes y terminar")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2,
+            help="Segundos de espera cuando no hay trabajos (por defecto 2)",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Días que se conservan los trabajos terminados (por defecto 7)",
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+
+        if requeued:
+            self.stdout.write(f"{requeued} trabajos abandonados volvieron a la cola")
+
+        last_purge = None
+
+        try:
+            while True:
+                if last_purge is None or monotonic() - last_purge > PURGE_EVERY:
+                    purge_finished_jobs(now() - timedelta(days=options["keep_days"]))
+                    last_purge = monotonic()
+
+                close_old_connections()
+
+                job = ReportJob.objects.claim_next()
+
+                if job is None:
+                    if options["once"]:
+                        return
+
+                    sleep(options["interval"])
+                    continue
+
+                run_job(job)
+
+                style = self.style.SUCCESS if job.status == ReportJob.DONE else self.style.ERROR
+                self.stdout.write(style(f"Trabajo {job.pk}: {job}"))
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido")
@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from parking.models import Fee
+from parking.services.tariff_simulator import parse_range_table, simulate_tariff
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las salidas históricas de una tarifa con una tabla de "
+        "rangos propuesta y compara contra el monto cobrado"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fee", type=int, required=True, help="ID de la tarifa")
+        parser.add_argument("--start", type=date.fromisoformat, required=True, help="Fecha inicial (AAAA-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, required=True, help="Fecha final (AAAA-MM-DD)")
+        parser.add_argument(
+            "--range",
+            action="append",
+            dest="ranges",
+            required=True,
+            help="Rango propuesto como minuto:monto (se puede repetir)",
+        )
+        parser.add_argument("--by-day", action="store_true", help="Mostrar el detalle por día")
+
+    def handle(self, *args, **options):
+        if not Fee.objects.filter(pk=options["fee"]).exists():
+            raise CommandError(f"No existe la tarifa {options['fee']}")
+
+        if options["end"] < options["start"]:
+            raise CommandError("La fecha final no puede ser anterior a la inicial")
+
+        try:
+            ranges = parse_range_table("\n".join(options["ranges"]))
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        result = simulate_tariff(
+            options["fee"],
+            options["start"],
+            options["end"],
+            ranges,
+        )
+
+        self._write_table("Por tiempo de estadía", result["by_bucket"] + [result["total"]])
+
+        if options["by_day"]:
+            self._write_table("Por día de salida", result["by_day"])
+
+    def _write_table(self, title, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f"{'':<14}{'Salidas':>10}{'Cobrado':>14}{'Propuesto':>14}{'Diferencia':>14}"
+        )
+
+        for row in rows:
+            self.stdout.write(
+                f"{str(row['label']):<14}"
+                f"{row['count']:>10}"
+                f"{row['current']:>14,.2f}"
+                f"{row['proposed']:>14,.2f}"
+                f"{row['difference']:>14,.2f}"
+            )
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-17 22:32
+
+from math import ceil
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def close_duplicate_active_entries(apps, schema_editor):
+    """
+    Antes de la restricción podían quedar dos entradas activas para la
+    misma placa (doble registro simultáneo). Se conserva la más reciente
+    y las anteriores se cierran a la hora de entrada de esa, sin cobro
+    """
+    Entry = apps.get_model('parking', 'Entry')
+
+    plates = (
+        Entry.objects
+        .filter(state=True)
+        .values('plate')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('plate', flat=True)
+    )
+
+    for plate in plates:
+        latest, *duplicates = (
+            Entry.objects
+            .filter(plate=plate, state=True)
+            .order_by('-entry_date_hour', '-id')
+        )
+
+        for entry in duplicates:
+            departure = latest.entry_date_hour
+
+            entry.state = False
+            entry.departure_date_hour = departure
+            entry.final_minutes = ceil(
+                (departure - entry.entry_date_hour).total_seconds() / 60
+            )
+            entry.final_amount = 0
+            entry.save(update_fields=[
+                'state', 'departure_date_hour', 'final_minutes', 'final_amount'
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0013_alter_platepolicy_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_active_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='entry',
+            constraint=models.UniqueConstraint(condition=models.Q(('state', True)), fields=('plate',), name='unique_active_plate_entry', violation_error_message='Ya existe una entrada activa con esta placa.'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 22:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0014_entry_unique_active_plate_entry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['entry_date_hour'], name='entry_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(condition=models.Q(('state', True)), fields=['-entry_date_hour'], name='entry_active_entry_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['departure_date_hour'], include=('final_amount',), name='entry_departure_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entry',
+            index=models.Index(fields=['plate', '-entry_date_hour'], name='entry_plate_entry_date_idx'),
+        ),
+    ]
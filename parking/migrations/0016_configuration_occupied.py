@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-17 22:41
+
+from django.db import migrations, models
+
+
+def count_active_entries(apps, schema_editor):
+    Configuration = apps.get_model('parking', 'Configuration')
+    Entry = apps.get_model('parking', 'Entry')
+
+    Configuration.objects.update(
+        occupied=Entry.objects.filter(state=True).count()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0015_entry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuration',
+            name='occupied',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Espacios ocupados'),
+        ),
+        migrations.RunPython(count_active_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-17 22:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0016_configuration_occupied'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('day', 'Diario'), ('month', 'Mensual'), ('period', 'Periodo'), ('plate', 'Por placa')], max_length=10, verbose_name='Tipo de reporte')),
+                ('output_format', models.CharField(choices=[('pdf', 'PDF'), ('xlsx', 'Excel')], max_length=10, verbose_name='Formato')),
+                ('params', models.JSONField(default=dict, verbose_name='Parámetros')),
+                ('base_url', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(choices=[('PENDING', 'En cola'), ('RUNNING', 'Generando'), ('DONE', 'Listo'), ('FAILED', 'Falló')], default='PENDING', max_length=10, verbose_name='Estado')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progreso')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('artifact', models.CharField(blank=True, max_length=255, verbose_name='Archivo')),
+                ('filename', models.CharField(blank=True, max_length=150, verbose_name='Nombre de descarga')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo de reporte',
+                'verbose_name_plural': 'Trabajos de reportes',
+                'indexes': [models.Index(condition=models.Q(('status', 'PENDING')), fields=['created_at'], name='reportjob_pending_idx')],
+            },
+        ),
+    ]
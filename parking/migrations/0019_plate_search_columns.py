@@ -0,0 +1,75 @@
+# Generated by Django 6.0 on 2026-10-17 23:09
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# Mismas reglas que parking.utils.normalize_plate y format_plate al
+# momento de esta migración, en una sola sentencia por tabla: solo
+# letras y números en mayúsculas; la primera letra sola y el resto en
+# bloques de 3 de derecha a izquierda ("P40807" -> "P 40 807")
+FILL_PLATE_COLUMNS_SQL = r"""
+    UPDATE {table}
+    SET (plate_normalized, plate_display) = (
+        SELECT
+            normalized,
+            CASE
+                WHEN length(normalized) <= 1 THEN normalized
+                ELSE left(normalized, 1) || ' ' || concat_ws(
+                    ' ',
+                    nullif(left(rest, mod(length(rest), 3)), ''),
+                    nullif(
+                        regexp_replace(
+                            substr(rest, mod(length(rest), 3) + 1),
+                            '(...)(?!$)', '\1 ', 'g'
+                        ),
+                        ''
+                    )
+                )
+            END
+        FROM (
+            SELECT normalized, substr(normalized, 2) AS rest
+            FROM (
+                SELECT upper(regexp_replace(plate, '[^[:alnum:]]', '', 'g')) AS normalized
+            ) AS plate_normalized
+        ) AS plate_parts
+    )
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0018_reportdataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='plate_display',
+            field=models.CharField(default='', editable=False, max_length=14, verbose_name='Placa para mostrar'),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='plate_normalized',
+            field=models.CharField(default='', editable=False, max_length=10, verbose_name='Placa normalizada'),
+        ),
+        migrations.AddField(
+            model_name='platepolicy',
+            name='plate_display',
+            field=models.CharField(default='', editable=False, max_length=14, verbose_name='Placa para mostrar'),
+        ),
+        migrations.AddField(
+            model_name='platepolicy',
+            name='plate_normalized',
+            field=models.CharField(default='', editable=False, max_length=10, verbose_name='Placa normalizada'),
+        ),
+        migrations.RunSQL(FILL_PLATE_COLUMNS_SQL.format(table='parking_entry'), migrations.RunSQL.noop),
+        migrations.RunSQL(FILL_PLATE_COLUMNS_SQL.format(table='parking_platepolicy'), migrations.RunSQL.noop),
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='entry',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['plate_normalized'], name='entry_plate_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,218 @@
+# Generated by Django 6.0 on 2026-10-17 23:40
+
+from datetime import date, datetime, time
+
+from django.db import NotSupportedError, migrations, models
+from django.utils.timezone import localdate, localtime, make_aware
+
+
+# SQL y funciones fijos al momento de esta migración (no se importan de
+# parking.services.entry_partitions: la migración no debe cambiar si ese
+# módulo cambia después)
+TABLE = "parking_entry"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_MONTHS_AHEAD = 3
+
+# Una tabla particionada por una columna que admite nulos no puede tener
+# llave primaria; la unicidad de id se garantiza junto con la llave de
+# partición (NULLS NOT DISTINCT: también para las entradas activas).
+# NULLS NOT DISTINCT requiere PostgreSQL 15 o superior.
+MIN_POSTGRES_VERSION = 150000
+ID_CONSTRAINT = "entry_id_departure_uniq"
+ID_CONSTRAINT_SQL = (
+    f"ALTER TABLE {TABLE} ADD CONSTRAINT {ID_CONSTRAINT} "
+    "UNIQUE NULLS NOT DISTINCT (id, departure_date_hour)"
+)
+
+# Todas las entradas activas están en la partición por defecto
+# (entry_state_matches_departure): ahí basta la única activa por placa
+ACTIVE_PLATE_INDEX = "unique_active_plate_entry"
+ACTIVE_PLATE_INDEX_SQL = (
+    f"CREATE UNIQUE INDEX {ACTIVE_PLATE_INDEX} "
+    f"ON {DEFAULT_PARTITION} (plate) WHERE state"
+)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    return (
+        make_aware(datetime.combine(month, time.min)),
+        make_aware(datetime.combine(add_months(month, 1), time.min)),
+    )
+
+
+def table_definition(cursor):
+    """
+    Índices y restricciones (llave primaria, únicas, foráneas y CHECK)
+    de la tabla de entradas, para recrearlos con los mismos nombres; los
+    índices de las restricciones se recrean con ellas
+    """
+    cursor.execute(
+        """
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s
+        """,
+        [TABLE],
+    )
+    indexes = dict(cursor.fetchall())
+
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY conname
+        """,
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+
+    for name, _, _ in constraints:
+        indexes.pop(name, None)
+
+    return indexes, constraints
+
+
+def swap_table(cursor, new_table):
+    """
+    Copia las filas a `new_table`, borra la tabla actual y la reemplaza
+    conservando la secuencia de ids
+    """
+    cursor.execute(f"INSERT INTO {new_table} SELECT * FROM {TABLE}")
+    cursor.execute(f"DROP TABLE {TABLE}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {TABLE}")
+    cursor.execute(f"ALTER SEQUENCE {new_table}_id_seq RENAME TO {TABLE}_id_seq")
+    cursor.execute(
+        f"""
+        SELECT setval(
+            pg_get_serial_sequence(%s, 'id'),
+            COALESCE((SELECT max(id) FROM {TABLE}), 1),
+            (SELECT count(*) > 0 FROM {TABLE})
+        )
+        """,
+        [TABLE],
+    )
+
+
+def partition_entries(apps, schema_editor):
+    """
+    Tabla particionada por mes de salida. Las particiones se crean
+    vacías antes de copiar (cada fila va directo a la suya) y los
+    índices después de la copia
+    """
+    if schema_editor.connection.pg_version < MIN_POSTGRES_VERSION:
+        raise NotSupportedError(
+            "La partición de entradas requiere PostgreSQL 15 o superior "
+            "(UNIQUE NULLS NOT DISTINCT para el id de las entradas)"
+        )
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, constraints = table_definition(cursor)
+
+        cursor.execute(f"SELECT min(departure_date_hour) FROM {TABLE}")
+        first_departure = cursor.fetchone()[0]
+
+        current_month = localdate().replace(day=1)
+        month = (
+            localtime(first_departure).date().replace(day=1)
+            if first_departure else current_month
+        )
+        last_month = add_months(current_month, PARTITION_MONTHS_AHEAD)
+
+        new_table = f"{TABLE}_partitioned"
+
+        cursor.execute(
+            f"""
+            CREATE TABLE {new_table} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY)
+            PARTITION BY RANGE (departure_date_hour)
+            """
+        )
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {new_table} DEFAULT")
+
+        while month <= last_month:
+            cursor.execute(
+                f"""
+                CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {new_table}
+                FOR VALUES FROM (%s) TO (%s)
+                """,
+                month_bounds(month),
+            )
+            month = add_months(month, 1)
+
+        swap_table(cursor, new_table)
+
+        cursor.execute(ID_CONSTRAINT_SQL)
+
+        for name, definition in indexes.items():
+            if name == ACTIVE_PLATE_INDEX:
+                cursor.execute(ACTIVE_PLATE_INDEX_SQL)
+            else:
+                cursor.execute(definition)
+
+        for name, kind, definition in constraints:
+            if kind != "p":
+                cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+def unpartition_entries(apps, schema_editor):
+    """
+    Vuelve a una sola tabla con llave primaria
+    """
+    with schema_editor.connection.cursor() as cursor:
+        indexes, constraints = table_definition(cursor)
+
+        new_table = f"{TABLE}_single"
+
+        cursor.execute(f"CREATE TABLE {new_table} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING IDENTITY)")
+
+        swap_table(cursor, new_table)
+
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)")
+        cursor.execute(
+            f"CREATE UNIQUE INDEX {ACTIVE_PLATE_INDEX} ON {TABLE} (plate) WHERE state"
+        )
+
+        for name, definition in indexes.items():
+            if name != ACTIVE_PLATE_INDEX:
+                cursor.execute(definition)
+
+        for name, kind, definition in constraints:
+            if name != ID_CONSTRAINT:
+                cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+# El estado de Django no puede describir la tabla particionada:
+# - Entry.id sigue declarado como llave primaria, pero en la base no hay
+#   llave primaria (solo entry_id_departure_uniq). Una migración futura
+#   que altere Entry.id debe escribirse a mano con
+#   SeparateDatabaseAndState o RunSQL; no usar la que genere makemigrations.
+# - unique_active_plate_entry deja de ser una restricción del modelo: es
+#   un índice único de la partición por defecto (ver Entry.Meta).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parking', '0019_plate_search_columns'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='entry',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('departure_date_hour__isnull', True), ('state', True)), models.Q(('departure_date_hour__isnull', False), ('state', False)), _connector='OR'), name='entry_state_matches_departure'),
+        ),
+        migrations.RunPython(partition_entries, unpartition_entries),
+        # Solo estado: partition_entries ya dejó el índice en la partición
+        # por defecto (fuera de esta operación para que sqlmigrate no
+        # ejecute el código)
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='entry',
+                    name='unique_active_plate_entry',
+                ),
+            ],
+        ),
+    ]
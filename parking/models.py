@@ -1,9 +1,20 @@
-from django.db import models
-from django.utils.timezone import now
+from contextlib import nullcontext
+from pathlib import Path
+from django.conf import settings
+from django.db import connections, models, router, transaction, IntegrityError
+from django.db.models import DEFERRED
+from django.utils.timezone import now, make_aware, localtime, localdate
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
 from math import ceil
-from django.db.models import Sum
+from django.db.models import Sum, Count, OuterRef, Subquery, F
+from django.db.models.functions import Greatest
 from django.db.models import Q
-from parking.utils import format_plate
+from django.contrib.postgres.indexes import GinIndex
+from parking.utils import format_plate, normalize_plate
+from shell.models import DailyRevenue
+from parking.services.fee_catalog import fee_catalog
+from parking.services.policy_resolver import policy_resolver
 
 # Create your models here.
 class Fee(models.Model):
@@ -29,11 +40,7 @@ class Fee(models.Model):
         return self.name
     
     def calculate_fee(self, minute):
-        ranges = Range.objects.filter(fee=self).order_by('start_minute')
-        for r in ranges:
-            if minute >= r.start_minute:
-                amount = r.amount
-        return amount if ranges.exists() else 0
+        return fee_catalog.price(self.pk, minute)
 
 
 class Range(models.Model):
@@ -54,47 +61,251 @@ class Range(models.Model):
         return f"{self.fee.name} - {self.start_minute} min: ${self.amount}"
     
 
+ACTIVE_PLATE_CONSTRAINT = "unique_active_plate_entry"
+
+
+class ActiveEntryExists(ValueError):
+    """
+    La placa ya tiene una entrada activa (unique_active_plate_entry)
+    """
+
+
+def _violates(error, constraint_name):
+    """
+    Indica si un IntegrityError corresponde a la restricción indicada
+    """
+    diag = getattr(error.__cause__, "diag", None)
+
+    if diag is not None and diag.constraint_name:
+        return diag.constraint_name == constraint_name
+
+    return constraint_name in str(error)
+
+
+# Campos de Entry cuyos valores guardados se recuerdan (nombre → attname)
+TRACKED_FIELDS = {
+    "entry_date_hour": "entry_date_hour",
+    "departure_date_hour": "departure_date_hour",
+    "fee": "fee_id",
+    "final_amount": "final_amount",
+    "plate_normalized": "plate_normalized",
+}
+
+
+# Columnas derivadas de la placa que se guardan junto a ella
+PLATE_COLUMNS = ("plate_normalized", "plate_display")
+
+
+def set_plate_columns(instance, kwargs):
+    """
+    Recalcula la placa normalizada y la de mostrar antes de guardar
+    (y las agrega a update_fields si se guarda la placa)
+    """
+    instance.plate_normalized = normalize_plate(instance.plate)
+    instance.plate_display = format_plate(instance.plate_normalized)
+
+    update_fields = kwargs.get("update_fields")
+
+    if update_fields is not None and "plate" in update_fields:
+        kwargs["update_fields"] = {*update_fields, *PLATE_COLUMNS}
+
+
+def revenue_line(values):
+    """
+    Aporte de una entrada al libro de ingresos: (día de salida, origen, monto)
+    o None si no tiene salida
+    """
+    departure = values["departure_date_hour"]
+
+    if departure is None:
+        return None
+
+    amount = Decimal(str(values["final_amount"] or 0))
+
+    # Salida sin tarifa y con monto → suscripción diaria
+    if values["fee_id"] is None and amount:
+        source = DailyRevenue.DAILY_SUBSCRIPTION
+    else:
+        source = DailyRevenue.PARKING_FEE
+
+    return localtime(departure).date(), source, amount
+
+
+def closed_report_days(values, today):
+    """
+    Días ya cerrados (anteriores a `today`) cuyos reportes incluyen
+    una entrada con estos valores (ver EntryQuerySet.custom_report)
+    """
+    entry_day = localtime(values["entry_date_hour"]).date()
+    departure = values["departure_date_hour"]
+
+    if departure is None:
+        # Una entrada abierta aparece en el reporte diario de cada día
+        # desde su entrada
+        days = {
+            entry_day + timedelta(days=offset)
+            for offset in range((today - entry_day).days)
+        }
+    else:
+        days = {entry_day, localtime(departure).date()}
+
+    return {day for day in days if day < today}
+
+
+def report_data_key(day):
+    return f"entries:{day.isoformat()}"
+
+
+# Versión de los datos de políticas; afecta a todos los reportes
+POLICIES_DATA_KEY = "policies"
+
+
+def day_bounds(date):
+    """
+    Inicio y fin (exclusivo) del día en la zona horaria actual.
+    Filtrar por rango en lugar de `__date` permite usar los índices
+    """
+    start = make_aware(datetime.combine(date, time.min))
+    end = make_aware(datetime.combine(date + timedelta(days=1), time.min))
+
+    return start, end
+
+
+def period_bounds(start_date, end_date):
+    """
+    Inicio del primer día y fin (exclusivo) del último día del periodo
+    """
+    return day_bounds(start_date)[0], day_bounds(end_date)[1]
+
+
+def month_bounds(year, month):
+    """
+    Inicio y fin (exclusivo) del mes en la zona horaria actual
+    """
+    first_day = date(year, month, 1)
+    next_month = (first_day + timedelta(days=32)).replace(day=1)
+
+    return day_bounds(first_day)[0], day_bounds(next_month)[0]
+
+
 class EntryQuerySet(models.QuerySet):   
+    def not_departed_before(self, moment):
+        """
+        Entradas sin salida o con salida desde `moment`.
+
+        La tabla se particiona por mes de salida (ver entry_partitions):
+        como la salida nunca es anterior a la entrada, las consultas por
+        fecha de entrada agregan este filtro para que Postgres descarte
+        las particiones de meses anteriores.
+        """
+        return self.filter(
+            Q(departure_date_hour__gte=moment)
+            | Q(departure_date_hour__isnull=True)
+        )
+
+    def entry_between(self, start, end):
+        return self.not_departed_before(start).filter(
+            entry_date_hour__gte=start,
+            entry_date_hour__lt=end
+        )
+
+    def departure_between(self, start, end):
+        return self.filter(
+            departure_date_hour__gte=start,
+            departure_date_hour__lt=end
+        )
+
     def entries_today(self, date):
-        return self.filter(entry_date_hour__date=date)
+        return self.entry_between(*day_bounds(date))
     
     def entries_today_and_active(self, date):
-        return self.filter(
-            Q(entry_date_hour__date=date) | Q(state=True)
+        start, end = day_bounds(date)
+
+        return self.not_departed_before(start).filter(
+            Q(entry_date_hour__gte=start, entry_date_hour__lt=end)
+            | Q(state=True)
         ).order_by('-entry_date_hour')
 
+    def active(self):
+        # Sin salida: solo la partición por defecto
+        return self.filter(state=True, departure_date_hour__isnull=True)
+
+    def with_policy(self):
+        """
+        Anota el tipo de cobro y el monto de la política activa de la placa
+        (policy_billing_type, policy_amount) en la misma consulta
+        """
+        policies = PlatePolicy.objects.active().filter(plate=OuterRef("plate"))
+
+        return self.annotate(
+            policy_billing_type=Subquery(policies.values("billing_type")[:1]),
+            policy_amount=Subquery(policies.values("amount")[:1]),
+        )
+
+    def after_record_cursor(self, state, entry_date_hour, pk):
+        """
+        Filas que siguen a (state, entry_date_hour, pk) en el orden
+        -state, -entry_date_hour, -id (paginación por cursor)
+        """
+        following = Q(entry_date_hour__lt=entry_date_hour) | Q(
+            entry_date_hour=entry_date_hour,
+            pk__lt=pk
+        )
+
+        if state:
+            return self.filter(Q(state=False) | (Q(state=True) & following))
+
+        return self.filter(following, state=False)
+
+    def plate_matches(self, text):
+        """
+        Entradas cuya placa contiene `text` (sin espacios ni guiones) o se
+        le parece por trigramas; usa el índice entry_plate_trgm_idx
+        """
+        text = normalize_plate(text)
+
+        if not text:
+            return self.none()
+
+        matches = Q(plate_normalized__contains=text)
+
+        # Con menos de 3 caracteres no hay trigramas que comparar
+        if len(text) >= 3:
+            matches |= Q(plate_normalized__trigram_similar=text)
+
+        return self.filter(matches)
+
     def departure_today(self, date):
-        return self.filter(departure_date_hour__date=date)
+        return self.departure_between(*day_bounds(date))
 
     def departure_month(self, year, month):
-        return self.filter(
-            departure_date_hour__year=year,
-            departure_date_hour__month=month
-        )
+        return self.departure_between(*month_bounds(year, month))
     
     def custom_report(self, start_date=None, end_date=None, month_date=None, n_plate=None):
         queryset = self.all()
 
         # Mes
         if month_date:
-            queryset = queryset.filter(
-                departure_date_hour__year=month_date.year,
-                departure_date_hour__month=month_date.month
+            queryset = queryset.departure_month(
+                month_date.year,
+                month_date.month
             )
         # Rango de fechas
         elif start_date and end_date:
-            queryset = queryset.filter(
-                departure_date_hour__date__range=(start_date, end_date)
+            queryset = queryset.departure_between(
+                *period_bounds(start_date, end_date)
             )
         # Solo fecha de inicio
         elif start_date:
-            queryset = queryset.filter(
-                Q(entry_date_hour__date=start_date)
+            start, end = day_bounds(start_date)
+
+            queryset = queryset.not_departed_before(start).filter(
+                Q(entry_date_hour__gte=start, entry_date_hour__lt=end)
                 |
-                Q(departure_date_hour__date=start_date)
+                Q(departure_date_hour__gte=start, departure_date_hour__lt=end)
                 |
                 Q(
-                    entry_date_hour__date__lt=start_date,
+                    entry_date_hour__lt=start,
                     departure_date_hour__isnull=True
                 )
             )
@@ -118,25 +329,35 @@ class EntryManager(models.Manager):
     def entries_today_and_active(self, date): #se usa
         return self.get_queryset().entries_today_and_active(date)
 
+    def active(self):
+        return self.get_queryset().active()
+
+    def plate_matches(self, text):
+        return self.get_queryset().plate_matches(text)
+
     def departure_today(self, date):
         return self.get_queryset().departure_today(date)
 
     def departure_month(self, year, month):
         return self.get_queryset().departure_month(year, month)
 
+    def departure_between(self, start, end):
+        return self.get_queryset().departure_between(start, end)
+
     def today_income(self, date): #Se usa en dashboard
-        return (
-            self.departure_today(date)
-            .aggregate(total=Sum("final_amount"))
-            ["total"] or 0
+        _, amount = DailyRevenue.objects.income(
+            date, date, DailyRevenue.PARKING_SOURCES
         )
+        return amount
 
     def month_income(self, year, month): #Se usa en dashboard
-        return (
-            self.departure_month(year, month)
-            .aggregate(total=Sum("final_amount"))
-            ["total"] or 0
+        start = date(year, month, 1)
+        end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+
+        _, amount = DailyRevenue.objects.income(
+            start, end, DailyRevenue.PARKING_SOURCES
         )
+        return amount
 
     def total_active_vehicles(self):
         return self.get_queryset().active().count()
@@ -148,6 +369,8 @@ class EntryManager(models.Manager):
 class Entry(models.Model): 
     """ Modelo de entradas al parqueo """
     plate = models.CharField("Placa", max_length=10)
+    plate_normalized = models.CharField("Placa normalizada", max_length=10, default="", editable=False)
+    plate_display = models.CharField("Placa para mostrar", max_length=14, default="", editable=False)
     entry_date_hour = models.DateTimeField("Fecha y hora de entrada", default=now)
     departure_date_hour = models.DateTimeField("Fecha y hora de salida", null=True, blank=True)
     fee = models.ForeignKey(
@@ -182,43 +405,93 @@ class Entry(models.Model):
         permissions = [
             ("view_statistics_entry", "Puede ver estadísticas de entradas"),
         ]
+        # Una sola entrada activa por placa: índice único parcial
+        # ACTIVE_PLATE_CONSTRAINT sobre la partición por defecto, creado
+        # por la migración 0020 (la tabla particionada no admite la
+        # restricción en el modelo); Entry.save lo traduce a
+        # ActiveEntryExists
+        constraints = [
+            # Las entradas activas son las que no tienen salida: todas
+            # quedan en la partición por defecto, donde está ese índice
+            # (ver entry_partitions)
+            models.CheckConstraint(
+                condition=(
+                    Q(state=True, departure_date_hour__isnull=True)
+                    | Q(state=False, departure_date_hour__isnull=False)
+                ),
+                name="entry_state_matches_departure",
+            ),
+        ]
+        indexes = [
+            # Entradas del día / historial
+            models.Index(
+                fields=["entry_date_hour"],
+                name="entry_entry_date_idx",
+            ),
+            # Vehículos dentro del parqueo, más recientes primero
+            models.Index(
+                fields=["-entry_date_hour"],
+                condition=Q(state=True),
+                name="entry_active_entry_date_idx",
+            ),
+            # Salidas del día / mes / periodo; incluye el monto para
+            # sumar ingresos solo con el índice
+            models.Index(
+                fields=["departure_date_hour"],
+                include=["final_amount"],
+                name="entry_departure_date_idx",
+            ),
+            # Historial y reportes por placa
+            models.Index(
+                fields=["plate", "-entry_date_hour"],
+                name="entry_plate_entry_date_idx",
+            ),
+            # Búsqueda por parte de la placa (pg_trgm)
+            GinIndex(
+                fields=["plate_normalized"],
+                opclasses=["gin_trgm_ops"],
+                name="entry_plate_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.plate
     
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
 
-        # El estado siempre depende de la fecha de salida
-        self.state = self.departure_date_hour is None
+        # Recordar los valores cargados para detectar cambios sin releer la fila
+        instance._loaded_values = {
+            attname: instance.__dict__.get(attname, DEFERRED)
+            for attname in TRACKED_FIELDS.values()
+        }
 
-        # Validar entradas activas
-        if (
-            self.state
-            and Entry.objects.filter(
-                plate=self.plate,
-                state=True
-            ).exclude(pk=self.pk).exists()
-        ):
-            raise ValueError(
-                f"Ya existe una entrada activa para esta placa: {self.plate}"
-            )
+        return instance
 
-        departure_changed = False
+    def validate_constraints(self, exclude=None):
+        # La entrada activa única por placa la garantiza la base de datos
+        # al guardar (ver save), el estado se recalcula ahí mismo
+        exclude = set(exclude or ()) | {"state"}
+        super().validate_constraints(exclude=exclude)
 
-        if self.pk:
+    def save(self, *args, **kwargs):
 
-            old = Entry.objects.only(
-                "departure_date_hour"
-            ).get(pk=self.pk)
+        # El estado siempre depende de la fecha de salida
+        self.state = self.departure_date_hour is None
 
-            departure_changed = (
-                old.departure_date_hour != self.departure_date_hour
-            )
+        set_plate_columns(self, kwargs)
+
+        update_fields = kwargs.get("update_fields")
 
-        elif self.departure_date_hour:
-            departure_changed = True
+        if self._state.adding:
+            previous_revenue, was_active = None, False
+        else:
+            stored = self._stored_values()
+            previous_revenue = revenue_line(stored)
+            was_active = stored["departure_date_hour"] is None
 
-        if departure_changed:
+        if self._departure_changed(update_fields):
 
             if self.departure_date_hour:
 
@@ -234,7 +507,131 @@ class Entry(models.Model):
                 self.final_minutes = None
                 self.final_amount = None
 
-        super().save(*args, **kwargs)
+            if update_fields is not None:
+                update_fields = kwargs["update_fields"] = {
+                    *update_fields,
+                    "state",
+                    "final_minutes",
+                    "final_amount",
+                }
+
+        written_values = self._written_values(update_fields)
+        revenue = revenue_line(written_values)
+        revenue_changed = revenue != previous_revenue
+
+        # +1 al abrir la entrada, -1 al cerrarla
+        occupancy_delta = (
+            int(written_values["departure_date_hour"] is None) - int(was_active)
+        )
+
+        # Los reportes en caché de días cerrados con esta entrada dejan de valer
+        today = localdate()
+        stale_days = closed_report_days(written_values, today)
+
+        if not self._state.adding:
+            stale_days |= closed_report_days(stored, today)
+
+        using = kwargs.get("using") or router.db_for_write(
+            self.__class__,
+            instance=self
+        )
+
+        # La entrada, el libro de ingresos y la ocupación se guardan en la
+        # misma transacción; dentro de una transacción externa, el savepoint
+        # evita que el error de la restricción la deje inutilizable
+        atomic = (
+            transaction.atomic(using=using)
+            if (
+                revenue_changed
+                or occupancy_delta
+                or stale_days
+                or transaction.get_connection(using).in_atomic_block
+            )
+            else nullcontext()
+        )
+
+        try:
+            with atomic:
+                super().save(*args, **kwargs)
+
+                if revenue_changed:
+                    DailyRevenue.objects.db_manager(using).move(
+                        previous_revenue,
+                        revenue
+                    )
+
+                if occupancy_delta:
+                    Configuration.objects.db_manager(using).move_occupancy(
+                        occupancy_delta
+                    )
+
+                if stale_days:
+                    ReportDataVersion.objects.db_manager(using).bump(
+                        report_data_key(day) for day in stale_days
+                    )
+        except IntegrityError as e:
+            if not _violates(e, ACTIVE_PLATE_CONSTRAINT):
+                raise
+
+            raise ActiveEntryExists(
+                f"Ya existe una entrada activa para esta placa: {self.plate}"
+            ) from e
+
+        self._loaded_values = written_values
+
+    def _stored_values(self):
+        """
+        Valores guardados de los campos seguidos (salida, tarifa, monto, placa)
+        """
+        loaded = getattr(self, "_loaded_values", {})
+
+        if any(loaded.get(attname, DEFERRED) is DEFERRED for attname in TRACKED_FIELDS.values()):
+            loaded = (
+                Entry.objects
+                .filter(pk=self.pk)
+                .values(*TRACKED_FIELDS.values())
+                .get()
+            )
+            self._loaded_values = loaded
+
+        return loaded
+
+    def _written_values(self, update_fields=None):
+        """
+        Valores de los campos seguidos tal como quedan en la base de datos
+        después de guardar con `update_fields`
+        """
+        stored = {} if self._state.adding else self._stored_values()
+
+        return {
+            attname: (
+                getattr(self, attname)
+                if update_fields is None or name in update_fields
+                else stored[attname]
+            )
+            for name, attname in TRACKED_FIELDS.items()
+        }
+
+    def _departure_changed(self, update_fields=None):
+        """
+        Indica si la fecha de salida cambió respecto a la guardada
+        """
+        if update_fields is not None:
+
+            # No se está escribiendo la salida
+            if "departure_date_hour" not in update_fields:
+                return False
+
+            # Quien guarda ya congeló minutos y monto (ej. vista de salida)
+            if {"final_minutes", "final_amount"} <= set(update_fields):
+                return False
+
+        if self._state.adding:
+            return self.departure_date_hour is not None
+
+        stored = self._stored_values()["departure_date_hour"]
+
+        return stored != self.departure_date_hour
 
     def calculate_amount(self, policy=None):
         """
@@ -256,31 +653,93 @@ class Entry(models.Model):
             return minute, float(policy.amount or 0)
 
         # 🔵 Tarifa normal (Fee)
-        if self.fee:
-            return minute, float(self.fee.calculate_fee(minute))
+        if self.fee_id:
+            return minute, float(fee_catalog.price(self.fee_id, minute))
 
         # Fallback
         return minute, 0
 
     def formatted_plate(self):
         """
-        retorna el formato de placa con espacios
+        retorna el formato de placa con espacios (guardado al salvar)
         """
-        return format_plate(self.plate)
+        return self.plate_display or format_plate(self.plate)
     
     def policy(self):
         """
         Retorna la política de placa activa asociada a esta entrada, si existe
         """
-        return PlatePolicy.objects.active().filter(plate=self.plate).first()
+        return policy_resolver.resolve(self.plate)
+
+
+class ConfigurationQuerySet(models.QuerySet):
+    def move_occupancy(self, delta):
+        """
+        Suma `delta` a los espacios ocupados sin leer la fila
+        (nunca baja de cero)
+        """
+        return self.update(occupied=Greatest(F("occupied") + delta, 0))
+
+    def reconcile_occupancy(self):
+        """
+        Corrige los espacios ocupados con el conteo real de entradas activas.
+
+        Las filas se bloquean antes de contar: las entradas que se abren
+        o cierran mientras tanto esperan y aplican su cambio después.
+        """
+        with transaction.atomic(using=self.db):
+            list(self.select_for_update().values_list("pk", flat=True))
+
+            active = Entry.objects.using(self.db).active().count()
+            self.update(occupied=active)
+
+        return active
+
+
+class ConfigurationManager(models.Manager):
+    def get_queryset(self):
+        return ConfigurationQuerySet(self.model, using=self._db)
+
+    def move_occupancy(self, delta):
+        return self.get_queryset().move_occupancy(delta)
+
+    def reconcile_occupancy(self):
+        return self.get_queryset().reconcile_occupancy()
+
+    def occupancy(self):
+        """
+        Retorna {capacity, occupied, available} de la configuración actual
+        """
+        configuration = (
+            self.get_queryset()
+            .order_by("pk")
+            .values("ability", "occupied")
+            .first()
+        )
+
+        if configuration is None:
+            return {"capacity": 0, "occupied": 0, "available": 0}
+
+        capacity = configuration["ability"]
+        occupied = configuration["occupied"]
+
+        return {
+            "capacity": capacity,
+            "occupied": occupied,
+            "available": max(capacity - occupied, 0),
+        }
 
 
 class Configuration(models.Model):
     """ Modelo de configuración """
     name = models.CharField("Nombre", max_length=200)
     ability = models.PositiveIntegerField("Espacios disponibles")
+    # Se actualiza al abrir o cerrar entradas (ver Entry.save)
+    occupied = models.PositiveIntegerField("Espacios ocupados", default=0, editable=False)
     # logo
 
+    objects = ConfigurationManager()
+
     class Meta:
         verbose_name = "Configuración"
         verbose_name_plural = "Configuraciones"
@@ -297,6 +756,13 @@ class PlatePolicyQuerySet(models.QuerySet):
         return self.active().filter(billing_type="MONTHLY")
     
 
+# Campos que la importación masiva escribe al actualizar una placa existente
+PLATE_IMPORT_FIELDS = ("owner_name", "billing_type", "amount", "active")
+
+# Campos de la política que cambian los reportes y las suscripciones
+POLICY_REPORT_FIELDS = ("plate", "billing_type", "amount", "active")
+
+
 class PlatePolicyManager(models.Manager):
     def get_queryset(self):
         return PlatePolicyQuerySet(self.model, using=self._db)
@@ -304,16 +770,38 @@ class PlatePolicyManager(models.Manager):
     def active(self):
         return self.get_queryset().active()
 
+    def monthly(self):
+        return self.get_queryset().monthly()
+
     def total_active_monthly_subscriptions(self):
-        return self.get_queryset().monthly().count()
+        count, _ = DailyRevenue.objects.monthly_subscriptions()
+        return count
     
     def month_income(self):
-        return (
-            self.get_queryset()
-            .monthly()
-            .aggregate(total=Sum("amount"))
-            ["total"] or 0
-        )
+        _, amount = DailyRevenue.objects.monthly_subscriptions()
+        return amount
+
+    def bulk_upsert(self, policies, batch_size=500):
+        """
+        Inserta o actualiza (por placa) las políticas en lotes, con los
+        mismos efectos de save(): fila de suscripciones mensuales,
+        versión de datos de los reportes y caché de políticas
+        """
+        for policy in policies:
+            set_plate_columns(policy, {})
+
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                policies,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=["plate"],
+                update_fields=[*PLATE_IMPORT_FIELDS, *PLATE_COLUMNS],
+            )
+            DailyRevenue.objects.db_manager(self.db).refresh_monthly_subscriptions()
+            ReportDataVersion.objects.db_manager(self.db).bump([POLICIES_DATA_KEY])
+
+        policy_resolver.invalidate()
 
 
 class PlatePolicy(models.Model):
@@ -330,6 +818,9 @@ class PlatePolicy(models.Model):
         unique=True
     )
 
+    plate_normalized = models.CharField("Placa normalizada", max_length=10, default="", editable=False)
+    plate_display = models.CharField("Placa para mostrar", max_length=14, default="", editable=False)
+
     billing_type = models.CharField(
         "Tipo de cobro",
         max_length=10,
@@ -366,9 +857,287 @@ class PlatePolicy(models.Model):
 
     def __str__(self):
         return f"{self.plate} - {self.billing_type}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Recordar los valores cargados para saber si el cambio afecta reportes
+        instance._loaded_values = {
+            name: instance.__dict__.get(name, DEFERRED)
+            for name in POLICY_REPORT_FIELDS
+        }
+
+        return instance
+
+    def _report_fields_changed(self, update_fields=None):
+        """
+        Si se guarda un cambio de placa, cobro, monto o estado (siempre
+        al crear la política)
+        """
+        loaded = getattr(self, "_loaded_values", None)
+
+        if self._state.adding or loaded is None:
+            return True
+
+        fields = (
+            POLICY_REPORT_FIELDS if update_fields is None
+            else set(POLICY_REPORT_FIELDS) & set(update_fields)
+        )
+
+        return any(
+            loaded[name] is DEFERRED or loaded[name] != getattr(self, name)
+            for name in fields
+        )
+
+    def save(self, *args, **kwargs):
+        set_plate_columns(self, kwargs)
+
+        using = kwargs.get("using") or router.db_for_write(
+            self.__class__,
+            instance=self
+        )
+
+        changed = self._report_fields_changed(kwargs.get("update_fields"))
+
+        # La fila de suscripciones mensuales del mes y la versión de
+        # datos de los reportes se actualizan en la misma transacción,
+        # solo si cambia algo que los reportes usan (no el propietario)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+            if changed:
+                DailyRevenue.objects.db_manager(using).refresh_monthly_subscriptions()
+                ReportDataVersion.objects.db_manager(using).bump([POLICIES_DATA_KEY])
+
+        self._loaded_values = {
+            name: getattr(self, name) for name in POLICY_REPORT_FIELDS
+        }
     
     def formatted_plate(self):
         """
-        retorna el formato de placa con espacios
+        retorna el formato de placa con espacios (guardado al salvar)
+        """
+        return self.plate_display or format_plate(self.plate)
+
+
+class ReportJobQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(status=ReportJob.PENDING)
+
+    def finished(self):
+        return self.filter(status__in=(ReportJob.DONE, ReportJob.FAILED))
+
+
+class ReportJobManager(models.Manager):
+    def get_queryset(self):
+        return ReportJobQuerySet(self.model, using=self._db)
+
+    def finished(self):
+        return self.get_queryset().finished()
+
+    def enqueue(self, report_type, output_format, params, user=None, base_url=""):
+        return self.create(
+            report_type=report_type,
+            output_format=output_format,
+            params=params,
+            base_url=base_url,
+            requested_by=user if user and user.is_authenticated else None,
+        )
+
+    def claim_next(self):
+        """
+        Toma el trabajo pendiente más antiguo y lo marca en proceso.
+
+        Varios workers pueden reclamar a la vez: las filas bloqueadas
+        por otro worker se saltan en lugar de esperar.
+        """
+        with transaction.atomic(using=self.db):
+            job = (
+                self.get_queryset()
+                .pending()
+                .select_for_update(skip_locked=True)
+                .order_by("created_at", "pk")
+                .first()
+            )
+
+            if job is None:
+                return None
+
+            job.status = ReportJob.RUNNING
+            job.started_at = now()
+            job.save(update_fields=["status", "started_at"])
+
+        return job
+
+    def requeue_stale(self, started_before):
+        """
+        Devuelve a pendientes los trabajos que quedaron en proceso
+        (p. ej. el worker se detuvo a la mitad)
         """
-        return format_plate(self.plate)
+        return self.get_queryset().filter(
+            status=ReportJob.RUNNING,
+            started_at__lt=started_before,
+        ).update(status=ReportJob.PENDING, progress=0, started_at=None)
+
+
+class ReportJob(models.Model):
+    """ Reporte generado en segundo plano por el worker (run_report_worker) """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+    STATUSES = (
+        (PENDING, "En cola"),
+        (RUNNING, "Generando"),
+        (DONE, "Listo"),
+        (FAILED, "Falló"),
+    )
+
+    REPORT_TYPES = (
+        ("day", "Diario"),
+        ("month", "Mensual"),
+        ("period", "Periodo"),
+        ("plate", "Por placa"),
+    )
+
+    OUTPUT_FORMATS = (
+        ("pdf", "PDF"),
+        ("xlsx", "Excel"),
+    )
+
+    report_type = models.CharField("Tipo de reporte", max_length=10, choices=REPORT_TYPES)
+    output_format = models.CharField("Formato", max_length=10, choices=OUTPUT_FORMATS)
+    params = models.JSONField("Parámetros", default=dict)
+
+    # URL base para resolver los estáticos del PDF (la del request original)
+    base_url = models.CharField(max_length=200, blank=True)
+
+    status = models.CharField("Estado", max_length=10, choices=STATUSES, default=PENDING)
+    progress = models.PositiveSmallIntegerField("Progreso", default=0)
+    error = models.TextField("Error", blank=True)
+
+    # Ruta relativa a REPORT_ARTIFACT_ROOT
+    artifact = models.CharField("Archivo", max_length=255, blank=True)
+    filename = models.CharField("Nombre de descarga", max_length=150, blank=True)
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="report_jobs"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReportJobManager()
+
+    class Meta:
+        verbose_name = "Trabajo de reporte"
+        verbose_name_plural = "Trabajos de reportes"
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                condition=Q(status="PENDING"),
+                name="reportjob_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} ({self.output_format}) - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    @property
+    def artifact_path(self):
+        return Path(settings.REPORT_ARTIFACT_ROOT) / self.artifact
+
+    def set_progress(self, progress):
+        self.progress = progress
+        ReportJob.objects.filter(pk=self.pk).update(progress=progress)
+
+    def mark_done(self, artifact, filename):
+        self.status = self.DONE
+        self.progress = 100
+        self.artifact = artifact
+        self.filename = filename
+        self.finished_at = now()
+        self.save(update_fields=["status", "progress", "artifact", "filename", "finished_at"])
+
+    def mark_failed(self, error):
+        self.status = self.FAILED
+        self.error = error
+        self.finished_at = now()
+        self.save(update_fields=["status", "error", "finished_at"])
+
+
+class ReportDataVersionManager(models.Manager):
+    def bump(self, keys):
+        """
+        Incrementa la versión de cada clave (las que no existen se crean)
+        y retorna {clave: nueva versión}. Debe llamarse dentro de la
+        transacción del cambio que la origina.
+        """
+        keys = sorted(set(keys))
+
+        if not keys:
+            return {}
+
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+
+        # Un solo INSERT … ON CONFLICT: dos transacciones que crean la
+        # misma clave a la vez suman las dos (la segunda espera a la
+        # primera); las filas se bloquean en orden de clave
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (key, version)
+                SELECT key, 1 FROM unnest(%s::varchar[]) AS keys (key)
+                ORDER BY key
+                ON CONFLICT (key) DO UPDATE SET version = {table}.version + 1
+                RETURNING key, version
+                """,
+                [keys],
+            )
+
+            return dict(cursor.fetchall())
+
+    def stamp(self, keys):
+        """
+        Huella de las versiones de `keys`: cambia si cualquiera de ellas cambia
+        """
+        totals = self.filter(key__in=list(keys)).aggregate(
+            count=Count("pk"),
+            total=Sum("version"),
+        )
+
+        return f"{totals['count']}-{totals['total'] or 0}"
+
+
+class ReportDataVersion(models.Model):
+    """
+    Versión de los datos que usan los reportes, por día de entradas
+    ("entries:AAAA-MM-DD") y de políticas ("policies").
+
+    Forma parte de la llave de la caché de reportes (ver report_cache).
+    También guarda las versiones de los snapshots en memoria
+    ("parking:fee_catalog:version", ...; ver snapshots).
+    """
+    key = models.CharField("Llave", max_length=40, unique=True)
+    version = models.PositiveBigIntegerField("Versión", default=0)
+
+    objects = ReportDataVersionManager()
+
+    class Meta:
+        verbose_name = "Versión de datos de reportes"
+        verbose_name_plural = "Versiones de datos de reportes"
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
@@ -0,0 +1,117 @@
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.db import transaction
+
+from parking.services.snapshots import VersionedSnapshot, bump_version
+from parking.utils import normalize_plate
+
+
+# Sugerencias por consulta del autocompletado
+SUGGESTION_LIMIT = 10
+
+
+class ActivePlateIndex(VersionedSnapshot):
+    """
+    Placas con entrada activa, en memoria y ordenadas, para el
+    autocompletado por prefijo de la garita.
+
+    Se carga una vez por proceso. Al abrir, cerrar, borrar o cambiar
+    la placa de una entrada (ver signals) el proceso que escribe aplica
+    el cambio en su lugar; los demás ven otra versión y recargan completo.
+    Los cambios masivos sin save() deben llamar invalidate().
+    """
+
+    version_key = "parking:active_plates:version"
+
+    def __init__(self):
+        super().__init__()
+        self._plates = []
+        self._entries = {}
+
+    def _load(self):
+        from parking.models import Entry
+
+        entries = {}
+
+        rows = Entry.objects.active().values_list(
+            "pk", "plate", "plate_normalized", "plate_display"
+        )
+
+        for pk, plate, normalized, display in rows:
+            entries[normalized] = (pk, plate, display)
+
+        self._plates = sorted(entries)
+        self._entries = entries
+
+    def track(self, pk, before, after, entry=None, using=None):
+        """
+        Registra el cambio de una entrada: `before` y `after` son su
+        placa normalizada si estaba / queda activa, o None; `entry` es
+        (id, placa, placa para mostrar). Se aplica al confirmar la
+        transacción; sin cambio de estado ni de placa no hace nada.
+        """
+        if before == after:
+            return
+
+        transaction.on_commit(
+            partial(self._track, pk, before, after, entry, using),
+            using=using,
+        )
+
+    def _track(self, pk, before, after, entry, using):
+        version = bump_version(self.version_key, using)
+
+        with self._lock:
+            # Otro proceso cambió el índice desde la última carga: el
+            # snapshot ya no sirve de base, se recarga completo
+            if self._version is None or version != self._version + 1:
+                self._version = None
+                return
+
+            plates = list(self._plates)
+            entries = dict(self._entries)
+
+            if before and entries.get(before, (None,))[0] == pk:
+                del entries[before]
+                del plates[bisect_left(plates, before)]
+
+            if after:
+                if after not in entries:
+                    insort(plates, after)
+
+                entries[after] = entry
+
+            self._plates = plates
+            self._entries = entries
+            self._version = version
+
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT):
+        """
+        Retorna hasta `limit` tuplas (id, placa, placa para mostrar) de
+        entradas activas cuya placa empieza con `prefix`
+        """
+        prefix = normalize_plate(prefix)
+
+        if not prefix:
+            return []
+
+        self._ensure_loaded()
+
+        plates, entries = self._plates, self._entries
+        start = bisect_left(plates, prefix)
+        suggestions = []
+
+        for plate in plates[start:start + limit]:
+            if not plate.startswith(prefix):
+                break
+
+            entry = entries.get(plate)
+
+            if entry:
+                suggestions.append(entry)
+
+        return suggestions
+
+
+active_plates = ActivePlateIndex()
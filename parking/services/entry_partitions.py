@@ -0,0 +1,142 @@
+from datetime import date
+
+
+# Tabla de entradas particionada por mes de salida (RANGE sobre
+# departure_date_hour). Las entradas sin salida (activas) y las de meses
+# sin partición quedan en la partición por defecto.
+#
+# La tabla particionada no tiene llave primaria (la llave de partición
+# admite nulos): la base garantiza id único junto con la salida
+# (entry_id_departure_uniq) y los ids salen de la secuencia. Las
+# búsquedas solo por id revisan el índice de cada partición.
+TABLE = "parking_entry"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+# Meses futuros que se crean por adelantado
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass)",
+        [TABLE],
+    )
+    return cursor.fetchone()[0]
+
+
+def month_partitions(cursor):
+    """
+    Retorna {primer día del mes: nombre} de las particiones mensuales
+    """
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        [TABLE],
+    )
+
+    prefix = f"{TABLE}_p"
+    partitions = {}
+
+    for name, in cursor.fetchall():
+        if name.startswith(prefix):
+            year, month = name.removeprefix(prefix).split("_")
+            partitions[date(int(year), int(month), 1)] = name
+
+    return partitions
+
+
+def create_partition(cursor, month):
+    """
+    Crea la partición del mes; las filas de ese mes que ya estaban en la
+    partición por defecto se mueven a la nueva antes de adjuntarla
+    """
+    from parking.models import month_bounds
+
+    name = partition_name(month)
+    start, end = month_bounds(month.year, month.month)
+
+    cursor.execute(
+        f"""
+        SELECT EXISTS (
+            SELECT 1 FROM {DEFAULT_PARTITION}
+            WHERE departure_date_hour >= %s AND departure_date_hour < %s
+        )
+        """,
+        [start, end],
+    )
+
+    if not cursor.fetchone()[0]:
+        cursor.execute(
+            f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+        return name
+
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE departure_date_hour >= %s AND departure_date_hour < %s
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        [start, end],
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+
+    return name
+
+
+def ensure_partitions(cursor, first_month, last_month):
+    """
+    Crea las particiones mensuales que falten entre ambos meses
+    (inclusive); retorna los nombres creados
+    """
+    existing = month_partitions(cursor)
+    created = []
+    month = month_start(first_month)
+
+    while month <= last_month:
+        if month not in existing:
+            created.append(create_partition(cursor, month))
+
+        month = add_months(month, 1)
+
+    return created
+
+
+def detach_partitions(cursor, before_month):
+    """
+    Separa de la tabla las particiones de meses anteriores a
+    `before_month`; quedan como tablas independientes para archivarlas
+    """
+    detached = []
+
+    for month, name in sorted(month_partitions(cursor).items()):
+        if month < before_month:
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            detached.append(name)
+
+    return detached
@@ -0,0 +1,114 @@
+from bisect import bisect_right
+from decimal import Decimal
+
+import numpy as np
+
+from parking.services.snapshots import VersionedSnapshot
+
+
+_EMPTY_TABLE = (
+    np.empty(0, dtype=np.int64),
+    np.empty(0, dtype=np.float64),
+)
+
+
+class FeeCatalog(VersionedSnapshot):
+    """
+    Snapshot en memoria de las tarifas y sus rangos.
+
+    Carga una sola vez todas las tarifas con sus rangos ordenados
+    por minuto inicial y responde los precios con búsqueda binaria.
+    """
+
+    version_key = "parking:fee_catalog:version"
+
+    def __init__(self):
+        super().__init__()
+        self._fees = {}
+        self._tables = {}
+        self._arrays = {}
+        self._default_fee_id = None
+
+    def _load(self):
+        from parking.models import Fee, Range
+
+        fees = {fee.pk: fee for fee in Fee.objects.order_by("pk")}
+
+        tables = {pk: ([], []) for pk in fees}
+
+        ranges = (
+            Range.objects
+            .order_by("fee_id", "start_minute")
+            .values_list("fee_id", "start_minute", "amount")
+        )
+
+        for fee_id, start_minute, amount in ranges:
+            starts, amounts = tables[fee_id]
+            starts.append(start_minute)
+            amounts.append(amount)
+
+        self._fees = fees
+        self._tables = tables
+        self._arrays = {
+            pk: (
+                np.asarray(starts, dtype=np.int64),
+                np.asarray([float(a) for a in amounts], dtype=np.float64),
+            )
+            for pk, (starts, amounts) in tables.items()
+        }
+        self._default_fee_id = next(
+            (pk for pk, fee in fees.items() if fee.default),
+            None
+        )
+
+    def get(self, fee_id):
+        self._ensure_loaded()
+        return self._fees.get(fee_id)
+
+    def all(self):
+        """
+        Todas las tarifas ordenadas por id
+        """
+        self._ensure_loaded()
+        return list(self._fees.values())
+
+    def default_fee_id(self):
+        self._ensure_loaded()
+        return self._default_fee_id
+
+    def first_amount(self, fee_id):
+        """
+        Monto del primer rango de la tarifa (costo base del ticket)
+        """
+        self._ensure_loaded()
+
+        _, amounts = self._tables.get(fee_id, ((), ()))
+
+        return amounts[0] if amounts else None
+
+    def table(self, fee_id):
+        """
+        Tabla compilada de la tarifa como arreglos NumPy
+        (minutos iniciales, montos) para precios por lote
+        """
+        self._ensure_loaded()
+
+        return self._arrays.get(fee_id, _EMPTY_TABLE)
+
+    def price(self, fee_id, minutes):
+        """
+        Monto a cobrar para la tarifa según los minutos transcurridos
+        """
+        self._ensure_loaded()
+
+        starts, amounts = self._tables.get(fee_id, ((), ()))
+
+        index = bisect_right(starts, minutes) - 1
+
+        if index < 0:
+            return Decimal("0")
+
+        return amounts[index]
+
+
+fee_catalog = FeeCatalog()
@@ -0,0 +1,181 @@
+import csv
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from io import TextIOWrapper
+
+from openpyxl import load_workbook
+
+from parking.models import PlatePolicy
+
+
+# Lotes de bulk_create al importar
+IMPORT_BATCH_SIZE = 500
+
+# Encabezados aceptados (en minúsculas) → campo de la política
+IMPORT_HEADERS = {
+    "plate": "plate",
+    "placa": "plate",
+    "owner_name": "owner_name",
+    "propietario": "owner_name",
+    "billing_type": "billing_type",
+    "tipo de cobro": "billing_type",
+    "tipo_cobro": "billing_type",
+    "amount": "amount",
+    "monto": "amount",
+    "active": "active",
+    "activo": "active",
+}
+
+# Tipo de cobro por código o por etiqueta ("MONTHLY", "Mensual", ...)
+BILLING_TYPES = {
+    name.upper(): code
+    for code, label in PlatePolicy.BILLING_TYPES
+    if code
+    for name in (code, label)
+}
+
+TRUE_VALUES = {"1", "si", "sí", "s", "true", "yes", "x", "activo"}
+FALSE_VALUES = {"0", "no", "n", "false", "inactivo"}
+
+
+@dataclass
+class PolicyImportResult:
+    """
+    Resultado de la importación: placas nuevas, actualizadas y
+    errores por fila [(fila, placa, mensaje)]
+    """
+
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def imported(self):
+        return len(self.created) + len(self.updated)
+
+
+def read_policy_rows(file, filename):
+    """
+    Retorna las filas del archivo CSV o XLSX como (número de fila, dict)
+    con los campos de la política según el encabezado
+    """
+    if filename.lower().endswith(".xlsx"):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    elif filename.lower().endswith(".csv"):
+        rows = csv.reader(TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    else:
+        raise ValueError("El archivo debe ser .csv o .xlsx")
+
+    header = next(rows, None)
+
+    if not header:
+        raise ValueError("El archivo está vacío")
+
+    fields = [
+        IMPORT_HEADERS.get(str(name or "").strip().lower())
+        for name in header
+    ]
+
+    if "plate" not in fields or "billing_type" not in fields:
+        raise ValueError("El encabezado debe incluir al menos placa y tipo de cobro")
+
+    for number, row in enumerate(rows, start=2):
+        if not any(value not in (None, "") for value in row):
+            continue
+
+        yield number, {
+            name: value
+            for name, value in zip(fields, row)
+            if name
+        }
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _clean_row(values):
+    """
+    Retorna los campos de la política validados (mismas reglas que
+    PlatePolicyForm) o lanza ValueError con el motivo
+    """
+    plate = re.sub(r"[^A-Za-z0-9]", "", _text(values.get("plate"))).upper()
+
+    if not plate:
+        raise ValueError("La placa solo puede contener letras y números")
+
+    if len(plate) > 10:
+        raise ValueError("La placa no puede tener más de 10 caracteres")
+
+    billing_type = BILLING_TYPES.get(_text(values.get("billing_type")).upper())
+
+    if not billing_type:
+        raise ValueError("Tipo de cobro no válido")
+
+    amount = _text(values.get("amount"))
+
+    try:
+        amount = Decimal(amount.replace(",", "")) if amount else None
+    except InvalidOperation:
+        raise ValueError("Monto no válido") from None
+
+    if amount is not None:
+        if not amount.is_finite() or amount < 0 or amount >= 10 ** 6:
+            raise ValueError("Monto fuera de rango")
+
+        amount = amount.quantize(Decimal("0.01"))
+
+    if billing_type in ("DAILY", "HOURLY") and not amount:
+        raise ValueError("Debes indicar un monto para este tipo de cobro")
+
+    active = _text(values.get("active")).lower()
+
+    if active and active not in TRUE_VALUES | FALSE_VALUES:
+        raise ValueError("Valor de activo no válido")
+
+    return {
+        "plate": plate,
+        "owner_name": _text(values.get("owner_name"))[:150],
+        "billing_type": billing_type,
+        "amount": amount,
+        "active": active not in FALSE_VALUES,
+    }
+
+
+def import_policies(rows, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Valida todas las filas en memoria contra una sola consulta de las
+    placas existentes y las inserta o actualiza por placa en lotes.
+    Las filas con error se reportan y no se importan.
+    """
+    result = PolicyImportResult()
+    policies = {}
+
+    for number, values in rows:
+        try:
+            cleaned = _clean_row(values)
+        except ValueError as e:
+            result.errors.append((number, _text(values.get("plate")), str(e)))
+            continue
+
+        if cleaned["plate"] in policies:
+            result.errors.append((number, cleaned["plate"], "Placa repetida en el archivo"))
+            continue
+
+        policies[cleaned["plate"]] = PlatePolicy(**cleaned)
+
+    existing = set(
+        PlatePolicy.objects
+        .filter(plate__in=policies)
+        .values_list("plate", flat=True)
+    )
+
+    for plate in policies:
+        (result.updated if plate in existing else result.created).append(plate)
+
+    if policies and not dry_run:
+        PlatePolicy.objects.bulk_upsert(list(policies.values()), batch_size=batch_size)
+
+    return result
@@ -0,0 +1,54 @@
+from parking.services.snapshots import VersionedSnapshot
+
+
+class PlatePolicyResolver(VersionedSnapshot):
+    """
+    Resolución placa → política activa.
+
+    Las políticas activas se cargan una vez por proceso en un
+    diccionario por placa; como la mayoría de placas no tiene
+    política, la búsqueda negativa se responde en memoria sin
+    tocar la base de datos.
+    """
+
+    version_key = "parking:plate_policies:version"
+
+    def __init__(self):
+        super().__init__()
+        self._policies = {}
+
+    def _load(self):
+        from parking.models import PlatePolicy
+
+        self._policies = {
+            policy.plate: policy
+            for policy in PlatePolicy.objects.active()
+        }
+
+    def resolve(self, plate):
+        """
+        Retorna la política activa de la placa o None
+        """
+        if not plate:
+            return None
+
+        self._ensure_loaded()
+
+        return self._policies.get(plate.strip().upper())
+
+    def resolve_many(self, plates):
+        """
+        Retorna {placa: política} solo para las placas con política activa
+        """
+        self._ensure_loaded()
+
+        policies = self._policies
+
+        return {
+            plate: policies[plate]
+            for plate in plates
+            if plate in policies
+        }
+
+
+policy_resolver = PlatePolicyResolver()
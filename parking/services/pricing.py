@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.utils.timezone import now
+
+from parking.services.fee_catalog import fee_catalog
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MICROSECONDS_PER_MINUTE = 60_000_000
+
+# Sin tarifa asignada (los pk nunca son 0)
+NO_FEE = 0
+
+
+def epoch_microseconds(values, default=None):
+    """
+    Convierte una secuencia de datetimes a microsegundos desde epoch.
+    Los valores None se reemplazan por `default`
+    """
+    if isinstance(values, np.ndarray) and values.dtype == np.int64:
+        return values
+
+    default_us = (
+        (default - EPOCH) // ONE_MICROSECOND
+        if default is not None else 0
+    )
+
+    return np.fromiter(
+        (
+            (value - EPOCH) // ONE_MICROSECOND
+            if value is not None else default_us
+            for value in values
+        ),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def elapsed_minutes(entry_dates, departure_dates, at=None):
+    """
+    Minutos cobrables (redondeo hacia arriba al minuto) entre
+    entrada y salida; las entradas sin salida se miden contra `at`
+    """
+    start = epoch_microseconds(entry_dates)
+    end = epoch_microseconds(departure_dates, default=at or now())
+
+    # ceil((end - start) / 60s) con aritmética entera
+    return -((start - end) // MICROSECONDS_PER_MINUTE)
+
+
+def price_table(minutes, starts, values):
+    """
+    Aplica una tabla de rangos (minutos iniciales ordenados, montos)
+    a un arreglo de minutos
+    """
+    if not len(starts):
+        return np.zeros(len(minutes), dtype=np.float64)
+
+    index = np.searchsorted(starts, minutes, side="right") - 1
+
+    return np.where(
+        index >= 0,
+        values[np.maximum(index, 0)],
+        0.0,
+    )
+
+
+def price_minutes(minutes, fee_ids, billing_types=None, policy_amounts=None):
+    """
+    Monto a cobrar para minutos ya calculados, con las mismas
+    reglas que Entry.calculate_amount
+    """
+    minutes = np.asarray(minutes, dtype=np.int64)
+    size = len(minutes)
+
+    fee_ids = np.fromiter(
+        (fee_id or NO_FEE for fee_id in fee_ids),
+        dtype=np.int64,
+        count=size,
+    )
+
+    amounts = np.zeros(size, dtype=np.float64)
+
+    if billing_types is None:
+        billing_types = np.full(size, None, dtype=object)
+    else:
+        billing_types = np.asarray(billing_types, dtype=object)
+
+    # 🟢 Mensual → no paga nunca por salida
+    monthly = billing_types == "MONTHLY"
+
+    # 🟡 Diario por suscripción → paga monto fijo por salida
+    daily = billing_types == "DAILY"
+
+    if daily.any():
+        policy_amounts = np.fromiter(
+            (float(amount or 0) for amount in policy_amounts),
+            dtype=np.float64,
+            count=size,
+        )
+        amounts[daily] = policy_amounts[daily]
+
+    # 🔵 Tarifa normal (Fee)
+    tariff = ~(monthly | daily) & (fee_ids != NO_FEE)
+
+    for fee_id in np.unique(fee_ids[tariff]):
+        starts, values = fee_catalog.table(int(fee_id))
+
+        if not len(starts):
+            continue
+
+        mask = tariff & (fee_ids == fee_id)
+
+        amounts[mask] = price_table(minutes[mask], starts, values)
+
+    return amounts
+
+
+def price_entries(
+    entry_dates,
+    departure_dates,
+    fee_ids,
+    billing_types=None,
+    policy_amounts=None,
+    at=None,
+):
+    """
+    Calcula minutos y montos de muchas entradas a la vez.
+
+    Equivale a llamar Entry.calculate_amount por cada fila, pero
+    agrupa por tarifa y resuelve los rangos con searchsorted.
+    Retorna (minutos, montos) como arreglos NumPy.
+    """
+    minutes = elapsed_minutes(entry_dates, departure_dates, at=at)
+
+    amounts = price_minutes(
+        minutes,
+        fee_ids,
+        billing_types,
+        policy_amounts,
+    )
+
+    return minutes, amounts
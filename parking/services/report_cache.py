@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.timezone import localdate
+
+from parking.models import (
+    ReportDataVersion,
+    POLICIES_DATA_KEY, report_data_key
+)
+
+
+def cache_root():
+    return Path(settings.REPORT_CACHE_ROOT)
+
+
+def report_range(report_type, params):
+    """
+    Primer y último día cuyos datos entran en el reporte
+    """
+    match report_type:
+        case "day":
+            day = date.fromisoformat(params["date"])
+            return day, day
+        case "month":
+            start = date.fromisoformat(params["month_date"]).replace(day=1)
+            end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+            return start, end
+        case "period" | "plate":
+            return (
+                date.fromisoformat(params["start_date"]),
+                date.fromisoformat(params["end_date"]),
+            )
+
+    raise ValueError(f"Tipo de reporte no válido: {report_type}")
+
+
+def report_cache_key(report_type, output_format, params, today=None):
+    """
+    Llave del reporte en la caché o None si el periodo no está cerrado.
+
+    Incluye la huella de las versiones de datos de cada día del periodo
+    y de las políticas: cualquier cambio en ellos produce otra llave.
+    """
+    start, end = report_range(report_type, params)
+
+    if end >= (today or localdate()):
+        return None
+
+    keys = [
+        report_data_key(start + timedelta(days=offset))
+        for offset in range((end - start).days + 1)
+    ]
+    keys.append(POLICIES_DATA_KEY)
+
+    payload = json.dumps(
+        [
+            report_type,
+            output_format,
+            params,
+            ReportDataVersion.objects.stamp(keys),
+        ],
+        sort_keys=True,
+    )
+
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cached_artifact(key, output_format):
+    """
+    Ruta del archivo en caché o None; marca el archivo como usado
+    """
+    path = cache_root() / f"{key}.{output_format}"
+
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+
+    return path
+
+
+def store_artifact(key, output_format, source):
+    """
+    Guarda una copia del archivo generado y aplica el límite de tamaño
+    """
+    root = cache_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".part")
+    os.close(fd)
+
+    try:
+        # Mismo disco: enlace duro sin copiar bytes
+        os.unlink(tmp_path)
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+
+    os.replace(tmp_path, root / f"{key}.{output_format}")
+
+    evict(settings.REPORT_CACHE_MAX_BYTES)
+
+
+def evict(max_bytes):
+    """
+    Elimina los archivos usados hace más tiempo hasta quedar bajo `max_bytes`
+    """
+    files = []
+
+    for entry in os.scandir(cache_root()):
+        if entry.name.endswith(".part"):
+            continue
+
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+
+        Path(path).unlink(missing_ok=True)
+        total -= size
@@ -0,0 +1,190 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.utils.timezone import localtime
+
+
+AGGREGATORS = {}
+
+
+def register_aggregator(name):
+    """
+    Registra una clase de agregador bajo `name` (ver ReportEngine)
+    """
+    def decorator(cls):
+        cls.name = name
+        AGGREGATORS[name] = cls
+        return cls
+
+    return decorator
+
+
+class Aggregator:
+    """
+    Recibe cada fila del reporte una sola vez y acumula su resultado
+    """
+
+    name = None
+
+    def add(self, row):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+@register_aggregator("summary")
+class SummaryAggregator(Aggregator):
+    """
+    Conteos e ingresos por tipo de cobro (llaves de report_service._build_summary).
+    La suscripción mensual se suma una vez por placa, no por entrada.
+    """
+
+    TYPES = {None: "normal", "DAILY": "daily", "MONTHLY": "monthly"}
+
+    def __init__(self, monthly_policy_income=False):
+        self.monthly_policy_income = monthly_policy_income
+        self.stats = defaultdict(Decimal)
+        self.stats.update(entry_count=0, normal_count=0, daily_count=0, monthly_count=0)
+        self.monthly_plates = set()
+
+    def add(self, row):
+        stats = self.stats
+        stats["entry_count"] += 1
+        stats["total_income"] += row.final_amount
+
+        name = self.TYPES.get(row.billing_type)
+
+        if name is None:
+            return
+
+        stats[f"{name}_count"] += 1
+
+        if name == "monthly" and self.monthly_policy_income:
+            if row.plate not in self.monthly_plates:
+                self.monthly_plates.add(row.plate)
+                stats["total_income_monthly"] += row.policy_amount or 0
+            return
+
+        stats[f"total_income_{name}"] += row.final_amount
+
+    def result(self):
+        stats = dict(self.stats)
+
+        for name in self.TYPES.values():
+            stats.setdefault(f"total_income_{name}", Decimal("0"))
+
+        stats.setdefault("total_income", Decimal("0"))
+
+        if self.monthly_policy_income:
+            stats["total_income"] += stats["total_income_monthly"]
+
+        return stats
+
+
+@register_aggregator("types")
+class TypeCountAggregator(Aggregator):
+    """
+    Entradas por etiqueta de tipo ("Tarifa", "Suscripción - DIARIO", ...)
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, row):
+        self.counts[row.type] += 1
+
+    def result(self):
+        return dict(self.counts)
+
+
+@register_aggregator("daily")
+class DailySeriesAggregator(Aggregator):
+    """
+    Serie por día de salida (día de entrada si sigue abierta):
+    [{"date", "count", "income"}] en orden de fecha
+    """
+
+    def __init__(self):
+        self.days = defaultdict(lambda: [0, Decimal("0")])
+
+    def add(self, row):
+        moment = row.departure_date_hour or row.entry_date_hour
+        day = self.days[localtime(moment).date()]
+        day[0] += 1
+        day[1] += row.final_amount
+
+    def result(self):
+        return [
+            {"date": day, "count": count, "income": income}
+            for day, (count, income) in sorted(self.days.items())
+        ]
+
+
+@register_aggregator("plates")
+class PlateTotalsAggregator(Aggregator):
+    """
+    Totales por placa: {"plate", "count", "minutes", "income"}
+    ordenados por ingreso (mayor primero)
+    """
+
+    def __init__(self):
+        self.plates = defaultdict(lambda: [0, 0, Decimal("0")])
+
+    def add(self, row):
+        plate = self.plates[row.plate]
+        plate[0] += 1
+        plate[1] += row.final_minutes
+        plate[2] += row.final_amount
+
+    def result(self):
+        totals = [
+            {"plate": plate, "count": count, "minutes": minutes, "income": income}
+            for plate, (count, minutes, income) in self.plates.items()
+        ]
+        totals.sort(key=lambda item: (-item["income"], item["plate"]))
+
+        return totals
+
+
+class ReportEngine:
+    """
+    Recorre las filas del reporte una sola vez y las entrega a los
+    agregadores registrados y a los consumidores de filas (`sinks`,
+    cualquier objeto con write(row)), por ejemplo el detalle guardado
+    para las plantillas (report_service.RowSpool), sin volver a
+    consultar la base.
+    """
+
+    def __init__(self, aggregators=("summary",), sinks=(), **options):
+        self.aggregators = [
+            self._aggregator(name, options.get(name, {}))
+            for name in aggregators
+        ]
+        self.sinks = list(sinks)
+
+    def _aggregator(self, name, options):
+        if name not in AGGREGATORS:
+            raise ValueError(f"Agregador no registrado: {name}")
+
+        return AGGREGATORS[name](**options)
+
+    def run(self, rows):
+        """
+        Consume `rows` (ver report_service.report_rows) y retorna
+        {nombre del agregador: resultado}
+        """
+        adders = [aggregator.add for aggregator in self.aggregators]
+        writers = [sink.write for sink in self.sinks]
+
+        for row in rows:
+            for add in adders:
+                add(row)
+
+            for write in writers:
+                write(row)
+
+        return {
+            aggregator.name: aggregator.result()
+            for aggregator in self.aggregators
+        }
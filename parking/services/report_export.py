@@ -0,0 +1,111 @@
+import csv
+import json
+from datetime import date
+
+from django.utils.timezone import localtime
+
+from parking.models import Entry
+from parking.services.report_service import report_rows
+
+
+STREAM_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+EXPORT_FIELDS = [
+    "plate",
+    "entry_date_hour",
+    "departure_date_hour",
+    "minutes",
+    "duration",
+    "type",
+    "fee",
+    "amount",
+]
+
+
+def export_queryset(report_type, params):
+    """
+    Entradas del reporte en orden de entrada
+    """
+    dates = {
+        key: date.fromisoformat(value)
+        for key, value in params.items()
+        if key != "plate"
+    }
+
+    match report_type:
+        case "day":
+            entries = Entry.objects.custom_report(dates["date"])
+        case "month":
+            entries = Entry.objects.custom_report(month_date=dates["month_date"])
+        case "period":
+            entries = Entry.objects.custom_report(dates["start_date"], dates["end_date"])
+        case "plate":
+            entries = Entry.objects.custom_report(
+                dates["start_date"],
+                dates["end_date"],
+                n_plate=params["plate"]
+            )
+        case _:
+            raise ValueError(f"Tipo de reporte no válido: {report_type}")
+
+    return entries.order_by("entry_date_hour", "pk")
+
+
+def export_rows(entries):
+    """
+    Una fila por entrada con tipo, duración y monto calculados
+    (ver report_service.report_rows)
+    """
+    for row in report_rows(entries):
+        yield {
+            "plate": row.plate,
+            "entry_date_hour": localtime(row.entry_date_hour).isoformat(),
+            "departure_date_hour": (
+                localtime(row.departure_date_hour).isoformat()
+                if row.departure_date_hour else None
+            ),
+            "minutes": row.final_minutes,
+            "duration": row.duration,
+            "type": row.type,
+            "fee": row.fee.name if row.fee else None,
+            "amount": f"{row.final_amount:.2f}",
+        }
+
+
+class _Echo:
+    """ Archivo falso: csv.writer retorna la línea en lugar de guardarla """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+
+    yield writer.writerow(dict(zip(EXPORT_FIELDS, EXPORT_FIELDS)))
+
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def stream_report(report_type, output_format, params):
+    """
+    Líneas del reporte en CSV o JSONL, listas para StreamingHttpResponse
+    """
+    rows = export_rows(export_queryset(report_type, params))
+
+    match output_format:
+        case "csv":
+            return stream_csv(rows)
+        case "jsonl":
+            return stream_jsonl(rows)
+
+    raise ValueError(f"Formato no soportado: {output_format}")
@@ -0,0 +1,205 @@
+import logging
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.timezone import now
+
+from parking.models import ReportJob
+from parking.services.report_cache import (
+    cached_artifact, report_cache_key, store_artifact
+)
+from parking.services.report_service import (
+    generate_day_report, generate_month_report,
+    generate_period_report,
+    generate_plate_report
+)
+from parking.services.report_pdf import render_report_pdf
+from parking.utils import write_report_excel, report_excel_filename
+
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+PDF_TEMPLATES = {
+    "day": "parking/reports/parking_day_report_pdf.html",
+    "month": "parking/reports/parking_month_report_pdf.html",
+    "period": "parking/reports/parking_period_report_pdf.html",
+    "plate": "parking/reports/parking_plate_report_pdf.html",
+}
+
+# Trabajos en proceso por más tiempo se consideran abandonados
+STALE_JOB_AFTER = timedelta(minutes=30)
+
+
+def report_params(report_type, cleaned_data):
+    """
+    Parámetros serializables del reporte a partir del formulario válido
+    """
+    match report_type:
+        case "day":
+            return {"date": cleaned_data["date"].isoformat()}
+        case "month":
+            return {"month_date": cleaned_data["month_date"].isoformat()}
+        case "period":
+            return {
+                "start_date": cleaned_data["period_start_date"].isoformat(),
+                "end_date": cleaned_data["period_end_date"].isoformat(),
+            }
+        case "plate":
+            return {
+                "plate": cleaned_data["plate"].strip().upper(),
+                "start_date": cleaned_data["start_date"].isoformat(),
+                "end_date": cleaned_data["end_date"].isoformat(),
+            }
+
+    raise ValueError(f"Tipo de reporte no válido: {report_type}")
+
+
+def build_report_context(report_type, params):
+    """
+    Contexto del reporte (ver report_service)
+    """
+    dates = {
+        key: date.fromisoformat(value)
+        for key, value in params.items()
+        if key != "plate"
+    }
+
+    match report_type:
+        case "day":
+            return generate_day_report(dates["date"])
+        case "month":
+            return generate_month_report(dates["month_date"])
+        case "period":
+            return generate_period_report(dates["start_date"], dates["end_date"])
+        case "plate":
+            return generate_plate_report(
+                params["plate"],
+                dates["start_date"],
+                dates["end_date"]
+            )
+
+    raise ValueError(f"Tipo de reporte no válido: {report_type}")
+
+
+def report_filename(report_type, output_format, params):
+    if output_format == "xlsx":
+        start = params.get("date") or params.get("month_date") or params["start_date"]
+        end = params.get("end_date")
+
+        return report_excel_filename(
+            "monthly" if report_type == "month" else report_type,
+            date.fromisoformat(start),
+            date.fromisoformat(end) if end else None,
+            params.get("plate"),
+        )
+
+    match report_type:
+        case "day":
+            return f"reporte-dia-{params['date']}.{output_format}"
+        case "month":
+            return f"reporte-mes-{params['month_date']}.{output_format}"
+        case "period":
+            return f"reporte-periodo-{params['start_date']}-{params['end_date']}.{output_format}"
+        case "plate":
+            return f"reporte-placa-{params['plate']}.{output_format}"
+
+
+def write_report(report_type, output_format, params, target, base_url="", progress=None):
+    """
+    Genera el reporte y lo escribe en `target` (ruta o archivo).
+    No depende de un request: lo usan el worker y los comandos.
+    """
+    progress = progress or (lambda value: None)
+
+    context = build_report_context(report_type, params)
+    progress(40)
+
+    if output_format == "pdf":
+        render_report_pdf(PDF_TEMPLATES[report_type], context, base_url, target)
+    elif output_format == "xlsx":
+        write_report_excel(context, target)
+    else:
+        raise ValueError(f"Formato no soportado: {output_format}")
+
+    progress(90)
+
+
+def run_job(job):
+    """
+    Ejecuta un trabajo ya reclamado y deja el archivo en REPORT_ARTIFACT_ROOT
+    """
+    root = Path(settings.REPORT_ARTIFACT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+
+    filename = report_filename(job.report_type, job.output_format, job.params)
+    artifact = f"job-{job.pk}.{job.output_format}"
+
+    job.set_progress(10)
+
+    # La llave se calcula antes de leer los datos: si cambian durante
+    # la generación, el archivo queda con una llave que ya no se consulta
+    cache_key = report_cache_key(job.report_type, job.output_format, job.params)
+    cached = cache_key and cached_artifact(cache_key, job.output_format)
+
+    # Se escribe en un temporal y se renombra: la descarga nunca ve
+    # un archivo a medias
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".part")
+    os.close(fd)
+
+    try:
+        if cached:
+            try:
+                shutil.copyfile(cached, tmp_path)
+            except FileNotFoundError:
+                # Se eliminó de la caché en este momento
+                cached = None
+
+        if not cached:
+            write_report(
+                job.report_type,
+                job.output_format,
+                job.params,
+                tmp_path,
+                base_url=job.base_url,
+                progress=job.set_progress,
+            )
+        os.replace(tmp_path, root / artifact)
+    except Exception as e:
+        logger.exception("Falló el trabajo de reporte %s", job.pk)
+        Path(tmp_path).unlink(missing_ok=True)
+        job.mark_failed(str(e) or e.__class__.__name__)
+        return job
+
+    if cache_key and not cached:
+        store_artifact(cache_key, job.output_format, root / artifact)
+
+    job.mark_done(artifact, filename)
+
+    return job
+
+
+def purge_finished_jobs(older_than):
+    """
+    Elimina los trabajos terminados antes de `older_than` y sus archivos
+    """
+    jobs = ReportJob.objects.finished().filter(finished_at__lt=older_than)
+
+    for job in jobs.exclude(artifact=""):
+        job.artifact_path.unlink(missing_ok=True)
+
+    deleted, _ = jobs.delete()
+
+    return deleted
+
+
+def requeue_stale_jobs():
+    return ReportJob.objects.requeue_stale(now() - STALE_JOB_AFTER)
@@ -0,0 +1,295 @@
+import mimetypes
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from itertools import chain, islice
+from pathlib import Path
+from urllib.parse import urlparse
+
+import weasyprint
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.template.loader import render_to_string
+from pypdf import PdfReader, PdfWriter
+from weasyprint.text.fonts import FontConfiguration
+from weasyprint.urls import URLFetcher, URLFetcherResponse
+
+from parking.utils import chunks
+
+
+# Filas de la tabla por parte (varias páginas A4 completas)
+PDF_CHUNK_ROWS = 400
+
+PAGE_NUMBERS_TEMPLATE = "parking/reports/page_numbers_pdf.html"
+
+# Hojas de estilo de los reportes (rutas de static)
+REPORT_STYLESHEETS = ["css/styles.css"]
+
+# Las partes se generan sin numeración: se agrega al final sobre el
+# documento unido para que cuente todas las páginas
+_NO_PAGE_NUMBERS = "@page { @bottom-right { content: none; } }"
+
+
+def static_path(path):
+    """
+    Archivo local de un recurso de static (None si no existe)
+    """
+    found = finders.find(path)
+
+    if found:
+        return Path(found)
+
+    collected = Path(settings.STATIC_ROOT) / path
+
+    return collected if collected.is_file() else None
+
+
+class StaticURLFetcher(URLFetcher):
+    """
+    Sirve las URL de static desde el disco en lugar de pedirlas por HTTP
+    al mismo servidor; las demás se descargan normalmente
+    """
+
+    def fetch(self, url, headers=None):
+        path = urlparse(url).path
+
+        if path.startswith(settings.STATIC_URL):
+            local = static_path(path.removeprefix(settings.STATIC_URL))
+
+            if local:
+                content_type, _ = mimetypes.guess_type(local.name)
+
+                return URLFetcherResponse(
+                    local.as_uri(),
+                    local.read_bytes(),
+                    headers={"Content-Type": content_type or "application/octet-stream"},
+                )
+
+        return super().fetch(url, headers)
+
+
+class PdfRenderer:
+    """
+    Renderizador de PDF de larga vida: la configuración de fuentes, las
+    hojas de estilo ya analizadas y el fetcher se crean una sola vez
+    por proceso y se reutilizan en cada reporte.
+    """
+
+    def __init__(self):
+        self.font_config = FontConfiguration()
+        self.url_fetcher = StaticURLFetcher()
+
+        self.stylesheets = [
+            self._stylesheet(filename=self._stylesheet_path(path))
+            for path in REPORT_STYLESHEETS
+        ]
+        self.no_page_numbers = self._stylesheet(string=_NO_PAGE_NUMBERS)
+
+    @staticmethod
+    def _stylesheet_path(path):
+        found = static_path(path)
+
+        if found is None:
+            raise ImproperlyConfigured(
+                f"No se encontró la hoja de estilos de reportes '{path}' "
+                "en static ni en STATIC_ROOT"
+            )
+
+        return found
+
+    def _stylesheet(self, **source):
+        return weasyprint.CSS(
+            **source,
+            font_config=self.font_config,
+            url_fetcher=self.url_fetcher,
+        )
+
+    def html(self, template_name, context):
+        """
+        HTML del reporte sin las etiquetas <link> de estilos: se aplican
+        las hojas ya analizadas
+        """
+        return render_to_string(template_name, {**context, "pdf_styles_loaded": True})
+
+    def write(self, html, base_url="", target=None, page_numbers=True):
+        stylesheets = list(self.stylesheets)
+
+        if not page_numbers:
+            stylesheets.append(self.no_page_numbers)
+
+        return weasyprint.HTML(
+            string=html,
+            base_url=base_url,
+            url_fetcher=self.url_fetcher,
+        ).write_pdf(
+            target,
+            stylesheets=stylesheets,
+            font_config=self.font_config,
+        )
+
+    def render(self, template_name, context, base_url="", target=None):
+        """
+        Renderiza la plantilla a PDF; retorna los bytes o, si se indica
+        `target` (ruta o archivo), escribe ahí el documento
+        """
+        return self.write(self.html(template_name, context), base_url, target)
+
+
+_renderer = None
+_renderer_pid = None
+
+
+def pdf_renderer():
+    """
+    Renderizador del proceso actual (los procesos hijos crean el suyo)
+    """
+    global _renderer, _renderer_pid
+
+    if _renderer is None or _renderer_pid != os.getpid():
+        _renderer = PdfRenderer()
+        _renderer_pid = os.getpid()
+
+    return _renderer
+
+
+_executor = None
+_executor_workers = None
+
+
+def _executor_for(workers):
+    """
+    Pool de procesos del proceso actual; se reutiliza entre reportes
+    """
+    global _executor, _executor_workers
+
+    if _executor is None or _executor_workers != workers:
+        _discard_executor()
+
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+
+    return _executor
+
+
+def _discard_executor():
+    """
+    Cierra el pool; el siguiente reporte crea uno nuevo
+    """
+    global _executor, _executor_workers
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+    _executor = None
+    _executor_workers = None
+
+
+def _render_parallel(html_parts, base_url, workers):
+    """
+    Maqueta las partes en el pool y entrega los PDF en orden. Hay a lo
+    sumo dos partes pendientes por proceso: los bytes de las partes ya
+    entregadas no se retienen.
+    """
+    executor = _executor_for(workers)
+    pending = deque()
+
+    try:
+        for html in html_parts:
+            pending.append(executor.submit(_render_chunk, html, base_url))
+
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    except BrokenProcessPool:
+        # Murió un proceso del pool (memoria, WeasyPrint): el pool ya no
+        # acepta trabajos, se reemplaza en el siguiente reporte
+        _discard_executor()
+        raise
+
+
+def _render_chunk(html, base_url):
+    """
+    Se ejecuta en el pool: solo recibe HTML, no toca la base
+    """
+    return pdf_renderer().write(html, base_url, page_numbers=False)
+
+
+def render_report_pdf(template_name, context, base_url, target, workers=None, chunk_rows=PDF_CHUNK_ROWS):
+    """
+    Escribe el reporte en PDF en `target`.
+
+    Divide la tabla en partes de `chunk_rows` filas, las renderiza (en
+    paralelo con varios `workers`) y las une en orden; el encabezado y
+    el resumen van en la primera parte y los totales y notas en la
+    última. Las filas se consumen por partes, pueden venir de un
+    generador.
+
+    Sin `workers` usa REPORT_PDF_WORKERS y solo usa el pool con los
+    reportes de al menos REPORT_PDF_PARALLEL_MIN_ROWS entradas.
+    """
+    entries = iter(context["entries"])
+
+    if workers is None:
+        workers = settings.REPORT_PDF_WORKERS
+        min_rows = settings.REPORT_PDF_PARALLEL_MIN_ROWS
+
+        head = list(islice(entries, min_rows))
+
+        if len(head) < min_rows:
+            workers = 1
+
+        entries = chain(head, entries)
+
+    renderer = pdf_renderer()
+
+    # La tabla siempre se procesa por partes: la plantilla nunca recibe
+    # todas las filas, sea cual sea el número de procesos
+    parts = chunks(entries, chunk_rows)
+    first = next(parts, ([], True))
+
+    # Una sola parte: un documento con su numeración normal
+    if first[1]:
+        return renderer.render(template_name, {**context, "entries": first[0]}, base_url, target)
+
+    # Las plantillas se renderizan aquí: los procesos del pool solo maquetan
+    html_parts = (
+        renderer.html(template_name, {
+            **context,
+            "entries": chunk,
+            "pdf_chunk": {"first": index == 0, "last": is_last},
+        })
+        for index, (chunk, is_last) in enumerate(chain([first], parts))
+    )
+
+    if workers < 2:
+        pdfs = (renderer.write(html, base_url, page_numbers=False) for html in html_parts)
+    else:
+        pdfs = _render_parallel(html_parts, base_url, workers)
+
+    writer = PdfWriter()
+
+    for pdf in pdfs:
+        writer.append(PdfReader(BytesIO(pdf)))
+
+    _stamp_page_numbers(writer, base_url)
+
+    writer.write(target)
+
+
+def _stamp_page_numbers(writer, base_url):
+    """
+    Pone "página / total" con el mismo estilo de @page sobre cada página
+    """
+    numbers = pdf_renderer().render(
+        PAGE_NUMBERS_TEMPLATE,
+        {"pages": range(len(writer.pages))},
+        base_url
+    )
+
+    for page, number in zip(writer.pages, PdfReader(BytesIO(numbers)).pages):
+        page.merge_page(number)
@@ -1,35 +1,16 @@
-from collections import defaultdict
+import pickle
+from math import ceil
+from tempfile import SpooledTemporaryFile
+
 from django.utils.timezone import localtime, now
 
-from parking.models import Entry, PlatePolicy
+from parking.models import Entry
+from parking.services.fee_catalog import fee_catalog
+from parking.services.policy_resolver import policy_resolver
+from parking.services.report_engine import ReportEngine
 from parking.utils import minutes_to_hours_and_minutes
 
 
-def _get_policy_map(entries):
-
-    plates = entries.values_list(
-        "plate",
-        flat=True
-    ).distinct()
-
-    policies = (
-        PlatePolicy.objects
-        .filter(
-            plate__in=plates,
-            active=True
-        )
-        .only(
-            "plate",
-            "billing_type",
-            "amount"
-        )
-    )
-
-    return {
-        policy.plate: policy
-        for policy in policies
-    }
-
 def _build_summary(stats):
 
     return [
@@ -50,171 +31,216 @@ def _build_summary(stats):
         },
     ]
 
-def _prepare_entry(entry):
-
-    if not entry.final_minutes:
-        entry.final_minutes, _ = entry.calculate_amount(policy=entry.policy)
-        entry.final_amount = 0
-
-    hours, mins = minutes_to_hours_and_minutes(entry.final_minutes)
-
-    entry.duration = f"{hours:02}:{mins:02}"
-
-    return entry
-
-def generate_day_report(report_date):
-
-    entries = Entry.objects.custom_report(report_date)
-
-    policy_map = _get_policy_map(entries)
-
-    stats = defaultdict(int)
-
-    for entry in entries:
-
-        policy = policy_map.get(entry.plate)
-
-        entry.policy = policy
-        _prepare_entry(entry)
-
-        stats["total_income"] += entry.final_amount
-
-        if policy:
-
-            if policy.billing_type == "DAILY":
-
-                entry.type = "Suscripción - DIARIO"
+ENTRY_TYPES = {
+    None: "Tarifa",
+    "DAILY": "Suscripción - DIARIO",
+    "MONTHLY": "Suscripción - MENSUAL",
+}
+
+# Filas que trae cada viaje al cursor del servidor
+REPORT_CHUNK_SIZE = 2000
+
+# Bytes del detalle guardado que se mantienen en memoria antes de pasar
+# a un archivo temporal (ver RowSpool)
+SPOOL_MEMORY_LIMIT = 8 * 1024 * 1024
+
+ROW_FIELDS = (
+    "plate",
+    "entry_date_hour",
+    "departure_date_hour",
+    "fee_id",
+    "final_minutes",
+    "final_amount",
+    "policy_billing_type",
+    "policy_amount",
+)
+
+
+class ReportRow:
+    """
+    Fila del reporte: solo los valores que usan las plantillas y las
+    exportaciones, sin instancia del modelo
+    """
+
+    __slots__ = (
+        "plate",
+        "entry_date_hour",
+        "departure_date_hour",
+        "fee",
+        "final_minutes",
+        "final_amount",
+        "duration",
+        "type",
+        "billing_type",
+        "policy_amount",
+    )
 
-                stats["daily_count"] += 1
-                stats["total_income_daily"] += entry.final_amount
+    def __init__(self, values, current_time, fees, type_label=None):
+        (
+            self.plate,
+            self.entry_date_hour,
+            self.departure_date_hour,
+            fee_id,
+            final_minutes,
+            final_amount,
+            self.billing_type,
+            self.policy_amount,
+        ) = values
+
+        if final_minutes:
+            self.final_minutes = final_minutes
+            self.final_amount = final_amount
+        else:
+            # Abierta: los minutos no dependen de la política y aún no paga
+            end_time = self.departure_date_hour or current_time
+            self.final_minutes = ceil(
+                (end_time - self.entry_date_hour).total_seconds() / 60
+            )
+            self.final_amount = 0
+
+        hours, mins = minutes_to_hours_and_minutes(self.final_minutes)
+
+        self.duration = f"{hours}:{mins}"
+        self.fee = fees.get(fee_id)
+        self.type = type_label or ENTRY_TYPES.get(self.billing_type, "")
+
+    def state(self):
+        """
+        Valores de la fila para guardarla; la tarifa va por id
+        """
+        return tuple(
+            getattr(self, name) if name != "fee"
+            else self.fee.pk if self.fee else None
+            for name in self.__slots__
+        )
 
-            elif policy.billing_type == "MONTHLY":
+    @classmethod
+    def from_state(cls, state, fees):
+        row = cls.__new__(cls)
 
-                entry.type = "Suscripción - MENSUAL"
+        for name, value in zip(cls.__slots__, state):
+            setattr(row, name, value)
 
-                stats["monthly_count"] += 1
+        row.fee = fees.get(row.fee)
 
-        else:
+        return row
 
-            entry.type = "Tarifa"
 
-            stats["normal_count"] += 1
-            stats["total_income_normal"] += entry.final_amount
+class RowSpool:
+    """
+    Consumidor de filas del motor que las guarda por bloques (en memoria
+    y, si crecen, en un archivo temporal) para recorrerlas de nuevo sin
+    volver a consultar la base: los reportes muestran los totales antes
+    del detalle, así que el detalle se lee después del recorrido
+    """
 
-    return {
-        "is_day_report": True,
-        "date": report_date.strftime('%d/%m/%Y'),
-        "entries": entries,
-        "today": localtime(now()),
-        "total_income": stats["total_income"],
-        "summary": _build_summary(stats),
-    }
+    def __init__(self):
+        self._file = SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+        self._batch = []
 
-def generate_month_report(date):
-    
-    entries = Entry.objects.custom_report(month_date=date)
+    def write(self, row):
+        self._batch.append(row.state())
 
-    policy_map = _get_policy_map(entries)
+        if len(self._batch) >= REPORT_CHUNK_SIZE:
+            self._flush()
 
-    stats = defaultdict(int)
+    def _flush(self):
+        if self._batch:
+            pickle.dump(self._batch, self._file, pickle.HIGHEST_PROTOCOL)
+            self._batch = []
 
-    for entry in entries:
+    def __iter__(self):
+        self._flush()
+        self._file.seek(0)
 
-        policy = policy_map.get(entry.plate)
+        fees = {fee.pk: fee for fee in fee_catalog.all()}
 
-        entry.policy = policy
-        _prepare_entry(entry)
-
-        stats["total_income"] += entry.final_amount
+        while True:
+            try:
+                batch = pickle.load(self._file)
+            except EOFError:
+                return
 
-        if policy:
+            for state in batch:
+                yield ReportRow.from_state(state, fees)
 
-            if policy.billing_type == "DAILY":
 
-                entry.type = "Suscripción - DIARIO"
+def report_rows(entries, type_label=None):
+    """
+    Genera las filas del reporte por bloques desde un cursor del
+    servidor: la memoria no crece con la cantidad de entradas
+    """
+    if "policy_billing_type" not in entries.query.annotations:
+        entries = entries.with_policy()
 
-                stats["daily_count"] += 1
-                stats["total_income_daily"] += entry.final_amount
+    current_time = now()
 
-            elif policy.billing_type == "MONTHLY":
+    # Una sola consulta al catálogo por reporte, no una por fila
+    fees = {fee.pk: fee for fee in fee_catalog.all()}
 
-                entry.type = "Suscripción - MENSUAL"
+    for values in entries.values_list(*ROW_FIELDS).iterator(chunk_size=REPORT_CHUNK_SIZE):
+        yield ReportRow(values, current_time, fees, type_label)
 
-                stats["monthly_count"] += 1
-                stats["total_income_monthly"] += policy.amount
-                stats["total_income"] += policy.amount
+def _scan_report(entries, monthly_policy_income=False, type_label=None):
+    """
+    Un solo recorrido de las entradas: el resumen sale del motor y las
+    filas quedan guardadas para el detalle (ver RowSpool)
+    """
+    spool = RowSpool()
 
-        else:
+    results = ReportEngine(
+        ["summary"],
+        sinks=[spool],
+        summary={"monthly_policy_income": monthly_policy_income},
+    ).run(report_rows(entries, type_label))
 
-            entry.type = "Tarifa"
-
-            stats["normal_count"] += 1
-            stats["total_income_normal"] += entry.final_amount
+    return results["summary"], spool
 
+def _build_report(entries, monthly_policy_income=False, **header):
+    """
+    Contexto común de los reportes por fecha: totales y detalle de un
+    solo recorrido
+    """
+    stats, rows = _scan_report(entries, monthly_policy_income)
 
     return {
-        "date": date.strftime('%m/%Y'),
-        "entries": entries,
+        **header,
+        "entries": rows,
         "today": localtime(now()),
         "total_income": stats["total_income"],
         "summary": _build_summary(stats),
     }
 
-def generate_period_report(start_date, end_date):
-    
-    entries = Entry.objects.custom_report(start_date, end_date)
-
-    policy_map = _get_policy_map(entries)
-
-    stats = defaultdict(int)
-
-    for entry in entries:
-
-        policy = policy_map.get(entry.plate)
-
-        _prepare_entry(entry)
-
-        stats["total_income"] += entry.final_amount
-
-        if policy:
-
-            if policy.billing_type == "DAILY":
-
-                entry.type = "Suscripción - DIARIO"
-
-                stats["daily_count"] += 1
-                stats["total_income_daily"] += entry.final_amount
-
-            elif policy.billing_type == "MONTHLY":
-
-                entry.type = "Suscripción - MENSUAL"
+def generate_day_report(report_date):
 
-                stats["monthly_count"] += 1
-                stats["total_income_monthly"] += entry.final_amount
+    return _build_report(
+        Entry.objects.custom_report(report_date).with_policy(),
+        is_day_report=True,
+        date=report_date.strftime('%d/%m/%Y'),
+    )
 
-        else:
+def generate_month_report(date):
 
-            entry.type = "Tarifa"
+    # El mes suma el valor de cada suscripción mensual con entradas
+    return _build_report(
+        Entry.objects.custom_report(month_date=date).with_policy(),
+        monthly_policy_income=True,
+        date=date.strftime('%m/%Y'),
+    )
 
-            stats["normal_count"] += 1
-            stats["total_income_normal"] += entry.final_amount
+def generate_period_report(start_date, end_date):
 
-    return {
-        "start_date": start_date.strftime('%d/%m/%Y'),
-        "end_date": end_date.strftime('%d/%m/%Y'),
-        "entries": entries,
-        "today": localtime(now()),
-        "total_income": stats["total_income"],
-        "summary": _build_summary(stats),
-    }
+    return _build_report(
+        Entry.objects.custom_report(start_date, end_date).with_policy(),
+        start_date=start_date.strftime('%d/%m/%Y'),
+        end_date=end_date.strftime('%d/%m/%Y'),
+    )
 
 def generate_plate_report(n_plate, start_date, end_date):
 
-    total_income = 0
-
     entries = Entry.objects.custom_report(start_date, end_date, n_plate=n_plate)
 
-    policy = PlatePolicy.objects.filter(plate=n_plate, active=True).first()
+    policy = policy_resolver.resolve(n_plate)
 
     if policy:
         match policy.billing_type:
@@ -227,16 +253,9 @@ def generate_plate_report(n_plate, start_date, end_date):
     else:
         billing_type = "Sin suscripción"
 
-    for entry in entries:
+    type_label = billing_type if policy else "Tarifa"
 
-        _prepare_entry(entry)
-
-        if policy:
-            entry.type = billing_type
-        else:
-            entry.type = "Tarifa"
-
-        total_income += entry.final_amount
+    stats, rows = _scan_report(entries, type_label=type_label)
 
     summary = [
         {
@@ -245,7 +264,7 @@ def generate_plate_report(n_plate, start_date, end_date):
         },
         {
             "title": "Total de entradas",
-            "text": len(entries),
+            "text": stats["entry_count"],
         },
     ]
 
@@ -253,9 +272,10 @@ def generate_plate_report(n_plate, start_date, end_date):
         "plate": n_plate,
         "start_date": start_date.strftime('%d/%m/%Y'),
         "end_date": end_date.strftime('%d/%m/%Y'),
-        "entries": entries,
+        "entries": rows,
         "today": localtime(now()),
-        "total_income": total_income,
+        "total_income": stats["total_income"],
         "summary": summary,
         "policy": policy,
+        "type_label": type_label,
     }
\ No newline at end of file
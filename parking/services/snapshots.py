@@ -0,0 +1,104 @@
+from functools import partial
+from threading import Lock
+from time import monotonic
+
+from django.db import transaction
+
+
+# Tiempo máximo que un proceso confía en su snapshot sin volver a cargarlo
+SNAPSHOT_MAX_AGE = 300
+
+# Segundos durante los que no se vuelve a leer la versión compartida:
+# evita una consulta en cada uso del snapshot
+SNAPSHOT_CHECK_INTERVAL = 1
+
+
+def current_version(key):
+    from parking.models import ReportDataVersion
+
+    return (
+        ReportDataVersion.objects
+        .filter(key=key)
+        .values_list("version", flat=True)
+        .first()
+    ) or 0
+
+
+def bump_version(key, using=None):
+    """
+    Incrementa la versión compartida para que todos los procesos
+    recarguen su snapshot en la próxima consulta; retorna la nueva.
+
+    La versión vive en la base (ReportDataVersion), no en la caché
+    local: el incremento es atómico y lo ven todos los contenedores.
+    """
+    from parking.models import ReportDataVersion
+
+    return ReportDataVersion.objects.db_manager(using).bump([key])[key]
+
+
+class VersionedSnapshot:
+    """
+    Datos cargados en memoria una vez por proceso.
+
+    Se recargan cuando la versión guardada en la base cambia (ver
+    invalidate) o cuando el snapshot es muy antiguo. La
+    versión se consulta a lo sumo una vez por SNAPSHOT_CHECK_INTERVAL;
+    invalidate() recarga de inmediato en el proceso que escribe.
+    Las subclases definen `version_key` e implementan `_load()`.
+    """
+
+    version_key = None
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._loaded_at = 0
+        self._checked_at = 0
+
+    def _is_fresh(self, version):
+        return (
+            version == self._version
+            and monotonic() - self._loaded_at < SNAPSHOT_MAX_AGE
+        )
+
+    def _ensure_loaded(self):
+        checked_at = monotonic()
+
+        if (
+            self._version is not None
+            and checked_at - self._checked_at < SNAPSHOT_CHECK_INTERVAL
+            and checked_at - self._loaded_at < SNAPSHOT_MAX_AGE
+        ):
+            return
+
+        version = current_version(self.version_key)
+
+        if self._is_fresh(version):
+            self._checked_at = checked_at
+            return
+
+        with self._lock:
+            if self._is_fresh(version):
+                return
+
+            self._load()
+            self._version = version
+            self._loaded_at = self._checked_at = monotonic()
+
+    def _load(self):
+        raise NotImplementedError
+
+    def invalidate(self, using=None):
+        """
+        Recarga el snapshot en este proceso y, al confirmar la
+        transacción, en los demás (nueva versión)
+        """
+        self._version = None
+        transaction.on_commit(partial(self._bump, using), using=using)
+
+    def _bump(self, using=None):
+        bump_version(self.version_key, using)
+
+        # Lo que se cargó antes de confirmar no incluye el cambio
+        self._version = None
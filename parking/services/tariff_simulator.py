@@ -0,0 +1,207 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.db.models.functions import TruncDate
+
+from parking.models import Entry, period_bounds
+from parking.services.pricing import elapsed_minutes, price_table
+from parking.utils import chunks
+
+
+SIMULATION_CHUNK_SIZE = 50_000
+
+# Límites superiores (en minutos) de cada grupo de tiempo de estadía
+DWELL_BUCKET_EDGES = (30, 60, 120, 240, 480, 1440)
+
+DWELL_BUCKET_LABELS = (
+    "0 - 30 min",
+    "30 - 60 min",
+    "1 - 2 h",
+    "2 - 4 h",
+    "4 - 8 h",
+    "8 - 24 h",
+    "Más de 24 h",
+)
+
+
+def parse_range_table(text):
+    """
+    Convierte un texto con una línea "minuto: monto" por rango en una
+    lista ordenada de (minuto inicial, monto).
+
+    Ej:
+    0: 1.00
+    60: 1.50
+    """
+    ranges = {}
+
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+
+        if not line:
+            continue
+
+        for separator in (":", "=", ","):
+            if separator in line:
+                start_minute, amount = line.split(separator, 1)
+                break
+        else:
+            raise ValueError(
+                f"Línea {number}: usa el formato minuto: monto"
+            )
+
+        try:
+            start_minute = int(start_minute.strip())
+            amount = Decimal(amount.strip().lstrip("$"))
+        except (ValueError, InvalidOperation):
+            raise ValueError(
+                f"Línea {number}: minuto o monto inválido"
+            )
+
+        if start_minute < 0 or amount < 0:
+            raise ValueError(
+                f"Línea {number}: el minuto y el monto no pueden ser negativos"
+            )
+
+        if start_minute in ranges:
+            raise ValueError(
+                f"Línea {number}: el minuto {start_minute} está repetido"
+            )
+
+        ranges[start_minute] = amount
+
+    if not ranges:
+        raise ValueError("Debes indicar al menos un rango")
+
+    return sorted(ranges.items())
+
+
+def simulate_tariff(
+    fee_id,
+    start_date,
+    end_date,
+    proposed_ranges,
+    chunk_size=SIMULATION_CHUNK_SIZE,
+):
+    """
+    Recalcula las salidas históricas de una tarifa con una tabla de
+    rangos propuesta y las compara con el monto cobrado.
+
+    Solo lee las columnas necesarias en bloques y los precios se
+    calculan por lote; no se construyen instancias de Entry.
+    """
+    starts = np.asarray(
+        [start_minute for start_minute, _ in proposed_ranges],
+        dtype=np.int64,
+    )
+    values = np.asarray(
+        [float(amount) for _, amount in proposed_ranges],
+        dtype=np.float64,
+    )
+
+    rows = (
+        Entry.objects
+        .departure_between(*period_bounds(start_date, end_date))
+        .filter(fee_id=fee_id)
+        .annotate(day=TruncDate("departure_date_hour"))
+        .values_list(
+            "entry_date_hour",
+            "departure_date_hour",
+            "final_amount",
+            "day",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    bucket_count = len(DWELL_BUCKET_LABELS)
+
+    buckets = {
+        "count": np.zeros(bucket_count, dtype=np.int64),
+        "current": np.zeros(bucket_count, dtype=np.float64),
+        "proposed": np.zeros(bucket_count, dtype=np.float64),
+    }
+
+    days = {}
+
+    for chunk, _ in chunks(rows, chunk_size):
+        entry_dates, departure_dates, final_amounts, chunk_days = zip(*chunk)
+
+        minutes = elapsed_minutes(entry_dates, departure_dates)
+
+        current = np.fromiter(
+            (float(amount or 0) for amount in final_amounts),
+            dtype=np.float64,
+            count=len(chunk),
+        )
+        proposed = price_table(minutes, starts, values)
+
+        # Por grupo de tiempo de estadía
+        bucket = np.digitize(minutes, DWELL_BUCKET_EDGES, right=True)
+
+        buckets["count"] += np.bincount(bucket, minlength=bucket_count)
+        buckets["current"] += np.bincount(
+            bucket, weights=current, minlength=bucket_count
+        )
+        buckets["proposed"] += np.bincount(
+            bucket, weights=proposed, minlength=bucket_count
+        )
+
+        # Por día de salida
+        ordinals = np.fromiter(
+            (day.toordinal() for day in chunk_days),
+            dtype=np.int64,
+            count=len(chunk),
+        )
+        unique, inverse = np.unique(ordinals, return_inverse=True)
+
+        counts = np.bincount(inverse)
+        current_totals = np.bincount(inverse, weights=current)
+        proposed_totals = np.bincount(inverse, weights=proposed)
+
+        for i, ordinal in enumerate(unique.tolist()):
+            totals = days.setdefault(ordinal, [0, 0.0, 0.0])
+            totals[0] += int(counts[i])
+            totals[1] += current_totals[i]
+            totals[2] += proposed_totals[i]
+
+    by_day = [
+        _comparison_row(date.fromordinal(ordinal), *days[ordinal])
+        for ordinal in sorted(days)
+    ]
+
+    by_bucket = [
+        _comparison_row(
+            label,
+            int(buckets["count"][i]),
+            buckets["current"][i],
+            buckets["proposed"][i],
+        )
+        for i, label in enumerate(DWELL_BUCKET_LABELS)
+    ]
+
+    total = _comparison_row(
+        "Total",
+        int(buckets["count"].sum()),
+        buckets["current"].sum(),
+        buckets["proposed"].sum(),
+    )
+
+    return {
+        "total": total,
+        "by_day": by_day,
+        "by_bucket": by_bucket,
+    }
+
+
+def _comparison_row(label, count, current, proposed):
+    current = round(float(current), 2)
+    proposed = round(float(proposed), 2)
+
+    return {
+        "label": label,
+        "count": count,
+        "current": current,
+        "proposed": proposed,
+        "difference": round(proposed - current, 2),
+    }
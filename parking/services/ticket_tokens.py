@@ -0,0 +1,47 @@
+from base64 import urlsafe_b64encode
+
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+
+TOKEN_SALT = "parking.ticket"
+
+# 12 bytes de HMAC-SHA256 (16 caracteres): suficiente para un ticket
+SIGNATURE_BYTES = 12
+
+
+def _signature(value):
+    digest = salted_hmac(TOKEN_SALT, value, algorithm="sha256").digest()
+
+    return urlsafe_b64encode(digest[:SIGNATURE_BYTES]).decode().rstrip("=")
+
+
+def make_ticket_token(entry_id, entry_date_hour):
+    """
+    Token firmado del ticket: id de la entrada y hora de entrada en base 36
+    más la firma, p. ej. "2n9.t3b0k1.Xk2..."
+    """
+    value = f"{int_to_base36(entry_id)}.{int_to_base36(int(entry_date_hour.timestamp()))}"
+
+    return f"{value}.{_signature(value)}"
+
+
+def read_ticket_token(token):
+    """
+    Retorna (id de la entrada, marca de tiempo de entrada) si la firma es
+    válida, o None. No consulta la base.
+    """
+    try:
+        entry_id, issued_at, signature = token.split(".")
+    except (AttributeError, ValueError):
+        return None
+
+    value = f"{entry_id}.{issued_at}"
+
+    if not constant_time_compare(signature, _signature(value)):
+        return None
+
+    try:
+        return base36_to_int(entry_id), base36_to_int(issued_at)
+    except ValueError:
+        return None
@@ -0,0 +1,95 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.timezone import localdate
+
+from parking.models import (
+    Configuration, Entry, Fee, Range, PlatePolicy, ReportDataVersion,
+    POLICIES_DATA_KEY, closed_report_days, report_data_key, revenue_line
+)
+from parking.services.active_plates import active_plates
+from parking.services.fee_catalog import fee_catalog
+from parking.services.policy_resolver import policy_resolver
+from shell.models import DailyRevenue
+
+
+@receiver([post_save, post_delete], sender=Fee)
+@receiver([post_save, post_delete], sender=Range)
+def invalidate_fee_catalog(sender, **kwargs):
+    fee_catalog.invalidate()
+
+
+@receiver([post_save, post_delete], sender=PlatePolicy)
+def invalidate_policy_resolver(sender, **kwargs):
+    policy_resolver.invalidate()
+
+
+def _active_plate(values):
+    """
+    Placa normalizada si la entrada está activa, o None
+    """
+    if values["departure_date_hour"] is None:
+        return values["plate_normalized"]
+
+    return None
+
+
+# Antes de este receptor, Entry.save ya leyó los valores guardados
+# (_loaded_values) y todavía no los reemplaza por los nuevos
+@receiver(post_save, sender=Entry)
+def track_active_plate(sender, instance, created, update_fields, using, **kwargs):
+    if created:
+        before = None
+        after = _active_plate(instance.__dict__)
+    else:
+        before = _active_plate(instance._stored_values())
+        after = _active_plate(instance._written_values(update_fields))
+
+    active_plates.track(
+        instance.pk,
+        before,
+        after,
+        (instance.pk, instance.plate, instance.plate_display),
+        using,
+    )
+
+
+# Los valores guardados ya se leyeron en pre_delete (ver abajo)
+@receiver(post_delete, sender=Entry)
+def untrack_active_plate(sender, instance, using, **kwargs):
+    active_plates.track(
+        instance.pk,
+        _active_plate(instance._stored_values()),
+        None,
+        using=using,
+    )
+
+
+# Antes de borrar, para poder leer los valores guardados si están diferidos;
+# el borrado y el libro comparten la transacción
+@receiver(pre_delete, sender=Entry)
+def remove_entry_revenue(sender, instance, using, **kwargs):
+    DailyRevenue.objects.db_manager(using).move(
+        revenue_line(instance._stored_values()),
+        None
+    )
+
+
+@receiver(pre_delete, sender=Entry)
+def release_occupied_space(sender, instance, using, **kwargs):
+    if instance._stored_values()["departure_date_hour"] is None:
+        Configuration.objects.db_manager(using).move_occupancy(-1)
+
+
+@receiver(pre_delete, sender=Entry)
+def expire_entry_reports(sender, instance, using, **kwargs):
+    stale_days = closed_report_days(instance._stored_values(), localdate())
+
+    ReportDataVersion.objects.db_manager(using).bump(
+        report_data_key(day) for day in stale_days
+    )
+
+
+@receiver(post_delete, sender=PlatePolicy)
+def refresh_monthly_subscriptions(sender, using, **kwargs):
+    DailyRevenue.objects.db_manager(using).refresh_monthly_subscriptions()
+    ReportDataVersion.objects.db_manager(using).bump([POLICIES_DATA_KEY])
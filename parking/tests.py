@@ -1,3 +1,730 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import localdate, make_aware, now
+
+from parking.management.commands.check_entry_indexes import (
+    DEFAULT_SEED, MONTH_QUERIES, hot_queries, seed_entries, seq_scans
+)
+from parking.models import (
+    ACTIVE_PLATE_CONSTRAINT, ActiveEntryExists, Configuration, Entry, Fee,
+    PlatePolicy, Range, ReportDataVersion, ReportJob, report_data_key
+)
+from parking.services.entry_partitions import (
+    DEFAULT_PARTITION, ensure_partitions, month_start, partition_name
+)
+from parking.services.fee_catalog import fee_catalog
+from parking.services.policy_import import import_policies, read_policy_rows
+from parking.services.pricing import price_entries
+from parking.services.report_cache import (
+    cached_artifact, report_cache_key, store_artifact
+)
+from parking.services.report_jobs import STALE_JOB_AFTER, requeue_stale_jobs
+from parking.services.ticket_tokens import make_ticket_token, read_ticket_token
+from parking.utils import chunks, format_plate
+from shell.models import DailyRevenue
+
+
+class EntryIndexTests(TestCase):
+    """
+    EXPLAIN de las consultas frecuentes de Entry sobre una tabla con
+    suficientes filas para que el planificador elija por costo
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_entries(DEFAULT_SEED)
+
+    def _seq_scans(self, queryset, month=None):
+        plan = queryset.explain()
+
+        with connection.cursor() as cursor:
+            return seq_scans(cursor, plan, month), plan
+
+    def test_hot_queries_use_indexes(self):
+        today = localdate()
+
+        for name, queryset in hot_queries(today).items():
+            with self.subTest(name):
+                month = month_start(today) if name in MONTH_QUERIES else None
+                scanned, plan = self._seq_scans(queryset, month)
+
+                self.assertEqual(scanned, [], plan)
+
+    def test_scan_without_date_filter_fails(self):
+        scanned, plan = self._seq_scans(
+            Entry.objects.filter(final_amount__gt=1),
+            month_start(localdate()),
+        )
+
+        self.assertNotEqual(scanned, [], plan)
+
+
+class PricingTests(TestCase):
+    """
+    Precios por lote (price_entries) contra Entry.calculate_amount
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fee = Fee.objects.create(name="Normal")
+        cls.empty_fee = Fee.objects.create(name="Sin rangos")
+
+        for start_minute, amount in ((0, "10.00"), (60, "20.00"), (120, "35.00")):
+            Range.objects.create(fee=cls.fee, start_minute=start_minute, amount=Decimal(amount))
+
+    def test_catalog_price_uses_range_with_greatest_start(self):
+        for minutes, amount in ((0, 10), (59, 10), (60, 20), (119, 20), (120, 35), (5000, 35)):
+            with self.subTest(minutes=minutes):
+                self.assertEqual(fee_catalog.price(self.fee.pk, minutes), Decimal(amount))
+
+        self.assertEqual(fee_catalog.price(self.empty_fee.pk, 30), Decimal("0"))
+        self.assertEqual(fee_catalog.first_amount(self.fee.pk), Decimal("10.00"))
+
+    def test_batch_matches_calculate_amount(self):
+        entry_date = make_aware(datetime(2026, 3, 10, 8))
+        daily = PlatePolicy(plate="DIARIO1", billing_type="DAILY", amount=Decimal("15.00"))
+        monthly = PlatePolicy(plate="MENSUAL1", billing_type="MONTHLY", amount=Decimal("300.00"))
+
+        cases = [
+            # (segundos, tarifa, política)
+            (1, self.fee.pk, None),
+            (60 * 59 + 30, self.fee.pk, None),
+            (60 * 60, self.fee.pk, None),
+            (60 * 60 + 1, self.fee.pk, None),
+            (60 * 300, self.fee.pk, None),
+            (60 * 30, self.empty_fee.pk, None),
+            (60 * 30, None, None),
+            (60 * 90, self.fee.pk, daily),
+            (60 * 90, self.fee.pk, monthly),
+        ]
+
+        entries = [
+            Entry(
+                plate="P1",
+                entry_date_hour=entry_date,
+                departure_date_hour=entry_date + timedelta(seconds=seconds),
+                fee_id=fee_id,
+            )
+            for seconds, fee_id, _ in cases
+        ]
+        policies = [policy for _, _, policy in cases]
+
+        minutes, amounts = price_entries(
+            [entry.entry_date_hour for entry in entries],
+            [entry.departure_date_hour for entry in entries],
+            [entry.fee_id for entry in entries],
+            [policy.billing_type if policy else None for policy in policies],
+            [policy.amount if policy else None for policy in policies],
+        )
+
+        for index, (entry, policy) in enumerate(zip(entries, policies)):
+            with self.subTest(case=cases[index]):
+                self.assertEqual(
+                    (int(minutes[index]), float(amounts[index])),
+                    entry.calculate_amount(policy=policy),
+                )
+
+    def test_active_entries_are_priced_at_given_time(self):
+        entry_date = make_aware(datetime(2026, 3, 10, 8))
+
+        minutes, amounts = price_entries(
+            [entry_date],
+            [None],
+            [self.fee.pk],
+            at=entry_date + timedelta(minutes=61),
+        )
+
+        self.assertEqual(minutes.tolist(), [61])
+        self.assertEqual(amounts.tolist(), [20.0])
+
+
+class TicketTokenTests(TestCase):
+    """
+    Tokens firmados del QR del ticket y salida desde el escaneo
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("caja", password="caja")
+        cls.user.user_permissions.add(
+            Permission.objects.get(codename="add_entry", content_type__app_label="parking")
+        )
+        cls.entry = Entry.objects.create(
+            plate="TKT123",
+            entry_date_hour=make_aware(datetime(2026, 3, 10, 8, 15, 30)),
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _scan_url(self, token):
+        return reverse("scan_ticket", args=[token])
+
+    def test_token_round_trip(self):
+        token = make_ticket_token(self.entry.pk, self.entry.entry_date_hour)
+
+        self.assertEqual(
+            read_ticket_token(token),
+            (self.entry.pk, int(self.entry.entry_date_hour.timestamp())),
+        )
+
+    def test_tampered_or_malformed_tokens_are_rejected(self):
+        token = make_ticket_token(self.entry.pk, self.entry.entry_date_hour)
+        entry_id, issued_at, signature = token.split(".")
+        other = make_ticket_token(self.entry.pk + 1, self.entry.entry_date_hour)
+
+        for value in (
+            f"{entry_id}.{issued_at}.{signature[:-1]}x",
+            f"{other.split('.')[0]}.{issued_at}.{signature}",
+            f"{entry_id}.{issued_at}",
+            "",
+            None,
+        ):
+            with self.subTest(value=value):
+                self.assertIsNone(read_ticket_token(value))
+
+    def test_scan_opens_departure(self):
+        token = make_ticket_token(self.entry.pk, self.entry.entry_date_hour)
+
+        response = self.client.get(self._scan_url(token))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["entry"], self.entry)
+
+    def test_scan_rejects_other_entry_time(self):
+        token = make_ticket_token(
+            self.entry.pk,
+            self.entry.entry_date_hour + timedelta(seconds=1),
+        )
+
+        response = self.client.get(self._scan_url(token))
+
+        self.assertRedirects(response, reverse("search_plate"), fetch_redirect_response=False)
+
+    def test_ticket_cannot_be_used_after_departure(self):
+        token = make_ticket_token(self.entry.pk, self.entry.entry_date_hour)
+
+        self.client.post(self._scan_url(token))
+        self.entry.refresh_from_db()
+        self.assertFalse(self.entry.state)
+
+        response = self.client.get(self._scan_url(token))
+
+        self.assertRedirects(response, reverse("search_plate"), fetch_redirect_response=False)
+
+    def test_legacy_ticket_for_active_entry(self):
+        url = reverse("scan_legacy_ticket", args=[self.entry.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.context["entry"], self.entry)
+
+        with override_settings(TICKET_ACCEPT_LEGACY_QR=False):
+            response = self.client.get(url)
+            self.assertRedirects(response, reverse("search_plate"), fetch_redirect_response=False)
+
+        self.client.post(url)
+
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse("search_plate"), fetch_redirect_response=False)
+
+
+class PolicyImportTests(TestCase):
+    """
+    Importación de políticas de placa desde CSV
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        PlatePolicy.objects.create(
+            plate="ABC123",
+            owner_name="Antes",
+            billing_type="DAILY",
+            amount=Decimal("10.00"),
+        )
+
+    def _rows(self, text):
+        return read_policy_rows(BytesIO(text.encode()), "placas.csv")
+
+    def test_header_aliases(self):
+        rows = list(self._rows(
+            "Placa,Propietario,Tipo de cobro,Monto,Activo\n"
+            "abc-123,Ana,Mensual,300,si\n"
+            ",,,,\n"
+        ))
+
+        self.assertEqual(rows, [(2, {
+            "plate": "abc-123",
+            "owner_name": "Ana",
+            "billing_type": "Mensual",
+            "amount": "300",
+            "active": "si",
+        })])
+
+    def test_invalid_files(self):
+        for filename, text in (
+            ("placas.txt", "placa,tipo de cobro\n"),
+            ("placas.csv", ""),
+            ("placas.csv", "placa,monto\n"),
+        ):
+            with self.subTest(filename=filename, text=text):
+                with self.assertRaises(ValueError):
+                    list(read_policy_rows(BytesIO(text.encode()), filename))
+
+    def test_upsert_by_plate(self):
+        result = import_policies(self._rows(
+            "placa,propietario,tipo de cobro,monto,activo\n"
+            "abc 123,Ana,Mensual,\"1,200.50\",\n"
+            "XYZ789,Luis,DAILY,15,no\n"
+        ))
+
+        self.assertEqual((result.created, result.updated, result.errors), (["XYZ789"], ["ABC123"], []))
+
+        updated = PlatePolicy.objects.get(plate="ABC123")
+        self.assertEqual(
+            (updated.owner_name, updated.billing_type, updated.amount, updated.active),
+            ("Ana", "MONTHLY", Decimal("1200.50"), True),
+        )
+        self.assertEqual(updated.plate_normalized, "ABC123")
+
+        created = PlatePolicy.objects.get(plate="XYZ789")
+        self.assertEqual((created.billing_type, created.active), ("DAILY", False))
+
+    def test_errors_are_reported_per_row(self):
+        result = import_policies(self._rows(
+            "placa,tipo de cobro,monto\n"
+            "---,Mensual,\n"
+            "ABCDEFGHIJK,Mensual,\n"
+            "NEW1,Semanal,\n"
+            "NEW2,Diario fijo,\n"
+            "NEW3,Mensual,abc\n"
+            "NEW4,Mensual,-1\n"
+            "NEW5,Mensual,\n"
+            "new5,Mensual,\n"
+        ))
+
+        self.assertEqual(result.created, ["NEW5"])
+        self.assertEqual(
+            [(number, plate) for number, plate, _ in result.errors],
+            [(2, "---"), (3, "ABCDEFGHIJK"), (4, "NEW1"), (5, "NEW2"),
+             (6, "NEW3"), (7, "NEW4"), (9, "NEW5")],
+        )
+        self.assertEqual(
+            sorted(PlatePolicy.objects.values_list("plate", flat=True)),
+            ["ABC123", "NEW5"],
+        )
+
+    def test_dry_run_does_not_save(self):
+        result = import_policies(
+            self._rows("placa,tipo de cobro,monto\nABC123,Mensual,\nNEW1,Diario fijo,5\n"),
+            dry_run=True,
+        )
+
+        self.assertEqual((result.created, result.updated), (["NEW1"], ["ABC123"]))
+        self.assertEqual(PlatePolicy.objects.get(plate="ABC123").billing_type, "DAILY")
+        self.assertFalse(PlatePolicy.objects.filter(plate="NEW1").exists())
+
+
+class LoadEntriesTests(TestCase):
+    """
+    Carga masiva de entradas históricas (load_entries)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fee = Fee.objects.create(name="Normal")
+        Range.objects.create(fee=cls.fee, start_minute=0, amount=Decimal("10.00"))
+        Range.objects.create(fee=cls.fee, start_minute=60, amount=Decimal("20.00"))
+
+        PlatePolicy.objects.create(plate="DIA001", billing_type="DAILY", amount=Decimal("15.00"))
+        PlatePolicy.objects.create(plate="MES001", billing_type="MONTHLY", amount=Decimal("300.00"))
+
+        Configuration.objects.create(name="Parqueo", ability=50)
+
+        Entry.objects.create(plate="DENTRO1")
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "entradas.csv"
+
+    def _load(self, text, **options):
+        self.path.write_text(text)
+        call_command("load_entries", self.path, stdout=StringIO(), **options)
+
+    def test_prices_states_and_ledger(self):
+        self._load(
+            "plate,entry_date_hour,departure_date_hour,fee_id\n"
+            f"abc-123,2026-03-10 08:00,2026-03-10 08:30,{self.fee.pk}\n"
+            f"XYZ789,2026-03-10 08:00,2026-03-10 09:30,{self.fee.pk}\n"
+            f"dia-001,2026-03-10 08:00,2026-03-10 18:00,{self.fee.pk}\n"
+            f"MES001,2026-03-10 08:00,2026-03-10 18:00,{self.fee.pk}\n"
+            f"ACT001,2026-03-10 08:00,,{self.fee.pk}\n"
+        )
+
+        loaded = {
+            entry.plate_normalized: entry
+            for entry in Entry.objects.exclude(plate="DENTRO1")
+        }
+
+        self.assertEqual(
+            {
+                plate: (entry.state, entry.final_minutes, entry.final_amount)
+                for plate, entry in loaded.items()
+            },
+            {
+                "ABC123": (False, 30, Decimal("10.00")),
+                "XYZ789": (False, 90, Decimal("20.00")),
+                "DIA001": (False, 600, Decimal("15.00")),
+                "MES001": (False, 600, Decimal("0.00")),
+                "ACT001": (True, None, None),
+            },
+        )
+        self.assertEqual(loaded["ABC123"].plate, "ABC123")
+        self.assertEqual(loaded["ABC123"].plate_display, format_plate("ABC123"))
+        self.assertEqual(loaded["DIA001"].plate, "DIA001")
+        self.assertEqual(
+            [loaded[plate].fee_id for plate in ("DIA001", "MES001", "ACT001")],
+            [None, None, self.fee.pk],
+        )
+        self.assertEqual(
+            loaded["ABC123"].entry_date_hour,
+            make_aware(datetime(2026, 3, 10, 8)),
+        )
+
+        revenue = {
+            row.source: (row.count, row.amount)
+            for row in DailyRevenue.objects.filter(date=datetime(2026, 3, 10).date())
+        }
+
+        self.assertEqual(revenue, {
+            DailyRevenue.PARKING_FEE: (3, Decimal("30.00")),
+            DailyRevenue.DAILY_SUBSCRIPTION: (1, Decimal("15.00")),
+        })
+        self.assertEqual(Configuration.objects.occupancy()["occupied"], 2)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT tableoid::regclass::text FROM parking_entry WHERE NOT state"
+            )
+            self.assertEqual(cursor.fetchall(), [(partition_name(date(2026, 3, 1)),)])
+
+    def test_invalid_rows_stop_the_load(self):
+        for row in (
+            ",2026-03-10 08:00,,",
+            "ABCDEFGHIJK,2026-03-10 08:00,,",
+            "ABC123,2026-03-10 09:00,2026-03-10 08:00,",
+            "ABC123,2026-03-10 08:00,2026-03-10 09:00,999999",
+        ):
+            with self.subTest(row=row):
+                with self.assertRaisesMessage(CommandError, "Archivo no válido"):
+                    self._load(f"plate,entry_date_hour,departure_date_hour,fee_id\n{row}\n")
+
+        self.assertEqual(Entry.objects.count(), 1)
+
+    def test_active_conflicts(self):
+        for rows in (
+            "NUEVA1,2026-03-10 08:00\nNUEVA1,2026-03-10 09:00\n",
+            "DENTRO1,2026-03-10 08:00\n",
+        ):
+            with self.subTest(rows=rows):
+                with self.assertRaisesMessage(CommandError, "más de una entrada activa"):
+                    self._load(f"plate,entry_date_hour\n{rows}")
+
+        self.assertEqual(Entry.objects.count(), 1)
+
+    def test_unknown_columns(self):
+        with self.assertRaisesMessage(CommandError, "Columnas no reconocidas: monto"):
+            self._load("plate,entry_date_hour,monto\nABC123,2026-03-10 08:00,5\n")
+
+    def test_dry_run_does_not_save(self):
+        self._load(
+            f"plate,entry_date_hour,departure_date_hour,fee_id\n"
+            f"ABC123,2026-03-10 08:00,2026-03-10 08:30,{self.fee.pk}\n",
+            dry_run=True,
+        )
+
+        self.assertEqual(Entry.objects.count(), 1)
+        self.assertFalse(DailyRevenue.objects.filter(date=datetime(2026, 3, 10).date()).exists())
+
+
+class ChunksTests(SimpleTestCase):
+    def test_marks_last_chunk(self):
+        self.assertEqual(
+            list(chunks(iter(range(5)), 2)),
+            [([0, 1], False), ([2, 3], False), ([4], True)],
+        )
+        self.assertEqual(list(chunks(iter([]), 2)), [])
+
+
+class EntryPartitionTests(TestCase):
+    """
+    Tabla de entradas particionada por mes de salida (migración 0020)
+    """
+
+    def test_active_plate_index_on_default_partition(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname = %s",
+                [DEFAULT_PARTITION, ACTIVE_PLATE_CONSTRAINT],
+            )
+            definition, = cursor.fetchone()
+
+        self.assertIn("UNIQUE INDEX", definition)
+        self.assertIn("WHERE state", definition)
+
+        Entry.objects.create(plate="DUP001")
+
+        with self.assertRaises(ActiveEntryExists):
+            Entry.objects.create(plate="DUP001")
+    def _partition_of(self, entry):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text FROM {Entry._meta.db_table} WHERE id = %s",
+                [entry.pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_ensure_partitions_moves_default_rows(self):
+        month = date(2030, 6, 1)
+        entry_date = make_aware(datetime(2030, 6, 10, 8))
+
+        # Mes sin partición: la salida cae en la partición por defecto
+        departed = Entry.objects.create(
+            plate="PAR001",
+            entry_date_hour=entry_date,
+            departure_date_hour=entry_date + timedelta(hours=1),
+        )
+        following = Entry.objects.create(
+            plate="PAR002",
+            entry_date_hour=entry_date,
+            departure_date_hour=make_aware(datetime(2030, 7, 2, 8)),
+        )
+        active = Entry.objects.create(plate="PAR003", entry_date_hour=entry_date)
+
+        for entry in (departed, following, active):
+            self.assertEqual(self._partition_of(entry), DEFAULT_PARTITION)
+
+        with connection.cursor() as cursor:
+            self.assertEqual(
+                ensure_partitions(cursor, month, month),
+                [partition_name(month)],
+            )
+            self.assertEqual(ensure_partitions(cursor, month, month), [])
+
+        self.assertEqual(self._partition_of(departed), partition_name(month))
+        self.assertEqual(self._partition_of(following), DEFAULT_PARTITION)
+        self.assertEqual(self._partition_of(active), DEFAULT_PARTITION)
+        self.assertEqual(Entry.objects.get(pk=departed.pk).plate, "PAR001")
+
+
+class EntryRevenueTests(TestCase):
+    """
+    Libro de ingresos (DailyRevenue) al dar salida, editar y borrar entradas
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fee = Fee.objects.create(name="Normal")
+        Range.objects.create(fee=cls.fee, start_minute=0, amount=Decimal("10.00"))
+        Range.objects.create(fee=cls.fee, start_minute=120, amount=Decimal("25.00"))
+
+    def _revenue(self, day):
+        return {
+            row.source: (row.count, row.amount)
+            for row in DailyRevenue.objects.filter(date=day)
+        }
+
+    def test_departure_edit_and_delete_move_revenue(self):
+        first_day, second_day = date(2026, 3, 10), date(2026, 3, 11)
+
+        entry = Entry.objects.create(
+            plate="ING001",
+            entry_date_hour=make_aware(datetime(2026, 3, 10, 8)),
+            fee=self.fee,
+        )
+        self.assertEqual(self._revenue(first_day), {})
+
+        entry.departure_date_hour = make_aware(datetime(2026, 3, 10, 9))
+        entry.save()
+
+        self.assertEqual(self._revenue(first_day), {
+            DailyRevenue.PARKING_FEE: (1, Decimal("10.00")),
+        })
+
+        # Otra fecha de salida: el aporte pasa de día y cambia el monto
+        entry.departure_date_hour = make_aware(datetime(2026, 3, 11, 9))
+        entry.save()
+
+        self.assertEqual(self._revenue(first_day), {
+            DailyRevenue.PARKING_FEE: (0, Decimal("0.00")),
+        })
+        self.assertEqual(self._revenue(second_day), {
+            DailyRevenue.PARKING_FEE: (1, Decimal("25.00")),
+        })
+
+        entry.delete()
+
+        self.assertEqual(self._revenue(second_day), {
+            DailyRevenue.PARKING_FEE: (0, Decimal("0.00")),
+        })
+
+    def test_daily_subscription_revenue(self):
+        PlatePolicy.objects.create(plate="DIA002", billing_type="DAILY", amount=Decimal("15.00"))
+
+        entry = Entry.objects.create(
+            plate="DIA002",
+            entry_date_hour=make_aware(datetime(2026, 3, 10, 8)),
+        )
+        entry.departure_date_hour = make_aware(datetime(2026, 3, 10, 18))
+        entry.save()
+
+        self.assertEqual(self._revenue(date(2026, 3, 10)), {
+            DailyRevenue.DAILY_SUBSCRIPTION: (1, Decimal("15.00")),
+        })
+
+
+class OccupancyTests(TestCase):
+    """
+    Espacios ocupados de Configuration: contador y reconciliación
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.configuration = Configuration.objects.create(name="Parqueo", ability=10)
+
+    def _occupied(self):
+        return Configuration.objects.occupancy()["occupied"]
+
+    def test_entries_move_occupancy(self):
+        entry = Entry.objects.create(plate="OCU001")
+        Entry.objects.create(plate="OCU002")
+        self.assertEqual(self._occupied(), 2)
+
+        entry.departure_date_hour = entry.entry_date_hour + timedelta(hours=1)
+        entry.save()
+        self.assertEqual(self._occupied(), 1)
+
+        Entry.objects.get(plate="OCU002").delete()
+        self.assertEqual(self._occupied(), 0)
+
+    def test_move_occupancy_never_goes_below_zero(self):
+        Configuration.objects.move_occupancy(-3)
+
+        self.assertEqual(self._occupied(), 0)
+
+    def test_reconcile_corrects_drift(self):
+        Entry.objects.create(plate="OCU003")
+        Entry.objects.create(plate="OCU004")
+
+        # Contador desviado (p. ej. cambios hechos fuera de Entry.save)
+        Configuration.objects.update(occupied=7)
+
+        self.assertEqual(Configuration.objects.reconcile_occupancy(), 2)
+        self.assertEqual(self._occupied(), 2)
+
+
+class ReportJobQueueTests(TestCase):
+    """
+    Cola de trabajos de reportes: reclamar y devolver abandonados
+    """
+
+    def _enqueue(self, day):
+        return ReportJob.objects.enqueue("day", "pdf", {"date": day})
+
+    def test_claim_next_takes_oldest_pending(self):
+        first = self._enqueue("2026-03-10")
+        second = self._enqueue("2026-03-11")
+
+        claimed = ReportJob.objects.claim_next()
+        self.assertEqual(claimed, first)
+        self.assertEqual(claimed.status, ReportJob.RUNNING)
+        self.assertIsNotNone(claimed.started_at)
+
+        self.assertEqual(ReportJob.objects.claim_next(), second)
+        self.assertIsNone(ReportJob.objects.claim_next())
+
+        first.refresh_from_db()
+        self.assertEqual(first.status, ReportJob.RUNNING)
+
+    def test_requeue_stale_jobs(self):
+        stale = self._enqueue("2026-03-10")
+        running = self._enqueue("2026-03-11")
+
+        ReportJob.objects.claim_next()
+        ReportJob.objects.claim_next()
+        ReportJob.objects.filter(pk=stale.pk).update(
+            started_at=now() - STALE_JOB_AFTER - timedelta(minutes=1),
+            progress=40,
+        )
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        running.refresh_from_db()
+
+        self.assertEqual(
+            (stale.status, stale.progress, stale.started_at),
+            (ReportJob.PENDING, 0, None),
+        )
+        self.assertEqual(running.status, ReportJob.RUNNING)
+        self.assertEqual(ReportJob.objects.claim_next(), stale)
+
+
+class ReportCacheTests(TestCase):
+    """
+    Caché de reportes de periodos cerrados por versión de datos
+    """
+
+    params = {"date": "2026-03-10"}
+    today = date(2026, 3, 20)
+
+    def setUp(self):
+        self.root = Path(self.enterContext(TemporaryDirectory()))
+        self.enterContext(override_settings(REPORT_CACHE_ROOT=self.root / "cache"))
+
+    def _key(self):
+        return report_cache_key("day", "pdf", self.params, today=self.today)
+
+    def _store(self, key):
+        source = self.root / "report.pdf"
+        source.write_bytes(b"%PDF")
+        store_artifact(key, "pdf", source)
+
+    def test_open_period_is_not_cached(self):
+        self.assertIsNone(
+            report_cache_key("day", "pdf", self.params, today=date(2026, 3, 10))
+        )
+
+    def test_hit_then_miss_after_bump(self):
+        key = self._key()
+        self._store(key)
+
+        self.assertEqual(self._key(), key)
+        self.assertEqual(cached_artifact(key, "pdf").read_bytes(), b"%PDF")
+
+        ReportDataVersion.objects.bump([report_data_key(date(2026, 3, 10))])
+
+        new_key = self._key()
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(cached_artifact(new_key, "pdf"))
+
+    def test_entry_change_expires_closed_day(self):
+        key = self._key()
+        self._store(key)
+
+        Entry.objects.create(
+            plate="CAC001",
+            entry_date_hour=make_aware(datetime(2026, 3, 10, 8)),
+            departure_date_hour=make_aware(datetime(2026, 3, 10, 9)),
+        )
+
+        self.assertNotEqual(self._key(), key)
@@ -2,38 +2,58 @@ from .views import (
     entry_edit_view,
     register,
     search_plate,
+    active_plate_suggestions,
     departure,
     record,
+    plate_search,
     go_to_departure,
     subscription_plate_list,
     subscription_register,
     subscription_edit,
+    subscription_import,
     toggle_subscription_active,
     imprimir_ticket,
+    scan_ticket,
+    scan_legacy_ticket,
     parking_generate_reports_form,
     report_day,
     report_month,
     report_period,
     report_plate,
+    tariff_simulator,
+    occupancy,
+    report_job_detail,
+    report_job_status,
+    report_job_download,
 )
 from django.urls import path
 
 urlpatterns = [
     path("busqueda/", search_plate, name="search_plate"),
+    path("busqueda/activas/", active_plate_suggestions, name="active_plate_suggestions"),
     path("registro/<str:plate>", register, name="register"),
     path("salida/<int:pk>", departure, name="departure"),
     path("historial/", record, name="record"),
+    path("placas/buscar/", plate_search, name="plate_search"),
     path('go-to-departure/<int:pk>/', go_to_departure, name='go_to_departure'),
     path('editar/<int:pk>/', entry_edit_view, name='edit_entry'),
     path('suscripciones/', subscription_plate_list, name='subscription_plate_list'),
     path('suscripciones/registrar', subscription_register, name='subscription_register'),
+    path('suscripciones/importar', subscription_import, name='subscription_import'),
     path('suscripciones/<int:pk>', subscription_edit, name='subscription_edit'),
     path('suscripciones/desactivar/<int:pk>', toggle_subscription_active, name='toggle_subscription_active'),
     path('suscripciones/activar/<int:pk>', toggle_subscription_active, name='toggle_subscription_active'),
     path('ticket/', imprimir_ticket),
+    path('ticket/escanear/<str:token>/', scan_ticket, name='scan_ticket'),
+    path('ticket/anterior/<int:pk>/', scan_legacy_ticket, name='scan_legacy_ticket'),
     path('reportes/', parking_generate_reports_form, name='parking_reports'),
     path("reporte/hoy/", report_day, name="report_day"),
     path("reporte/mes/", report_month, name="report_month"),
     path("reporte/periodo/", report_period, name="report_period"),
     path("reporte/placa/", report_plate, name="report_plate"),
+    path("reporte/trabajo/<int:pk>/", report_job_detail, name="report_job_detail"),
+    path("reporte/trabajo/<int:pk>/estado/", report_job_status, name="report_job_status"),
+    path("reporte/trabajo/<int:pk>/descargar/", report_job_download, name="report_job_download"),
+    path("simulador-tarifas/", tariff_simulator, name="tariff_simulator"),
+    path("ocupacion/", occupancy, name="occupancy"),
 ]
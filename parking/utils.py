@@ -1,18 +1,24 @@
 
-from io import BytesIO
+from functools import lru_cache
+from itertools import islice
+
 from django.utils import timezone
 from openpyxl import Workbook
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-import weasyprint
+import qrcode
+from qrcode.image.svg import SvgPathImage
 
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import (
     Font,
     PatternFill,
     Alignment,
     Border,
     Side,
+    NamedStyle,
 )
+from openpyxl.utils import get_column_letter
+
+from parking.services.fee_catalog import fee_catalog
 
 
 def minutes_to_hours_and_minutes(total_minutes: int):
@@ -22,6 +28,17 @@ def minutes_to_hours_and_minutes(total_minutes: int):
     return f"{hours:02d}", f"{minutes:02d}"
 
 
+def normalize_plate(plate: str) -> str:
+    """
+    Placa solo con letras y números en mayúsculas (para búsquedas):
+    "p-40 807" -> "P40807"
+    """
+    if not plate:
+        return ""
+
+    return "".join(char for char in plate.upper() if char.isalnum())
+
+
 def format_plate(plate: str) -> str:
     """
     Formatea una placa así:
@@ -59,60 +76,53 @@ def format_plate(plate: str) -> str:
     return f"{first} {' '.join(groups)}"
 
 
-def render_pdf_response(
-    request,
-    template_name,
-    context,
-    filename,
-):
-    html_string = render_to_string(
-        template_name,
-        context
-    )
-
-    pdf = weasyprint.HTML(
-        string=html_string,
-        base_url=request.build_absolute_uri("/")
-    ).write_pdf()
-
-    response = HttpResponse(
-        pdf,
-        content_type="application/pdf"
-    )
-
-    response["Content-Disposition"] = (
-        f'inline; filename="{filename}"'
-    )
+def chunks(iterable, size):
+    """
+    Bloques de `size` elementos como (bloque, es el último), sin cargar
+    más de dos bloques a la vez
+    """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
 
-    return response
+    while chunk:
+        following = list(islice(iterator, size))
+        yield chunk, not following
+        chunk = following
 
 
-def export_report_excel(context, report_date, report_end_date=None, type=None, plate=None):
+@lru_cache(maxsize=1024)
+def qr_svg(data: str) -> str:
+    """
+    Código QR como SVG en línea (sin PIL ni base64).
+    Se guarda en caché: reimprimir un ticket no vuelve a generarlo.
+    """
+    image = qrcode.make(data, image_factory=SvgPathImage)
 
-    wb = Workbook()
+    return image.to_string(encoding="unicode")
 
-    ws = wb.active
-    ws.title = "Reporte diario"
 
-    # ESTILOS
-    header_fill = PatternFill(
-        fill_type="solid",
-        fgColor="212529"
-    )
+# Estilos compartidos del reporte: se registran una vez en el libro
+# y cada celda solo guarda el nombre
+EXCEL_HEADER_STYLE = "report_header"
+EXCEL_CELL_STYLE = "report_cell"
+EXCEL_AMOUNT_STYLE = "report_amount"
+EXCEL_TOTAL_LABEL_STYLE = "report_total_label"
+EXCEL_TOTAL_STYLE = "report_total"
 
-    header_font = Font(
-        color="FFFFFF",
-        bold=True
-    )
+EXCEL_HEADERS = [
+    "Placa",
+    "Entrada",
+    "Salida",
+    "Tiempo",
+    "Tipo",
+    "Monto",
+]
 
-    bold_font = Font(
-        bold=True
-    )
+EXCEL_DATE_FORMAT = "%d/%m - %I:%M %p"
+EXCEL_AMOUNT_FORMAT = "$#,##0.00"
 
-    center = Alignment(
-        horizontal="center"
-    )
 
+def _excel_styles():
     thin = Side(style="thin")
 
     border = Border(
@@ -122,139 +132,147 @@ def export_report_excel(context, report_date, report_end_date=None, type=None, p
         bottom=thin
     )
 
-    # TOTAL
-    ws["E1"] = "Total ingresos"
-    ws["E1"].font = bold_font
+    return [
+        NamedStyle(
+            name=EXCEL_HEADER_STYLE,
+            fill=PatternFill(fill_type="solid", fgColor="212529"),
+            font=Font(color="FFFFFF", bold=True),
+            alignment=Alignment(horizontal="center"),
+            border=border,
+        ),
+        NamedStyle(name=EXCEL_CELL_STYLE, border=border),
+        NamedStyle(
+            name=EXCEL_AMOUNT_STYLE,
+            border=border,
+            number_format=EXCEL_AMOUNT_FORMAT,
+        ),
+        NamedStyle(name=EXCEL_TOTAL_LABEL_STYLE, font=Font(bold=True)),
+        NamedStyle(
+            name=EXCEL_TOTAL_STYLE,
+            font=Font(bold=True),
+            number_format=EXCEL_AMOUNT_FORMAT,
+        ),
+    ]
 
-    total_cell = ws["F1"]
 
-    total_cell.value = float(context["total_income"])
-    total_cell.font = bold_font
-    total_cell.number_format = "$#,##0.00"
+def _excel_column_widths(context):
+    """
+    Ancho de cada columna según el valor más largo que puede tener.
 
+    En un libro de solo escritura los anchos se escriben antes que la
+    primera fila, así que se calculan con los límites de cada columna
+    (largo de la placa, formato de fecha, tipos de cobro del reporte y
+    nombres de tarifas) en lugar de recorrer las celdas.
+    """
+    from parking.models import Entry
 
-    # DETALLE
-    row = 3
-
-    headers = [
-        "Placa",
-        "Entrada",
-        "Salida",
-        "Tiempo",
-        "Tipo",
-        "Monto",
-    ]
+    # Todos los campos del formato tienen ancho fijo
+    date_width = len(timezone.now().strftime(EXCEL_DATE_FORMAT))
 
-    for col, header in enumerate(headers, start=1):
+    fee_names = [fee.name for fee in fee_catalog.all()]
 
-        cell = ws.cell(
-            row=row,
-            column=col,
-            value=header
-        )
+    # Tipos fijos y el del reporte por placa ("Suscripción - DIARIO - $…"),
+    # solos o con el nombre de la tarifa
+    labels = {"Tarifa", "Suscripción - DIARIO", "Suscripción - MENSUAL"}
 
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center
-        cell.border = border
+    if context.get("type_label"):
+        labels.add(context["type_label"])
 
-    row += 1
+    types = [
+        *labels,
+        *(f"{label} - {name}" for label in labels for name in fee_names),
+        *(str(item["text"]) for item in context.get("summary", ()) if "text" in item),
+    ]
 
-    # DATOS
-    for entry in context["entries"]:
+    longest = [
+        Entry._meta.get_field("plate").max_length,
+        date_width,
+        date_width,
+        len("0000:00"),
+        max(len(text) for text in types + ["Total ingresos"]),
+        len(f"${float(context['total_income']):,.2f}"),
+    ]
 
-        ws.cell(
-            row=row,
-            column=1,
-            value=entry.plate
-        )
+    return [
+        max(width, len(header)) + 3
+        for width, header in zip(longest, EXCEL_HEADERS)
+    ]
 
-        entry_date = timezone.localtime(entry.entry_date_hour)
 
-        ws.cell(
-            row=row,
-            column=2,
-            value=entry_date.strftime(
-                "%d/%m - %I:%M %p"
-            )
-            if entry_date else ""
-        )
+def _excel_row(ws, values, style):
+    cells = []
 
-        departure_date = timezone.localtime(entry.departure_date_hour)
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        cells.append(cell)
 
-        ws.cell(
-            row=row,
-            column=3,
-            value=departure_date.strftime(
-                "%d/%m - %I:%M %p"
-            )
-            if departure_date else ""
-        )
+    return cells
 
-        ws.cell(
-            row=row,
-            column=4,
-            value=entry.duration
-        )
 
-        ws.cell(
-            row=row,
-            column=5,
-            value=entry.type + " - " + entry.fee.name if entry.fee else entry.type
-        )
+def write_report_excel(context, target):
+    """
+    Escribe el reporte de entradas en un libro de Excel en `target`
+    (ruta o archivo).
 
-        amount_cell = ws.cell(
-            row=row,
-            column=6,
-            value=float(entry.final_amount or 0)
-        )
+    Usa un libro de solo escritura: cada fila se vuelca al archivo al
+    agregarse, la memoria no crece con la cantidad de entradas.
+    """
 
-        amount_cell.number_format = "$#,##0.00"
+    wb = Workbook(write_only=True)
 
-        for col in range(1, 7):
-            ws.cell(row=row, column=col).border = border
+    for style in _excel_styles():
+        wb.add_named_style(style)
 
-        row += 1
+    ws = wb.create_sheet("Reporte diario")
 
-    # AUTOAJUSTE COLUMNAS
-    for column in ws.columns:
+    for index, width in enumerate(_excel_column_widths(context), start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
 
-        max_length = 0
+    # TOTAL
+    label = WriteOnlyCell(ws, value="Total ingresos")
+    label.style = EXCEL_TOTAL_LABEL_STYLE
 
-        try:
-            column_letter = column[0].column_letter
-        except AttributeError:
-            continue
+    total = WriteOnlyCell(ws, value=float(context["total_income"]))
+    total.style = EXCEL_TOTAL_STYLE
 
-        for cell in column:
+    ws.append([None, None, None, None, label, total])
+    ws.append([])
 
-            if cell.value:
+    # DETALLE
+    ws.append(_excel_row(ws, EXCEL_HEADERS, EXCEL_HEADER_STYLE))
 
-                max_length = max(
-                    max_length,
-                    len(str(cell.value))
-                )
+    # DATOS
+    for entry in context["entries"]:
+
+        entry_date = timezone.localtime(entry.entry_date_hour)
 
-        ws.column_dimensions[
-            column_letter
-        ].width = max_length + 3
+        departure_date = (
+            timezone.localtime(entry.departure_date_hour)
+            if entry.departure_date_hour else None
+        )
 
+        row = _excel_row(ws, [
+            entry.plate,
+            entry_date.strftime(EXCEL_DATE_FORMAT),
+            departure_date.strftime(EXCEL_DATE_FORMAT) if departure_date else "",
+            entry.duration,
+            entry.type + " - " + entry.fee.name if entry.fee else entry.type,
+        ], EXCEL_CELL_STYLE)
 
-    # DESCARGA
-    output = BytesIO()
+        amount = WriteOnlyCell(ws, value=float(entry.final_amount or 0))
+        amount.style = EXCEL_AMOUNT_STYLE
+        row.append(amount)
 
-    wb.save(output)
+        ws.append(row)
 
-    output.seek(0)
+    wb.save(target)
 
-    response = HttpResponse(
-        output.read(),
-        content_type=(
-            "application/vnd.openxmlformats-"
-            "officedocument.spreadsheetml.sheet"
-        )
-    )
 
+def report_excel_filename(type, report_date, report_end_date=None, plate=None):
+    """
+    Nombre del archivo de Excel según el tipo de reporte (None si no es válido)
+    """
     report_title = "reporte-parqueo-"
 
     match type:
@@ -267,10 +285,6 @@ def export_report_excel(context, report_date, report_end_date=None, type=None, p
         case "plate":
             report_title = report_title + "placa-" + plate + "-" + report_date.strftime("%d-%m-%Y") + "-al-" + report_end_date.strftime("%d-%m-%Y") + ".xlsx"
         case _:
-                return HttpResponse("Tipo de reporte no válido", status=400)
-
-    response["Content-Disposition"] = (
-        f'attachment; filename={report_title}'
-    )
+            return None
 
-    return response
\ No newline at end of file
+    return report_title
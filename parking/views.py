@@ -1,35 +1,50 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse, FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
 from django.utils.timezone import now, localtime
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import permission_required
-from io import BytesIO
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Q
 
-import qrcode, base64
-
-from .models import  Entry, PlatePolicy, Range
+from .models import  ActiveEntryExists, Entry, PlatePolicy, Configuration, ReportJob
 from .forms import (
     EntryForm, 
     EntryEditForm, 
     PlateSearchForm, 
     EntryExitForm, 
     PlatePolicyForm, 
+    PlatePolicyImportForm,
     ReportFilterByDayForm,
     ReportFilterByMonthForm,
     ReportFilterByPeriodForm,
-    ReportFilterByPlateForm
-)
-from parking.utils import (
-    minutes_to_hours_and_minutes,
-    render_pdf_response, export_report_excel
+    ReportFilterByPlateForm,
+    TariffSimulationForm
 )
-from parking.services.report_service import (
-    generate_day_report, generate_month_report,
-    generate_period_report,
-    generate_plate_report
+from parking.utils import minutes_to_hours_and_minutes, qr_svg
+from parking.services.active_plates import active_plates
+from parking.services.fee_catalog import fee_catalog
+from parking.services.pricing import EPOCH, ONE_MICROSECOND, price_entries
+from parking.services.policy_import import import_policies, read_policy_rows
+from parking.services.policy_resolver import policy_resolver
+from parking.services.tariff_simulator import simulate_tariff
+from parking.services.ticket_tokens import make_ticket_token, read_ticket_token
+from parking.services.report_cache import cached_artifact, report_cache_key
+from parking.services.report_export import STREAM_CONTENT_TYPES, stream_report
+from parking.services.report_jobs import (
+    CONTENT_TYPES, report_filename, report_params
 )
 
 
+# Filas por página del historial del día
+RECORD_PAGE_SIZE = 60
+
+# Resultados por página de la búsqueda parcial de placas
+PLATE_SEARCH_PAGE_SIZE = 20
+
+
 @permission_required('parking.add_entry', raise_exception=True)
 def register(request, plate=None):
     """Vista que nos lleva a la pantalla de registro de entradas"""
@@ -41,10 +56,7 @@ def register(request, plate=None):
     plate = plate.strip().upper()
 
     # Buscar política activa para la placa
-    policy = PlatePolicy.objects.filter(
-        plate=plate,
-        active=True
-    ).first()
+    policy = policy_resolver.resolve(plate)
 
     # Si tiene política y NO es por hora → no debe elegir tarifa
     has_subscription = policy and policy.billing_type in ["MONTHLY", "DAILY"]
@@ -101,14 +113,70 @@ def departure(request, pk):
         pk=pk
     )
 
+    return _departure(request, entry)
+
+@permission_required('parking.add_entry', raise_exception=True)
+def scan_ticket(request, token):
+    """
+    Salida desde el QR del ticket: la firma se valida sin consultar la
+    base y la entrada se busca por id en una sola consulta
+    """
+    ticket = read_ticket_token(token)
+
+    entry = None
+
+    if ticket:
+        entry_id, issued_at = ticket
+
+        # Solo entradas activas: la consulta se limita a la partición por
+        # defecto y un ticket ya utilizado no se encuentra
+        entry = (
+            Entry.objects
+            .active()
+            .select_related("fee")
+            .filter(pk=entry_id)
+            .first()
+        )
+
+        # Un ticket de otra entrada con el mismo id no sirve
+        if entry and int(entry.entry_date_hour.timestamp()) != issued_at:
+            entry = None
+
+    if entry is None:
+        messages.error(request, "Ticket inválido o ya utilizado")
+        return redirect("search_plate")
+
+    return _departure(request, entry)
+
+@permission_required('parking.add_entry', raise_exception=True)
+def scan_legacy_ticket(request, pk):
+    """
+    Salida desde el QR de un ticket impreso antes de los tokens firmados
+    ("entry_id=<id>"); solo entradas activas y mientras
+    TICKET_ACCEPT_LEGACY_QR esté activo
+    """
+    entry = None
+
+    if settings.TICKET_ACCEPT_LEGACY_QR:
+        entry = (
+            Entry.objects
+            .active()
+            .select_related("fee")
+            .filter(pk=pk)
+            .first()
+        )
+
+    if entry is None:
+        messages.error(request, "Ticket inválido o ya utilizado")
+        return redirect("search_plate")
+
+    return _departure(request, entry)
+
+def _departure(request, entry):
+
     plate = entry.plate.strip().upper()
 
-    policy = (
-        PlatePolicy.objects
-        .filter(plate=plate, active=True)
-        .only("billing_type", "amount")
-        .first()
-    )
+    policy = policy_resolver.resolve(plate)
 
     billing_type = policy.billing_type if policy else "HOURLY"
 
@@ -182,16 +250,23 @@ def entry_edit_view(request, pk):
     """ Vista para editar una entrada (solo admin) """
 
     entry = get_object_or_404(Entry, pk=pk)
-    policy = PlatePolicy.objects.filter(plate=entry.plate, active=True).first()
+    policy = policy_resolver.resolve(entry.plate)
 
     if request.method == "POST":
         form = EntryEditForm(request.POST, instance=entry)
 
         if form.is_valid():
-            form.save()
-
-            messages.success(request, "Entrada actualizada correctamente.")
-            return redirect('record')
+            try:
+                form.save()
+            except ActiveEntryExists:
+                form.add_error(
+                    'plate',
+                    "Ya existe una entrada activa con esta placa."
+                )
+                messages.error(request, "Corrige los errores del formulario.")
+            else:
+                messages.success(request, "Entrada actualizada correctamente.")
+                return redirect('record')
         else:
             messages.error(request, "Corrige los errores del formulario.")
     else:
@@ -215,9 +290,8 @@ def search_plate(request):
         if form.is_valid():
             plate = form.cleaned_data['plate'].upper()
 
-            entry = Entry.objects.filter(
-                plate=plate,
-                state=True
+            entry = Entry.objects.active().filter(
+                plate=plate
             ).first()
 
             if entry:
@@ -240,6 +314,25 @@ def search_plate(request):
         'form': form
     })
 
+@login_required(login_url='login')
+def active_plate_suggestions(request):
+    """
+    Autocompletado de la garita: placas activas que empiezan con `q`,
+    resueltas en memoria sin consultar la base
+    """
+
+    return JsonResponse({
+        "results": [
+            {
+                "id": pk,
+                "plate": plate,
+                "plate_display": display,
+                "departure_url": reverse("go_to_departure", args=[pk]),
+            }
+            for pk, plate, display in active_plates.suggest(request.GET.get("q", ""))
+        ]
+    })
+
 @permission_required('parking.view_entry', raise_exception=True)
 def record(request):
 
@@ -248,47 +341,147 @@ def record(request):
     entries = (
         Entry.objects
         .entries_today_and_active(today)
+        .with_policy()
         .select_related("fee")
         .only(
             "plate",
+            "plate_display",
             "entry_date_hour",
             "departure_date_hour",
-            "fee",
-            "state"
+            "fee__name",
+            "state",
+            "final_minutes",
+            "final_amount",
         )
-        .order_by("-state", "-entry_date_hour")
     )
 
+    cursor = _parse_record_cursor(request.GET.get("cursor"))
+
+    page = entries.order_by("-state", "-entry_date_hour", "-id")
+
+    if cursor:
+        page = page.after_record_cursor(*cursor)
+
+    # Una fila extra indica si hay otra página
+    rows = list(page[:RECORD_PAGE_SIZE + 1])
+    has_next = len(rows) > RECORD_PAGE_SIZE
+    rows = rows[:RECORD_PAGE_SIZE]
+
     # Contadores para los chips
-    total_entries = entries.count()
-    active_entries = entries.filter(state=True).count()
-    finished_entries = entries.filter(state=False).count()
+    active_entries = 0
+    open_rows = []
 
-    plates = entries.values_list("plate", flat=True)
+    for e in rows:
+        e.billing_type = e.policy_billing_type or "HOURLY"
 
-    policies = (
-        PlatePolicy.objects
-        .filter(plate__in=plates, active=True)
-        .only("plate", "billing_type", "amount")
-    )
+        if e.state:
+            active_entries += 1
 
-    policy_dict = {p.plate: p for p in policies}
+        if e.state or e.final_amount is None:
+            open_rows.append(e)
+        else:
+            e.amount = e.final_amount
+            e.hours, e.minutes = minutes_to_hours_and_minutes(e.final_minutes or 0)
+
+    # Las entradas abiertas se calculan en un solo lote
+    if open_rows:
+        minutes, amounts = price_entries(
+            [e.entry_date_hour for e in open_rows],
+            [e.departure_date_hour for e in open_rows],
+            [e.fee_id for e in open_rows],
+            [e.policy_billing_type for e in open_rows],
+            [e.policy_amount for e in open_rows],
+        )
 
-    for e in entries:
-        policy = policy_dict.get(e.plate)
+        for e, minute, amount in zip(open_rows, minutes.tolist(), amounts.tolist()):
+            e.hours, e.minutes = minutes_to_hours_and_minutes(minute)
+            e.amount = amount
 
-        e.billing_type = policy.billing_type if policy else "HOURLY"
+    if cursor or has_next:
+        counters = entries.order_by().aggregate(
+            total=Count("id"),
+            active=Count("id", filter=Q(state=True)),
+        )
+        total_entries, active_entries = counters["total"], counters["active"]
+    else:
+        total_entries = len(rows)
 
-        minutes, amount = e.calculate_amount(policy=policy)
-        e.hours, e.minutes = minutes_to_hours_and_minutes(minutes)
-        e.amount = amount
+    next_cursor = _record_cursor(rows[-1]) if has_next else None
 
     return render(request, "parking/record.html", {
-        "entries": entries,
+        "entries": rows,
         "today": today,
         "total_entries": total_entries,
         "active_entries": active_entries,
-        "finished_entries": finished_entries,
+        "finished_entries": total_entries - active_entries,
+        "next_cursor": next_cursor,
+        "is_first_page": cursor is None,
+    })
+
+
+def _record_cursor(entry):
+    """
+    Cursor de la última fila mostrada: estado.microsegundos.id
+    """
+    timestamp = entry.entry_date_hour - EPOCH
+
+    return "{}.{}.{}".format(
+        int(entry.state),
+        timestamp // ONE_MICROSECOND,
+        entry.pk
+    )
+
+
+def _parse_record_cursor(value):
+    """
+    Retorna (state, entry_date_hour, id) o None si el cursor no es válido
+    """
+    try:
+        state, microseconds, pk = (int(part) for part in value.split("."))
+        return bool(state), EPOCH + microseconds * ONE_MICROSECOND, pk
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+@permission_required('parking.view_entry', raise_exception=True)
+def plate_search(request):
+    """
+    Búsqueda parcial de placas en todo el historial (JSON paginado
+    con el mismo cursor del historial)
+    """
+
+    entries = (
+        Entry.objects
+        .plate_matches(request.GET.get("q", ""))
+        .only("plate", "plate_display", "entry_date_hour", "departure_date_hour", "state")
+        .order_by("-state", "-entry_date_hour", "-id")
+    )
+
+    cursor = _parse_record_cursor(request.GET.get("cursor"))
+
+    if cursor:
+        entries = entries.after_record_cursor(*cursor)
+
+    rows = list(entries[:PLATE_SEARCH_PAGE_SIZE + 1])
+    has_next = len(rows) > PLATE_SEARCH_PAGE_SIZE
+    rows = rows[:PLATE_SEARCH_PAGE_SIZE]
+
+    return JsonResponse({
+        "results": [
+            {
+                "id": e.pk,
+                "plate": e.plate,
+                "plate_display": e.formatted_plate(),
+                "entry_date_hour": localtime(e.entry_date_hour).isoformat(),
+                "departure_date_hour": (
+                    localtime(e.departure_date_hour).isoformat()
+                    if e.departure_date_hour else None
+                ),
+                "state": e.state,
+                "departure_url": reverse("departure", args=[e.pk]) if e.state else None,
+            }
+            for e in rows
+        ],
+        "next_cursor": _record_cursor(rows[-1]) if has_next else None,
     })
 
 @permission_required('parking.view_platepolicy', raise_exception=True)
@@ -331,6 +524,53 @@ def subscription_register(request):
         'form': form
     })
 
+@permission_required(
+    ('parking.add_platepolicy', 'parking.change_platepolicy'),
+    raise_exception=True
+)
+def subscription_import(request):
+    """ Importar o actualizar suscripciones en lote desde CSV/XLSX """
+
+    result = None
+
+    if request.method == 'POST':
+        form = PlatePolicyImportForm(request.POST, request.FILES)
+
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+
+            try:
+                result = import_policies(
+                    read_policy_rows(upload.file, upload.name),
+                    dry_run=form.cleaned_data['dry_run']
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                if form.cleaned_data['dry_run']:
+                    messages.info(
+                        request,
+                        f"Validación: {result.imported} filas listas, {len(result.errors)} con errores"
+                    )
+                else:
+                    messages.success(
+                        request,
+                        f"{len(result.created)} suscripciones registradas y "
+                        f"{len(result.updated)} actualizadas"
+                    )
+        else:
+            messages.error(
+                request,
+                "Corrige los errores del formulario"
+            )
+    else:
+        form = PlatePolicyImportForm()
+
+    return render(request, "parking/subscription_import.html", {
+        'form': form,
+        'result': result
+    })
+
 @permission_required('parking.change_platepolicy', raise_exception=True)
 def subscription_edit(request, pk):
     """ Editar suscripción / política de cobro de una placa """
@@ -398,21 +638,17 @@ def save_return_url(request):
 @login_required(login_url='login')
 def imprimir_ticket(request):
     entry_id = request.GET.get('entry_id')
-    entry = Entry.objects.get(id=entry_id)
 
-    qr_data = f"entry_id={entry.id}"
-
-    qr = qrcode.make(qr_data)
-    buffer = BytesIO()
-    qr.save(buffer, format="PNG")
+    # Una sola consulta: política y tarifa salen de las cachés en memoria
+    entry = get_object_or_404(
+        Entry.objects.only("plate", "entry_date_hour", "fee_id"),
+        id=entry_id
+    )
 
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    qr_data = f"ticket={make_ticket_token(entry.id, entry.entry_date_hour)}"
 
     # 🔥 Buscar suscripción activa
-    policy = PlatePolicy.objects.filter(
-        plate=entry.plate,
-        active=True
-    ).first()
+    policy = policy_resolver.resolve(entry.plate)
 
     # 🔥 Determinar qué mostrar como costo
     if policy:
@@ -424,15 +660,15 @@ def imprimir_ticket(request):
             costo = "Suscripción activa"
     else:
         # 🔥 usar tarifa por rango
-        first_range = Range.objects.filter(fee=entry.fee).order_by('start_minute').first()
-        costo = f"${first_range.amount}" if first_range else "0.00"
+        first_amount = fee_catalog.first_amount(entry.fee_id)
+        costo = f"${first_amount}" if first_amount is not None else "0.00"
 
     context = {
         'placa': entry.plate,
         'fecha_llegada': localtime(entry.entry_date_hour).strftime('%d/%m/%Y'),
         'hora_llegada': localtime(entry.entry_date_hour).strftime('%I:%M %p'),
         'costo_hora': costo,
-        'qr_code': qr_base64,
+        'qr_svg': qr_svg(qr_data),
         'policy': policy  # 🔥 opcional para usar en template
     }
 
@@ -463,31 +699,7 @@ def report_day(request):
         messages.error(request, "Formulario inválido para el reporte")
         return redirect("parking_reports")
 
-    report_date = form.cleaned_data["date"]
-
-    context = generate_day_report(report_date)
-
-    match request.GET.get("format"):
-        case "pdf":
-
-            return render_pdf_response(
-                request,
-                "parking/reports/parking_day_report_pdf.html",
-                context,
-                f"reporte-dia-{report_date}.pdf"
-            )
-        
-        case "xlsx":
-
-            return export_report_excel(
-                context,
-                report_date,
-                type="day"
-            )
-        
-        case _:
-            messages.error(request, "Formato no soportado para el reporte")
-            return redirect("parking_reports")
+    return _enqueue_report(request, "day", form)
     
 @permission_required('parking.view_statistics_entry', raise_exception=True)
 def report_month(request):
@@ -498,31 +710,7 @@ def report_month(request):
         messages.error(request, "Formulario inválido para el reporte")
         return redirect("parking_reports")
 
-    month = form.cleaned_data["month_date"]
-
-    context = generate_month_report(month)
-
-    match request.GET.get("format"):
-        case "pdf":
-
-            return render_pdf_response(
-                request,
-                "parking/reports/parking_month_report_pdf.html",
-                context,
-                f"reporte-mes-{month}.pdf"
-            )
-        
-        case "xlsx":
-
-            return export_report_excel(
-                context,
-                month,
-                type="monthly"
-            )
-        
-        case _:
-            messages.error(request, "Formato no soportado para el reporte")
-            return redirect("parking_reports")
+    return _enqueue_report(request, "month", form)
 
 @permission_required('parking.view_statistics_entry', raise_exception=True)
 def report_period(request):
@@ -532,34 +720,8 @@ def report_period(request):
     if not form.is_valid():
         messages.error(request, "Formulario inválido para el reporte")
         return redirect("parking_reports")
-    
-    start_date = form.cleaned_data["period_start_date"]
-    end_date = form.cleaned_data["period_end_date"]
 
-    context = generate_period_report(start_date, end_date)
-
-    match request.GET.get("format"):
-        case "pdf":
-
-            return render_pdf_response(
-                request,
-                "parking/reports/parking_period_report_pdf.html",
-                context,
-                f"reporte-periodo-{start_date}-{end_date}.pdf"
-            )
-        
-        case "xlsx":
-
-            return export_report_excel(
-                context,
-                start_date,
-                end_date,
-                "period"
-            )
-        
-        case _:
-            messages.error(request, "Formato no soportado para el reporte")
-            return redirect("parking_reports")
+    return _enqueue_report(request, "period", form)
 
 @permission_required('parking.view_statistics_entry', raise_exception=True)
 def report_plate(request):
@@ -577,31 +739,156 @@ def report_plate(request):
         messages.error(request, f"No se encontraron registros para la placa {plate}")
         return redirect("parking_reports")
 
-    start_date = form.cleaned_data["start_date"]
-    end_date = form.cleaned_data["end_date"]
+    return _enqueue_report(request, "plate", form)
 
-    context = generate_plate_report(plate, start_date, end_date)
 
-    match request.GET.get("format"):
-        case "pdf":
+def _enqueue_report(request, report_type, form):
+    """
+    Encola el reporte para el worker y lleva a la página de progreso.
+    CSV y JSONL no pasan por el worker: se envían fila por fila.
+    """
+    output_format = request.GET.get("format")
 
-            return render_pdf_response(
-                request,
-                "parking/reports/parking_plate_report_pdf.html",
-                context,
-                f"reporte-placa-{plate}.pdf"
+    if output_format in STREAM_CONTENT_TYPES:
+        params = report_params(report_type, form.cleaned_data)
+
+        return StreamingHttpResponse(
+            stream_report(report_type, output_format, params),
+            content_type=STREAM_CONTENT_TYPES[output_format],
+            headers={
+                "Content-Disposition": (
+                    'attachment; filename="'
+                    f'{report_filename(report_type, output_format, params)}"'
+                ),
+            },
+        )
+
+    if output_format not in dict(ReportJob.OUTPUT_FORMATS):
+        messages.error(request, "Formato no soportado para el reporte")
+        return redirect("parking_reports")
+
+    params = report_params(report_type, form.cleaned_data)
+
+    # Periodo cerrado ya generado: se sirve directo de la caché
+    cache_key = report_cache_key(report_type, output_format, params)
+    cached = cache_key and cached_artifact(cache_key, output_format)
+
+    if cached:
+        try:
+            return FileResponse(
+                open(cached, "rb"),
+                as_attachment=output_format != "pdf",
+                filename=report_filename(report_type, output_format, params),
+                content_type=CONTENT_TYPES[output_format],
             )
+        except FileNotFoundError:
+            # Se eliminó de la caché en este momento: se genera de nuevo
+            pass
+
+    job = ReportJob.objects.enqueue(
+        report_type,
+        output_format,
+        params,
+        user=request.user,
+        base_url=request.build_absolute_uri("/"),
+    )
 
-        case "xlsx":
+    return redirect("report_job_detail", pk=job.pk)
 
-            return export_report_excel(
-                context,
-                start_date,
-                end_date,
-                "plate",
-                plate=plate
+
+def _get_report_job(request, pk):
+    """ Solo quien pidió el reporte (o un superusuario) puede verlo """
+
+    jobs = ReportJob.objects.all()
+
+    if not request.user.is_superuser:
+        jobs = jobs.filter(requested_by=request.user)
+
+    return get_object_or_404(jobs, pk=pk)
+
+@permission_required('parking.view_statistics_entry', raise_exception=True)
+def report_job_detail(request, pk):
+    """ Página de progreso de un reporte en generación """
+
+    job = _get_report_job(request, pk)
+
+    return render(request, "parking/reports/report_job_detail.html", {
+        "job": job,
+    })
+
+@permission_required('parking.view_statistics_entry', raise_exception=True)
+def report_job_status(request, pk):
+    """ Estado y progreso del reporte: fragmento para htmx o JSON """
+
+    job = _get_report_job(request, pk)
+
+    if request.headers.get("HX-Request"):
+        return render(request, "parking/reports/partials/_report_job_status.html", {
+            "job": job,
+        })
+
+    return JsonResponse({
+        "id": job.pk,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "download_url": (
+            reverse("report_job_download", args=[job.pk])
+            if job.status == ReportJob.DONE else None
+        ),
+    })
+
+@permission_required('parking.view_statistics_entry', raise_exception=True)
+def report_job_download(request, pk):
+    """ Descarga el archivo del reporte terminado """
+
+    job = _get_report_job(request, pk)
+
+    if job.status != ReportJob.DONE:
+        raise Http404("El reporte aún no está listo")
+
+    try:
+        artifact = open(job.artifact_path, "rb")
+    except FileNotFoundError:
+        raise Http404("El archivo del reporte ya no existe")
+
+    return FileResponse(
+        artifact,
+        as_attachment=job.output_format != "pdf",
+        filename=job.filename,
+        content_type=CONTENT_TYPES[job.output_format],
+    )
+
+
+@staff_member_required(login_url='login')
+def tariff_simulator(request):
+    """ Simula el impacto de una tabla de rangos propuesta sobre las salidas históricas """
+
+    result = None
+
+    if request.GET:
+        form = TariffSimulationForm(request.GET)
+
+        if form.is_valid():
+            result = simulate_tariff(
+                form.cleaned_data["fee"].pk,
+                form.cleaned_data["start_date"],
+                form.cleaned_data["end_date"],
+                form.cleaned_data["ranges"],
             )
+        else:
+            messages.error(request, "Corrige los errores del formulario")
+    else:
+        form = TariffSimulationForm()
+
+    return render(request, "parking/tariff_simulator.html", {
+        "form": form,
+        "result": result,
+    })
+
+
+@login_required(login_url='login')
+def occupancy(request):
+    """ Espacios ocupados y disponibles (JSON para las pantallas de acceso) """
 
-        case _:
-            messages.error(request, "Formato no soportado para el reporte")
-            return redirect("parking_reports")
+    return JsonResponse(Configuration.objects.occupancy())
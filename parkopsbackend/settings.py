@@ -33,6 +33,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Third party
     # 'rest_framework',
@@ -71,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'parking.context_processors.occupancy',
             ],
         },
     },
@@ -103,6 +105,26 @@ else:
         }
     }
 
+# REPORTES
+# Archivos generados por el worker de reportes (run_report_worker);
+# debe ser una ruta compartida con los procesos web
+REPORT_ARTIFACT_ROOT = os.getenv('REPORT_ARTIFACT_ROOT', '/tmp/parkops-reports')
+
+# Reportes de periodos cerrados ya generados (LRU por tamaño en disco)
+REPORT_CACHE_ROOT = os.getenv('REPORT_CACHE_ROOT', os.path.join(REPORT_ARTIFACT_ROOT, 'cache'))
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# PDF grandes: procesos que renderizan las partes de la tabla en paralelo
+# y filas a partir de las cuales se divide el reporte
+REPORT_PDF_WORKERS = int(os.getenv('REPORT_PDF_WORKERS', os.cpu_count() or 1))
+REPORT_PDF_PARALLEL_MIN_ROWS = int(os.getenv('REPORT_PDF_PARALLEL_MIN_ROWS', '1500'))
+
+# TICKETS
+# Aceptar al escanear los QR impresos antes de los tokens firmados
+# ("entry_id=<id>"), solo para entradas activas; desactivar cuando ya
+# no queden vehículos con esos tickets
+TICKET_ACCEPT_LEGACY_QR = os.getenv('TICKET_ACCEPT_LEGACY_QR', 'True') == 'True'
+
 # PASSWORD VALIDATORS
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
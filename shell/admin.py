@@ -1,3 +1,9 @@
 from django.contrib import admin
+from shell.models import DailyRevenue
 
-# Register your models here.
+
+@admin.register(DailyRevenue)
+class DailyRevenueAdmin(admin.ModelAdmin):
+    list_display = ('date', 'source', 'count', 'amount')
+    list_filter = ('source',)
+    list_per_page = 20
@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Count, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+
+from bathrooms.models import BathroomEntry
+from parking.models import Entry, period_bounds
+from shell.models import DailyRevenue
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el libro de ingresos diarios a partir de las salidas "
+        "del parqueo y las entradas al baño"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Fecha final (AAAA-MM-DD)")
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"]
+
+        if start and end and end < start:
+            raise CommandError("La fecha final no puede ser anterior a la inicial")
+
+        with transaction.atomic():
+            rows = self._parking_rows(start, end) + self._bathroom_rows(start, end)
+
+            # Las suscripciones mensuales no guardan historial: solo se
+            # recalcula la fila del mes actual
+            ledger = DailyRevenue.objects.exclude(
+                source=DailyRevenue.MONTHLY_SUBSCRIPTION
+            )
+
+            if start:
+                ledger = ledger.filter(date__gte=start)
+            if end:
+                ledger = ledger.filter(date__lte=end)
+
+            deleted, _ = ledger.delete()
+            DailyRevenue.objects.bulk_create(rows, batch_size=1000)
+            DailyRevenue.objects.refresh_monthly_subscriptions()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Libro reconstruido: {deleted} filas eliminadas, {len(rows)} creadas"
+        ))
+
+    def _parking_rows(self, start, end):
+        entries = Entry.objects.filter(departure_date_hour__isnull=False)
+
+        if start:
+            entries = entries.filter(departure_date_hour__gte=period_bounds(start, start)[0])
+        if end:
+            entries = entries.filter(departure_date_hour__lt=period_bounds(end, end)[1])
+
+        totals = (
+            entries
+            .annotate(
+                day=TruncDate("departure_date_hour"),
+                source=Case(
+                    When(
+                        Q(fee__isnull=True) & Q(final_amount__gt=0),
+                        then=Value(DailyRevenue.DAILY_SUBSCRIPTION),
+                    ),
+                    default=Value(DailyRevenue.PARKING_FEE),
+                ),
+            )
+            .values("day", "source")
+            .annotate(
+                count=Count("id"),
+                amount=Coalesce(Sum("final_amount"), Value(Decimal("0"))),
+            )
+            .order_by()
+        )
+
+        return [
+            DailyRevenue(
+                date=row["day"],
+                source=row["source"],
+                count=row["count"],
+                amount=row["amount"],
+            )
+            for row in totals
+        ]
+
+    def _bathroom_rows(self, start, end):
+        entries = BathroomEntry.objects.filter(fee__isnull=False)
+
+        if start:
+            entries = entries.filter(entry_date_hour__gte=period_bounds(start, start)[0])
+        if end:
+            entries = entries.filter(entry_date_hour__lt=period_bounds(end, end)[1])
+
+        totals = (
+            entries
+            .annotate(day=TruncDate("entry_date_hour"))
+            .values("day")
+            .annotate(count=Count("id"), amount=Sum("fee__amount"))
+            .order_by()
+        )
+
+        return [
+            DailyRevenue(
+                date=row["day"],
+                source=DailyRevenue.BATHROOM_FEE,
+                count=row["count"],
+                amount=row["amount"],
+            )
+            for row in totals
+        ]
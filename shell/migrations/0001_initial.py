@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('source', models.CharField(choices=[('PARKING_FEE', 'Tarifa de parqueo'), ('DAILY_SUBSCRIPTION', 'Suscripción diaria'), ('MONTHLY_SUBSCRIPTION', 'Suscripción mensual'), ('BATHROOM_FEE', 'Tarifa de baño')], max_length=20, verbose_name='Origen')),
+                ('count', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto')),
+            ],
+            options={
+                'verbose_name': 'Ingreso diario',
+                'verbose_name_plural': 'Ingresos diarios',
+                'constraints': [models.UniqueConstraint(fields=('date', 'source'), name='unique_daily_revenue_source')],
+            },
+        ),
+    ]
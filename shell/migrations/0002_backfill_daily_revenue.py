@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Case, Count, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils.timezone import localdate
+
+
+def backfill(apps, schema_editor):
+    """
+    Carga el libro con los movimientos existentes
+    (equivale a rebuild_daily_revenue)
+    """
+    DailyRevenue = apps.get_model("shell", "DailyRevenue")
+    Entry = apps.get_model("parking", "Entry")
+    BathroomEntry = apps.get_model("bathrooms", "BathroomEntry")
+    PlatePolicy = apps.get_model("parking", "PlatePolicy")
+
+    parking = (
+        Entry.objects
+        .filter(departure_date_hour__isnull=False)
+        .annotate(
+            day=TruncDate("departure_date_hour"),
+            source=Case(
+                When(
+                    Q(fee__isnull=True) & Q(final_amount__gt=0),
+                    then=Value("DAILY_SUBSCRIPTION"),
+                ),
+                default=Value("PARKING_FEE"),
+            ),
+        )
+        .values("day", "source")
+        .annotate(
+            count=Count("id"),
+            amount=Coalesce(Sum("final_amount"), Value(Decimal("0"))),
+        )
+        .order_by()
+    )
+
+    bathrooms = (
+        BathroomEntry.objects
+        .filter(fee__isnull=False)
+        .annotate(day=TruncDate("entry_date_hour"))
+        .values("day")
+        .annotate(count=Count("id"), amount=Sum("fee__amount"))
+        .order_by()
+    )
+
+    monthly = PlatePolicy.objects.filter(
+        active=True,
+        billing_type="MONTHLY",
+    ).aggregate(count=Count("id"), amount=Sum("amount"))
+
+    rows = [
+        DailyRevenue(
+            date=row["day"],
+            source=row["source"],
+            count=row["count"],
+            amount=row["amount"],
+        )
+        for row in parking
+    ]
+    rows += [
+        DailyRevenue(
+            date=row["day"],
+            source="BATHROOM_FEE",
+            count=row["count"],
+            amount=row["amount"],
+        )
+        for row in bathrooms
+    ]
+    rows.append(
+        DailyRevenue(
+            date=localdate().replace(day=1),
+            source="MONTHLY_SUBSCRIPTION",
+            count=monthly["count"],
+            amount=monthly["amount"] or 0,
+        )
+    )
+
+    DailyRevenue.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("shell", "0001_initial"),
+        ("parking", "0015_entry_indexes"),
+        ("bathrooms", "0002_alter_bathroomentry_options"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,187 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import Count, F, Q, Sum
+from django.utils.timezone import localdate
 
-# Create your models here.
+
+class DailyRevenueQuerySet(models.QuerySet):
+    def between(self, start_date, end_date):
+        return self.filter(date__gte=start_date, date__lte=end_date)
+
+    def totals(self):
+        totals = self.aggregate(
+            count=Sum("count"),
+            amount=Sum("amount"),
+        )
+
+        return totals["count"] or 0, totals["amount"] or 0
+
+
+class DailyRevenueManager(models.Manager):
+    def get_queryset(self):
+        return DailyRevenueQuerySet(self.model, using=self._db)
+
+    def add(self, date, source, amount, count=1):
+        """
+        Suma (o resta, con valores negativos) al acumulado del día y origen.
+
+        Debe llamarse dentro de la misma transacción que el cambio que
+        lo origina; la fila queda bloqueada hasta el commit.
+        """
+        rows = self.filter(date=date, source=source)
+
+        if rows.update(count=F("count") + count, amount=F("amount") + amount):
+            return
+
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(date=date, source=source, count=count, amount=amount)
+        except IntegrityError:
+            # Otra transacción creó la fila al mismo tiempo
+            rows.update(count=F("count") + count, amount=F("amount") + amount)
+
+    def move(self, previous, current):
+        """
+        Mueve el aporte de un registro de (día, origen, monto) `previous`
+        a `current`; cualquiera de los dos puede ser None
+        """
+        if previous:
+            date, source, amount = previous
+            self.add(date, source, -amount, count=-1)
+
+        if current:
+            self.add(*current)
+
+    def refresh_monthly_subscriptions(self, date=None):
+        """
+        Recalcula la fila de suscripciones mensuales del mes de `date`
+        (por defecto el actual) con las políticas mensuales activas
+        """
+        from parking.models import PlatePolicy
+
+        month_start = (date or localdate()).replace(day=1)
+
+        totals = PlatePolicy.objects.using(self.db).monthly().aggregate(
+            count=Count("id"),
+            amount=Sum("amount"),
+        )
+
+        row, _ = self.update_or_create(
+            date=month_start,
+            source=self.model.MONTHLY_SUBSCRIPTION,
+            defaults={
+                "count": totals["count"],
+                "amount": totals["amount"] or 0,
+            },
+        )
+
+        return row
+
+    def monthly_subscriptions(self, date=None):
+        """
+        Retorna (suscripciones activas, ingreso) del mes actual;
+        la fila se crea la primera vez que se consulta en el mes
+        """
+        month_start = (date or localdate()).replace(day=1)
+
+        row = self.filter(
+            date=month_start,
+            source=self.model.MONTHLY_SUBSCRIPTION,
+        ).first()
+
+        if row is None:
+            row = self.refresh_monthly_subscriptions(month_start)
+
+        return row.count, row.amount
+
+    def income(self, start_date, end_date, sources):
+        return (
+            self.get_queryset()
+            .between(start_date, end_date)
+            .filter(source__in=sources)
+            .totals()
+        )
+
+    def dashboard(self, date):
+        """
+        Totales del día y del mes de `date` por origen en una sola consulta
+        """
+        month_start = date.replace(day=1)
+
+        rows = (
+            self.get_queryset()
+            .between(month_start, date)
+            .values("source")
+            .annotate(
+                month_count=Sum("count"),
+                month_amount=Sum("amount"),
+                day_count=Sum("count", filter=Q(date=date)),
+                day_amount=Sum("amount", filter=Q(date=date)),
+            )
+        )
+
+        return {
+            row["source"]: {
+                "day_count": row["day_count"] or 0,
+                "day_amount": row["day_amount"] or 0,
+                "month_count": row["month_count"] or 0,
+                "month_amount": row["month_amount"] or 0,
+            }
+            for row in rows
+        }
+
+
+class DailyRevenue(models.Model):
+    """
+    Ingresos acumulados por día y origen.
+
+    Se actualiza en la misma transacción que las salidas, las entradas
+    al baño y los cambios de suscripciones; el panel lee estas filas en
+    lugar de sumar las tablas de movimientos.
+    """
+
+    PARKING_FEE = "PARKING_FEE"
+    DAILY_SUBSCRIPTION = "DAILY_SUBSCRIPTION"
+    MONTHLY_SUBSCRIPTION = "MONTHLY_SUBSCRIPTION"
+    BATHROOM_FEE = "BATHROOM_FEE"
+
+    SOURCES = (
+        (PARKING_FEE, "Tarifa de parqueo"),
+        (DAILY_SUBSCRIPTION, "Suscripción diaria"),
+        (MONTHLY_SUBSCRIPTION, "Suscripción mensual"),
+        (BATHROOM_FEE, "Tarifa de baño"),
+    )
+
+    # Orígenes que suman al ingreso del parqueo
+    PARKING_SOURCES = (PARKING_FEE, DAILY_SUBSCRIPTION)
+
+    date = models.DateField("Fecha")
+
+    source = models.CharField(
+        "Origen",
+        max_length=20,
+        choices=SOURCES
+    )
+
+    count = models.IntegerField("Cantidad", default=0)
+
+    amount = models.DecimalField(
+        "Monto",
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+
+    objects = DailyRevenueManager()
+
+    class Meta:
+        verbose_name = "Ingreso diario"
+        verbose_name_plural = "Ingresos diarios"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "source"],
+                name="unique_daily_revenue_source",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.get_source_display()}: ${self.amount}"
@@ -6,8 +6,8 @@ from django.utils.timezone import now, localtime
 
 from .forms import LoginForm
 import logging
-from bathrooms.models import BathroomEntry
-from parking.models import Entry, PlatePolicy
+from parking.models import Entry
+from .models import DailyRevenue
 
 logger = logging.getLogger(__name__)
 
@@ -16,18 +16,27 @@ def dashboard(request):
     """Panel principal del sistema"""
 
     today = localtime(now()).date()
-    current_year = today.year
-    current_month = today.month
+
+    # Ingresos precalculados por día y origen (ver DailyRevenue)
+    revenue = DailyRevenue.objects.dashboard(today)
+    empty = {"day_count": 0, "day_amount": 0, "month_count": 0, "month_amount": 0}
+
+    parking = [revenue.get(source, empty) for source in DailyRevenue.PARKING_SOURCES]
+    bathroom = revenue.get(DailyRevenue.BATHROOM_FEE, empty)
+
+    total_subscriptions, subscriptions_income = (
+        DailyRevenue.objects.monthly_subscriptions(today)
+    )
 
     context = {
-        "total_daily_income": Entry.objects.today_income(today),
-        "total_monthly_income": Entry.objects.month_income(current_year, current_month),
+        "total_daily_income": sum(row["day_amount"] for row in parking),
+        "total_monthly_income": sum(row["month_amount"] for row in parking),
         "total_today_count_entries": Entry.objects.entries_today_count(today),
-        "daily_bathroom_income": BathroomEntry.objects.today_income(),
-        "monthly_bathroom_income": BathroomEntry.objects.month_income(),
-        "today_total_count": BathroomEntry.objects.total_today(),
-        "total_subscriptions_month_income": PlatePolicy.objects.month_income(),
-        "total_active_subscriptions": PlatePolicy.objects.total_active_monthly_subscriptions(),
+        "daily_bathroom_income": bathroom["day_amount"],
+        "monthly_bathroom_income": bathroom["month_amount"],
+        "today_total_count": bathroom["day_count"],
+        "total_subscriptions_month_income": subscriptions_income,
+        "total_active_subscriptions": total_subscriptions,
     }
 
     return render(request, "shell/dashboard.html", context)